@@ -20,6 +20,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../app'
 from app.models.user import User
 from app.models.document import Document
 from app.models.document_chunk import DocumentChunk
+from app.models.ingestion_job import IngestionJob
+from app.models.embedding_cache import EmbeddingCacheEntry
 from app.models.base import Base
 
 # add your model's MetaData object here
@@ -0,0 +1,49 @@
+"""add content hashes and embedding cache
+
+Revision ID: 00ceb560ecc2
+Revises: 009a8ac079cf
+Create Date: 2026-10-18 11:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '00ceb560ecc2'
+down_revision: Union[str, None] = '009a8ac079cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'embedding_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('text_hash', sa.String(length=64), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_embedding_cache_id'), 'embedding_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_embedding_cache_text_hash'), 'embedding_cache', ['text_hash'], unique=True)
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_documents_content_hash'), ['content_hash'], unique=False)
+    with op.batch_alter_table('ingestion_jobs') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingestion_jobs') as batch_op:
+        batch_op.drop_column('content_hash')
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_documents_content_hash'))
+        batch_op.drop_column('content_hash')
+    op.drop_index(op.f('ix_embedding_cache_text_hash'), table_name='embedding_cache')
+    op.drop_index(op.f('ix_embedding_cache_id'), table_name='embedding_cache')
+    op.drop_table('embedding_cache')
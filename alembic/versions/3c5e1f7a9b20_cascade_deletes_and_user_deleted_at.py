@@ -0,0 +1,47 @@
+"""cascade deletes and user deleted_at
+
+Revision ID: 3c5e1f7a9b20
+Revises: 748d09e2b637
+Create Date: 2026-10-18 16:21:37.640912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f7a9b20'
+down_revision: Union[str, None] = '748d09e2b637'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The constraints were created unnamed; this matches PostgreSQL's default
+# names and lets batch mode find them on SQLite, which recreates the tables.
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+FOREIGN_KEYS = (
+    ('documents', 'owner_id', 'users'),
+    ('document_chunks', 'document_id', 'documents'),
+    ('ingestion_jobs', 'owner_id', 'users'),
+)
+
+
+def _set_ondelete(ondelete: Union[str, None]) -> None:
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    _set_ondelete('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_ondelete(None)
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('deleted_at')
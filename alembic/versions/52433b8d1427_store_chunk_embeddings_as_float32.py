@@ -0,0 +1,76 @@
+"""store chunk embeddings as float32 bytes
+
+Revision ID: 52433b8d1427
+Revises: 619886b9ea94
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '52433b8d1427'
+down_revision: Union[str, None] = '619886b9ea94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+chunks = sa.table(
+    'document_chunks',
+    sa.column('id', sa.Integer),
+    sa.column('embedding', sa.Text),
+    sa.column('embedding_f32', sa.LargeBinary),
+)
+
+
+def _convert(source, target, transform) -> None:
+    """Copy ``source`` into ``target`` in id-ordered batches of BATCH_SIZE."""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(chunks.c.id, source)
+            .where(chunks.c.id > last_id, source.isnot(None))
+            .order_by(chunks.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            chunks.update().where(chunks.c.id == sa.bindparam('chunk_id')).values({target.name: sa.bindparam('value')}),
+            [{'chunk_id': row[0], 'value': transform(row[1])} for row in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_chunks', sa.Column('embedding_f32', sa.LargeBinary(), nullable=True))
+    # Old rows hold str(list_of_floats), which is valid JSON.
+    _convert(
+        chunks.c.embedding,
+        chunks.c.embedding_f32,
+        lambda text: np.asarray(json.loads(text), dtype='<f4').tobytes(),
+    )
+    with op.batch_alter_table('document_chunks') as batch_op:
+        batch_op.drop_column('embedding')
+        batch_op.alter_column('embedding_f32', new_column_name='embedding')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('document_chunks') as batch_op:
+        batch_op.alter_column('embedding', new_column_name='embedding_f32')
+    op.add_column('document_chunks', sa.Column('embedding', sa.Text(), nullable=True))
+    _convert(
+        chunks.c.embedding_f32,
+        chunks.c.embedding,
+        lambda data: str(np.frombuffer(data, dtype='<f4').tolist()),
+    )
+    with op.batch_alter_table('document_chunks') as batch_op:
+        batch_op.drop_column('embedding_f32')
@@ -0,0 +1,27 @@
+"""add documents owner_id id index
+
+Revision ID: 65ece2834950
+Revises: 8bcbd2f2d81a
+Create Date: 2026-10-18 13:02:19.640517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '65ece2834950'
+down_revision: Union[str, None] = '8bcbd2f2d81a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_documents_owner_id_id', 'documents', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_documents_owner_id_id', table_name='documents')
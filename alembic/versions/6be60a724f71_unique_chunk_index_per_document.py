@@ -0,0 +1,32 @@
+"""unique chunk index per document
+
+Revision ID: 6be60a724f71
+Revises: 65ece2834950
+Create Date: 2026-10-18 13:41:08.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '6be60a724f71'
+down_revision: Union[str, None] = '65ece2834950'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_document_chunks_document_id_chunk_index', 'document_chunks', ['document_id', 'chunk_index'], unique=True
+    )
+    # The composite index covers document_id lookups on its own.
+    op.drop_index('ix_document_chunks_document_id', table_name='document_chunks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_document_chunks_document_id', 'document_chunks', ['document_id'], unique=False)
+    op.drop_index('ix_document_chunks_document_id_chunk_index', table_name='document_chunks')
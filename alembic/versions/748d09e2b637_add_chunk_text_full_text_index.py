@@ -0,0 +1,38 @@
+"""add chunk text full-text index
+
+Revision ID: 748d09e2b637
+Revises: 6be60a724f71
+Create Date: 2026-10-18 15:02:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '748d09e2b637'
+down_revision: Union[str, None] = '6be60a724f71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN over the tsvector expression used by keyword search. Other databases
+    # use the in-process inverted index instead.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.create_index(
+        'ix_document_chunks_chunk_text_fts',
+        'document_chunks',
+        [sa.text("to_tsvector('english'::regconfig, chunk_text)")],
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_document_chunks_chunk_text_fts', table_name='document_chunks')
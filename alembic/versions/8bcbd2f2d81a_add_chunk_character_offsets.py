@@ -0,0 +1,31 @@
+"""add chunk character offsets
+
+Revision ID: 8bcbd2f2d81a
+Revises: 00ceb560ecc2
+Create Date: 2026-10-18 12:05:51.274630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8bcbd2f2d81a'
+down_revision: Union[str, None] = '00ceb560ecc2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('document_chunks') as batch_op:
+        batch_op.add_column(sa.Column('char_start', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('char_end', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('document_chunks') as batch_op:
+        batch_op.drop_column('char_end')
+        batch_op.drop_column('char_start')
@@ -0,0 +1,29 @@
+"""add ingestion job retry time
+
+Revision ID: a7d3e91c4b58
+Revises: 3c5e1f7a9b20
+Create Date: 2026-10-18 18:02:11.408213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e91c4b58'
+down_revision: Union[str, None] = '3c5e1f7a9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ingestion_jobs') as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingestion_jobs') as batch_op:
+        batch_op.drop_column('next_attempt_at')
@@ -1,43 +1,155 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends, Form, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from jose import jwt
+import asyncio
 import logging
+import os
+from typing import List, Optional
 
-from app.core.auth import authenticate_user, get_password_hash, get_db, get_current_user
+from app.core.auth import get_db, get_current_user
 from app.models.user import User
 from app.models.document import Document
 from app.models.document_chunk import DocumentChunk
-from sqlalchemy.orm import Session
-from app.core.auth import get_current_user
-from app.services import mock_external, vector_store
-from app.services import doc_ingestion
+from app.models.ingestion_job import IngestionJob
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+from app.services import hybrid_search, keyword_index, mock_external, vector_store
+from app.services import deletion, doc_ingestion, export
+from app.services.document import (
+    BulkSource, count_bulk_files, find_duplicate, ingest_file, ingest_files, reingest_file
+)
+from app.services.embeddings import query_cache
+from app.services.ingestion_jobs import enqueue_upload
+from app.core.config import (
+    BULK_UPLOAD_MAX_FILES, HYBRID_CANDIDATES, HYBRID_FUSION, HYBRID_RRF_K, HYBRID_VECTOR_WEIGHT, MAX_PAGE_SIZE,
+    PAGE_SIZE, SEARCH_BATCH_MAX_QUERIES, UPLOAD_DIR
+)
 from app.schemas.documents import (
-    DocumentBaseSchema, DocumentChunkSchema, DocumentListResponse, DocumentDetail, DocumentDetailResponse, DocumentChunkListResponse, DocumentUploadResponse, DocumentDeleteResponse, DocumentUploadResponseDetail, DocumentDeleteResponseDetail
+    BulkUploadFileResult, ChunkBatchSearchResponse, ChunkSearchResult, DocumentBaseSchema, DocumentChunkSchema, DocumentListResponse, DocumentDetail, DocumentDetailResponse, DocumentChunkListResponse, DocumentUploadResponse, DocumentDeleteResponse, DocumentUploadResponseDetail, DocumentDeleteResponseDetail,
+    DocumentBulkUploadResponse, DocumentReingestDetail, DocumentReingestResponse, IngestionJobSchema, IngestionJobResponse
 )
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
 
+def _chunk_select(include_embeddings: bool):
+    stmt = select(DocumentChunk)
+    if not include_embeddings:
+        stmt = stmt.options(defer(DocumentChunk.embedding))
+    return stmt
+
+
+def _chunk_schemas(chunks, include_embeddings: bool):
+    context = {"include": {"embedding"} if include_embeddings else set()}
+    return [DocumentChunkSchema.model_validate(c, context=context) for c in chunks]
+
+
+async def _ranked_chunks(db: AsyncSession, ranked, include_embeddings: bool):
+    """Load ``[(chunk_id, score), ...]`` in one IN query, keeping rank order and scores."""
+    scores = dict(ranked)
+    rank = {chunk_id: pos for pos, (chunk_id, _) in enumerate(ranked)}
+    chunks = list(await db.scalars(_chunk_select(include_embeddings).where(DocumentChunk.id.in_(rank))))
+    # IN (...) returns rows unordered.
+    chunks.sort(key=lambda c: rank[c.id])
+    chunk_data = _chunk_schemas(chunks, include_embeddings)
+    for chunk in chunk_data:
+        chunk.score = scores[chunk.id]
+    return chunk_data
+
+
+def _document_schema(doc: Document, include_content: bool = True) -> DocumentBaseSchema:
+    context = {"include": {"content"} if include_content else set()}
+    return DocumentBaseSchema.model_validate(doc, context=context)
+
+
+async def _owned_document(
+    db: AsyncSession, doc_id: int, owner_id: int, include_content: bool = True
+) -> Optional[Document]:
+    stmt = select(Document).where(Document.id == doc_id, Document.owner_id == owner_id)
+    if not include_content:
+        stmt = stmt.options(defer(Document.content))
+    return await db.scalar(stmt)
+
+
+async def _chunk_page(db: AsyncSession, doc_id: int, offset_index: int, limit: int, include_embeddings: bool):
+    """Chunks ``offset_index``, ``offset_index + 1``, ... of a document, one page at a time.
+
+    A range scan on the unique (document_id, chunk_index) index, so the cost
+    is the page size wherever it starts. Returns ``(chunks, next_offset_index)``.
+    """
+    chunks = (
+        await db.scalars(
+            _chunk_select(include_embeddings)
+            .where(
+                DocumentChunk.document_id == doc_id,
+                DocumentChunk.status == "active",
+                DocumentChunk.chunk_index >= offset_index,
+            )
+            .order_by(DocumentChunk.chunk_index)
+            .limit(limit + 1)
+        )
+    ).all()
+    if len(chunks) > limit:
+        return chunks[:limit], chunks[limit - 1].chunk_index + 1
+    return chunks, None
+
+
 @router.get("/", response_model=DocumentListResponse)
-def list_documents(
-    db: Session = Depends(get_db),
+async def list_documents(
+    cursor: Optional[int] = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_content: bool = False,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    docs = db.query(Document).filter(Document.owner_id == current_user.id).all()
-    data = [DocumentBaseSchema.from_orm(d) for d in docs]
+    # Keyset pagination on (owner_id, id): each page is one index range scan,
+    # however deep it is. Unlike GET /documents/{id}, content is only loaded
+    # when asked for, since a page may hold many large documents.
+    stmt = select(Document).where(Document.owner_id == current_user.id)
+    if not include_content:
+        stmt = stmt.options(defer(Document.content))
+    if cursor is not None:
+        stmt = stmt.where(Document.id > cursor)
+    docs = (await db.scalars(stmt.order_by(Document.id).limit(limit + 1))).all()
+    next_cursor = docs[limit - 1].id if len(docs) > limit else None
+    data = [_document_schema(d, include_content) for d in docs[:limit]]
     return DocumentListResponse(
         message="Documents fetched successfully",
         status=True,
         status_code=200,
-        data=data
+        data=data,
+        next_cursor=next_cursor
+    )
+
+@router.get("/export")
+async def export_documents(
+    include_content: bool = True,
+    include_chunks: bool = True,
+    include_embeddings: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    # NDJSON of every document and active chunk the caller owns, streamed
+    # from server-side cursors; see export.iter_export for the line format.
+    logging.info(f"User {current_user.username} exporting documents")
+    return StreamingResponse(
+        export.iter_export(current_user.id, include_content, include_chunks, include_embeddings),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="documents.ndjson"'},
     )
 
 @router.get("/{doc_id}", response_model=DocumentDetailResponse)
-def get_document(
+async def get_document(
     doc_id: int,
-    db: Session = Depends(get_db),
+    offset_index: int = Query(0, ge=0),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_content: bool = True,
+    include_embeddings: bool = False,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.owner_id == current_user.id).first()
+    doc = await _owned_document(db, doc_id, current_user.id, include_content)
     if not doc:
         return DocumentDetailResponse(
             message="Document not found",
@@ -45,26 +157,31 @@ def get_document(
             status_code=404,
             data=None
         )
-    chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc.id).all()
-    chunk_data = [DocumentChunkSchema.from_orm(c) for c in chunks]
+    chunks, next_offset_index = await _chunk_page(db, doc.id, offset_index, limit, include_embeddings)
+    chunk_data = _chunk_schemas(chunks, include_embeddings)
     data = DocumentDetail(
-        document=DocumentBaseSchema.from_orm(doc),
+        document=_document_schema(doc, include_content),
         chunks=chunk_data
     )
     return DocumentDetailResponse(
         message="Document fetched successfully",
         status=True,
         status_code=200,
-        data=data
+        data=data,
+        next_offset_index=next_offset_index
     )
 
 @router.get("/{doc_id}/chunks", response_model=DocumentChunkListResponse)
-def get_document_chunks(
+async def get_document_chunks(
     doc_id: int,
-    db: Session = Depends(get_db),
+    offset_index: int = Query(0, ge=0),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_content: bool = True,
+    include_embeddings: bool = False,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.owner_id == current_user.id).first()
+    doc = await _owned_document(db, doc_id, current_user.id, include_content)
     if not doc:
         return DocumentChunkListResponse(
             message="Document not found",
@@ -72,27 +189,28 @@ def get_document_chunks(
             status_code=404,
             data=None
         )
-    chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc.id).all()
-    chunk_data = [DocumentChunkSchema.from_orm(c) for c in chunks]
+    chunks, next_offset_index = await _chunk_page(db, doc.id, offset_index, limit, include_embeddings)
+    chunk_data = _chunk_schemas(chunks, include_embeddings)
     data = DocumentDetail(
-        document=DocumentBaseSchema.from_orm(doc),
+        document=_document_schema(doc, include_content),
         chunks=chunk_data
     )
     return DocumentChunkListResponse(
         message="Document chunks fetched successfully",
         status=True,
         status_code=200,
-        data=data
+        data=data,
+        next_offset_index=next_offset_index
     )
 
 @router.put("/{doc_id}", response_model=DocumentDetailResponse)
-def update_document(
+async def update_document(
     doc_id: int,
     name: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    doc = db.query(Document).filter(Document.id == doc_id, Document.owner_id == current_user.id).first()
+    doc = await _owned_document(db, doc_id, current_user.id)
     if not doc:
         return DocumentDetailResponse(
             message="Document not found",
@@ -102,10 +220,10 @@ def update_document(
         )
     if name:
         doc.name = name
-    db.commit()
-    db.refresh(doc)
+    await db.commit()
+    await db.refresh(doc)
     data = DocumentDetail(
-        document=DocumentBaseSchema.from_orm(doc),
+        document=_document_schema(doc),
         chunks=[]
     )
     return DocumentDetailResponse(
@@ -115,18 +233,61 @@ def update_document(
         data=data
     )
 
+@router.put("/{doc_id}/content", response_model=DocumentReingestResponse)
+async def update_document_content(
+    doc_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Replaces the document's text with the new file's. Only chunks whose
+    # text changed are embedded again; the rest keep their rows and vectors.
+    logging.info(f"User {current_user.username} updating content of document {doc_id} from {file.filename}")
+    if file.content_type not in doc_ingestion.SUPPORTED_CONTENT_TYPES:
+        return DocumentReingestResponse(
+            message="Unsupported file type",
+            status=False,
+            status_code=400,
+            data=None
+        )
+    doc = await _owned_document(db, doc_id, current_user.id, include_content=False)
+    if not doc:
+        return DocumentReingestResponse(
+            message="Document not found",
+            status=False,
+            status_code=404,
+            data=None
+        )
+    spooled = await doc_ingestion.spool_upload(file)
+    try:
+        result = await run_in_threadpool(
+            reingest_file, doc_id, current_user.id, spooled.path, file.content_type, content_hash=spooled.sha256
+        )
+    finally:
+        os.remove(spooled.path)
+    if result is None:
+        return DocumentReingestResponse(
+            message="Document not found",
+            status=False,
+            status_code=404,
+            data=None
+        )
+    return DocumentReingestResponse(
+        message="Document content updated",
+        status=True,
+        status_code=200,
+        data=DocumentReingestDetail(document_id=doc_id, **result._asdict())
+    )
+
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    background: bool = Form(False),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     logging.info(f"User {current_user.username} uploading file: {file.filename}")
-    if file.content_type not in [
-        "application/pdf",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "text/plain"
-    ]:
+    if file.content_type not in doc_ingestion.SUPPORTED_CONTENT_TYPES:
         logging.warning(f"Unsupported file type: {file.content_type}")
         return DocumentUploadResponse(
             message="Unsupported file type",
@@ -134,55 +295,131 @@ async def upload_document(
             status_code=400,
             data=None
         )
-    file_bytes = await file.read()
-    if file.content_type == "application/pdf":
-        text = doc_ingestion.extract_text_from_pdf(file_bytes)
-    elif file.content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        text = doc_ingestion.extract_text_from_docx(file_bytes)
-    else:
-        text = doc_ingestion.extract_text_from_txt(file_bytes)
-    document = Document(
-        name=file.filename,
-        owner_id=current_user.id,
-        content=text
-    )
-    db.add(document)
-    db.commit()
-    db.refresh(document)
+    directory = None
+    if background:
+        directory = UPLOAD_DIR
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+    spooled = await doc_ingestion.spool_upload(file, directory=directory)
+    duplicate = await find_duplicate(db, current_user.id, spooled.sha256)
+    if duplicate:
+        os.remove(spooled.path)
+        document, chunk_count = duplicate
+        logging.info(f"Upload of {file.filename} matches document {document.id}; skipping ingestion")
+        return DocumentUploadResponse(
+            message="Document already uploaded",
+            status=True,
+            status_code=200,
+            data=DocumentUploadResponseDetail(document_id=str(document.id), chunks=chunk_count)
+        )
+    if background:
+        job = await enqueue_upload(
+            db, current_user.id, file.filename, file.content_type, spooled.path, content_hash=spooled.sha256
+        )
+        return DocumentUploadResponse(
+            message="Document queued for ingestion",
+            status=True,
+            status_code=202,
+            data=DocumentUploadResponseDetail(job_id=job.id)
+        )
+    try:
+        # Parsing, embedding and the chunk inserts are blocking; they run in a
+        # worker thread (PDF/docx parsing in the process pool) on the sync engine.
+        document_id, chunk_count = await run_in_threadpool(
+            ingest_file, current_user.id, file.filename, spooled.path, file.content_type,
+            content_hash=spooled.sha256
+        )
+    finally:
+        os.remove(spooled.path)
     ext_result = mock_external.external_create_document({"name": file.filename, "owner": current_user.username})
-    chunks = doc_ingestion.chunk_text(text)
-    for idx, chunk in enumerate(chunks):
-        embedding = vector_store.mock_embedding(chunk)
-        doc_chunk = DocumentChunk(
-            document_id=document.id,
-            chunk_index=idx,
-            chunk_text=chunk,
-            embedding=str(embedding)
-        )
-        db.add(doc_chunk)
-        db.flush()
-        vector_store.vector_store.add_vector(doc_chunk.id, embedding)
-    db.commit()
     return DocumentUploadResponse(
         message="Document uploaded and ingested successfully",
         status=True,
         status_code=201,
         data=DocumentUploadResponseDetail(
-            document_id=str(document.id),
-            chunks=len(chunks),
+            document_id=str(document_id),
+            chunks=chunk_count,
             external_status=ext_result["status"],
             external_id=ext_result["external_id"]
         )
     )
 
+@router.post("/upload/bulk", response_model=DocumentBulkUploadResponse)
+async def upload_documents_bulk(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user)
+):
+    # Many files (repeat the ``files`` field) and/or zip archives in one
+    # request. Extraction runs on a worker pool and documents are written
+    # in large transactions; each file gets its own result.
+    logging.info(f"User {current_user.username} bulk uploading {len(files)} file(s)")
+    if len(files) > BULK_UPLOAD_MAX_FILES:
+        return DocumentBulkUploadResponse(
+            message=f"At most {BULK_UPLOAD_MAX_FILES} files per request",
+            status=False,
+            status_code=400,
+            data=None
+        )
+    sources = []
+    try:
+        for file in files:
+            spooled = await doc_ingestion.spool_upload(file)
+            content_type = doc_ingestion.guess_content_type(file.filename, file.content_type)
+            sources.append(BulkSource(file.filename, spooled.path, content_type, spooled.sha256))
+        if await run_in_threadpool(count_bulk_files, sources) > BULK_UPLOAD_MAX_FILES:
+            return DocumentBulkUploadResponse(
+                message=f"At most {BULK_UPLOAD_MAX_FILES} files per request",
+                status=False,
+                status_code=400,
+                data=None
+            )
+        results = await run_in_threadpool(ingest_files, current_user.id, sources)
+    finally:
+        for source in sources:
+            os.remove(source.path)
+    for result in results:
+        if result.status == "created":
+            mock_external.external_create_document({"name": result.name, "owner": current_user.username})
+    counts = {
+        status: sum(result.status == status for result in results) for status in ("created", "duplicate", "failed")
+    }
+    return DocumentBulkUploadResponse(
+        message=f"{counts['created']} created, {counts['duplicate']} duplicate, {counts['failed']} failed",
+        status=True,
+        status_code=200,
+        data=[BulkUploadFileResult(**result._asdict()) for result in results]
+    )
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job = await db.scalar(
+        select(IngestionJob).where(IngestionJob.id == job_id, IngestionJob.owner_id == current_user.id)
+    )
+    if not job:
+        return IngestionJobResponse(
+            message="Job not found",
+            status=False,
+            status_code=404,
+            data=None
+        )
+    return IngestionJobResponse(
+        message="Job fetched successfully",
+        status=True,
+        status_code=200,
+        data=IngestionJobSchema.model_validate(job)
+    )
+
 @router.delete("/{doc_id}", response_model=DocumentDeleteResponse)
-def delete_document(
+async def delete_document(
     doc_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     logging.info(f"User {current_user.username} deleting document {doc_id}")
-    doc = db.query(Document).filter(Document.id == doc_id, Document.owner_id == current_user.id).first()
+    doc = await _owned_document(db, doc_id, current_user.id, include_content=False)
     if not doc:
         return DocumentDeleteResponse(
             message="Document not found",
@@ -191,9 +428,7 @@ def delete_document(
             data=None
         )
     ext_result = mock_external.external_delete_document(f"ext_{doc.name}")
-    db.query(DocumentChunk).filter(DocumentChunk.document_id == doc.id).delete()
-    db.delete(doc)
-    db.commit()
+    await deletion.delete_document(db, doc.id)
     return DocumentDeleteResponse(
         message="Document and its chunks deleted",
         status=True,
@@ -204,17 +439,210 @@ def delete_document(
         )
     )
 
+def _parse_ids(value: Optional[str]) -> Optional[list]:
+    """``"3,5"`` -> ``[3, 5]``; None or blank means no filter."""
+    if value is None or not value.strip():
+        return None
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _search_params_error(mode: str, fusion: str, vector_weight: float, rrf_k: int) -> Optional[str]:
+    if mode not in ("vector", "hybrid"):
+        return f"Unknown search mode: {mode}"
+    if fusion not in hybrid_search.FUSION_METHODS:
+        return f"Unknown fusion method: {fusion}"
+    if not 0.0 <= vector_weight <= 1.0:
+        return "vector_weight must be between 0 and 1"
+    if rrf_k < 0:
+        return "rrf_k must not be negative"
+    return None
+
+
+def _vector_search(
+    query: str, top_k: int, nprobe: Optional[int], owner_id: int, document_ids: Optional[list] = None
+):
+    # Embedding the query and scanning the index are CPU work; run in a thread.
+    # The owner (and document) filter is applied inside the index, so top_k
+    # is filled from the caller's own chunks.
+    query_embedding = query_cache.embed(query)
+    return vector_store.vector_store.search_with_scores(
+        query_embedding, top_k=top_k, nprobe=nprobe, owner_id=owner_id, document_ids=document_ids
+    )
+
+
+async def _hybrid_chunks(
+    db: AsyncSession, owner_id: int, query: str, top_k: int, nprobe: Optional[int],
+    fusion: str, vector_weight: float, rrf_k: int, candidates: int, include_embeddings: bool,
+    document_ids: Optional[list] = None
+):
+    depth = max(top_k, candidates)
+    # Both retrievers run at once: the vector scan in a worker thread, the
+    # keyword search in the index thread or on the database.
+    vector_ranked, keyword_ranked = await asyncio.gather(
+        run_in_threadpool(_vector_search, query, depth, nprobe, owner_id, document_ids),
+        keyword_index.search_keywords(db, owner_id, query, top_k=depth, document_ids=document_ids),
+    )
+    # Every candidate is loaded in one primary-key IN query. Hits that are
+    # no longer the caller's active chunks are dropped before fusing so they
+    # take no rank. Ownership is checked on the loaded rows: with
+    # owner_id in the WHERE clause SQLite drives the join from the owner's
+    # documents and walks all of their chunks.
+    candidate_ids = {chunk_id for chunk_id, _ in vector_ranked} | {chunk_id for chunk_id, _ in keyword_ranked}
+    stmt = (
+        _chunk_select(include_embeddings)
+        .add_columns(Document.owner_id)
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(DocumentChunk.id.in_(candidate_ids))
+    )
+    chunks = {
+        chunk.id: chunk
+        for chunk, chunk_owner_id in await db.execute(stmt)
+        if chunk_owner_id == owner_id and chunk.status == "active"
+    }
+    hits = hybrid_search.fuse(
+        [hit for hit in vector_ranked if hit[0] in chunks],
+        [hit for hit in keyword_ranked if hit[0] in chunks],
+        method=fusion, vector_weight=vector_weight, rrf_k=rrf_k, top_k=top_k,
+    )
+    chunk_data = _chunk_schemas([chunks[hit.chunk_id] for hit in hits], include_embeddings)
+    for chunk, hit in zip(chunk_data, hits):
+        chunk.score = hit.score
+        chunk.vector_score = hit.vector_score
+        chunk.keyword_score = hit.keyword_score
+    return chunk_data
+
+
 @router.post("/search_chunks", response_model=DocumentChunkListResponse)
-def search_document_chunks(
+async def search_document_chunks(
+    query: str = Form(...),
+    top_k: int = Form(5, ge=1),
+    nprobe: Optional[int] = Form(None),
+    include_embeddings: bool = Form(False),
+    mode: str = Form("vector"),
+    fusion: str = Form(HYBRID_FUSION),
+    vector_weight: float = Form(HYBRID_VECTOR_WEIGHT),
+    rrf_k: int = Form(HYBRID_RRF_K),
+    candidates: int = Form(HYBRID_CANDIDATES),
+    document_ids: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # mode=hybrid fuses vector and keyword results; fusion, vector_weight,
+    # rrf_k and candidates tune it per request. Only the caller's chunks are
+    # searched, narrowed to document_ids (comma-separated) if given.
+    error = _search_params_error(mode, fusion, vector_weight, rrf_k)
+    try:
+        document_filter = _parse_ids(document_ids)
+    except ValueError:
+        error = "document_ids must be comma-separated integers"
+    if error:
+        return DocumentChunkListResponse(
+            message=error,
+            status=False,
+            status_code=400,
+            data=None
+        )
+    if mode == "hybrid":
+        chunk_data = await _hybrid_chunks(
+            db, current_user.id, query, top_k, nprobe, fusion, vector_weight, rrf_k, candidates, include_embeddings,
+            document_ids=document_filter
+        )
+    else:
+        ranked = await run_in_threadpool(_vector_search, query, top_k, nprobe, current_user.id, document_filter)
+        chunk_data = await _ranked_chunks(db, ranked, include_embeddings)
+    data = DocumentDetail(
+        document=None,
+        chunks=chunk_data
+    )
+    return DocumentChunkListResponse(
+        message="Search successful",
+        status=True,
+        status_code=200,
+        data=data
+    )
+
+def _vector_search_many(
+    queries: List[str], top_k: int, nprobe: Optional[int], owner_id: int, document_ids: Optional[list] = None
+):
+    # One embedding batch and one matrix-matrix product for every query.
+    query_embeddings = query_cache.embed_many(queries)
+    return vector_store.vector_store.search_many_with_scores(
+        query_embeddings, top_k=top_k, nprobe=nprobe, owner_id=owner_id, document_ids=document_ids
+    )
+
+
+@router.post("/search_chunks/batch", response_model=ChunkBatchSearchResponse)
+async def search_document_chunks_batch(
+    queries: List[str] = Form(...),
+    top_k: int = Form(5, ge=1),
+    nprobe: Optional[int] = Form(None),
+    include_embeddings: bool = Form(False),
+    document_ids: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    # Vector search for many queries (repeat the ``queries`` field) in one
+    # request: the chunks of every result are loaded in a single IN query.
+    error = None
+    if len(queries) > SEARCH_BATCH_MAX_QUERIES:
+        error = f"At most {SEARCH_BATCH_MAX_QUERIES} queries per request"
+    try:
+        document_filter = _parse_ids(document_ids)
+    except ValueError:
+        error = "document_ids must be comma-separated integers"
+    if error:
+        return ChunkBatchSearchResponse(
+            message=error,
+            status=False,
+            status_code=400,
+            data=None
+        )
+    ranked = await run_in_threadpool(_vector_search_many, queries, top_k, nprobe, current_user.id, document_filter)
+    chunk_ids = {chunk_id for hits in ranked for chunk_id, _ in hits}
+    chunks = await db.scalars(_chunk_select(include_embeddings).where(DocumentChunk.id.in_(chunk_ids)))
+    schemas = {chunk.id: chunk for chunk in _chunk_schemas(chunks, include_embeddings)}
+    results = [
+        ChunkSearchResult(
+            query=query,
+            chunks=[
+                schemas[chunk_id].model_copy(update={"score": score})
+                for chunk_id, score in hits
+                if chunk_id in schemas
+            ],
+        )
+        for query, hits in zip(queries, ranked)
+    ]
+    return ChunkBatchSearchResponse(
+        message="Search successful",
+        status=True,
+        status_code=200,
+        data=results
+    )
+
+@router.post("/search_keywords", response_model=DocumentChunkListResponse)
+async def search_document_keywords(
     query: str = Form(...),
-    top_k: int = Form(5),
-    db: Session = Depends(get_db),
+    top_k: int = Form(5, ge=1),
+    include_embeddings: bool = Form(False),
+    document_ids: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query_embedding = vector_store.mock_embedding(query)
-    chunk_ids = vector_store.vector_store.search(query_embedding, top_k=top_k)
-    chunks = db.query(DocumentChunk).filter(DocumentChunk.id.in_(chunk_ids)).all()
-    chunk_data = [DocumentChunkSchema.from_orm(c) for c in chunks]
+    # Only the caller's chunks are ranked; scores are BM25 (in-process index)
+    # or ts_rank_cd (PostgreSQL), so compare them within one response only.
+    try:
+        document_filter = _parse_ids(document_ids)
+    except ValueError:
+        return DocumentChunkListResponse(
+            message="document_ids must be comma-separated integers",
+            status=False,
+            status_code=400,
+            data=None
+        )
+    ranked = await keyword_index.search_keywords(
+        db, current_user.id, query, top_k=top_k, document_ids=document_filter
+    )
+    chunk_data = await _ranked_chunks(db, ranked, include_embeddings)
     data = DocumentDetail(
         document=None,
         chunks=chunk_data
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+
+from app.core.auth import get_current_user
+from app.db.pool import pool_snapshot
+from app.db.session import ENGINES
+from app.models.user import User
+from app.services.embeddings import embedding_cache
+from app.schemas.metrics import DbPoolStats, DbPoolStatsResponse, EmbeddingCacheStats, EmbeddingCacheStatsResponse
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/embedding_cache", response_model=EmbeddingCacheStatsResponse)
+def get_embedding_cache_stats(current_user: User = Depends(get_current_user)):
+    # Counters are per process; each uvicorn worker reports its own.
+    return EmbeddingCacheStatsResponse(
+        message="Embedding cache stats fetched successfully",
+        status=True,
+        status_code=200,
+        data=EmbeddingCacheStats(**embedding_cache.stats())
+    )
+
+
+@router.get("/db_pool", response_model=DbPoolStatsResponse)
+def get_db_pool_stats(current_user: User = Depends(get_current_user)):
+    # Per process, like the cache counters; each engine has its own pool.
+    return DbPoolStatsResponse(
+        message="Connection pool stats fetched successfully",
+        status=True,
+        status_code=200,
+        data=[DbPoolStats(engine=name, **pool_snapshot(engine)) for name, engine in ENGINES.items()]
+    )
@@ -1,18 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import jwt
+import datetime
 import logging
 import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
-from app.services.user import authenticate_user, get_password_hash
-from app.core.auth import get_db, get_current_user
+from app.services.user import authenticate_user, hash_password
+from app.core.auth import get_db, get_current_user, user_cache
+from app.core.config import USER_DELETE_SYNC_MAX_CHUNKS
 from app.models.user import User
-from app.models.document import Document
-from app.models.document_chunk import DocumentChunk
-from sqlalchemy.orm import Session
+from app.services import deletion
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.base import BaseResponseSchema
 from app.schemas.users import (
     UserBaseSchema,
@@ -27,11 +30,11 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.post("/", status_code=201, response_model=UserCreateResponse)
-def create_user(
-    username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)
+async def create_user(
+    username: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db)
 ):
     logging.info(f"Attempt to create user: {username}")
-    if db.query(User).filter(User.username == username).first():
+    if await db.scalar(select(User).where(User.username == username)):
         logging.warning(f"Username already registered: {username}")
         return UserCreateResponse(
             message="Username already registered",
@@ -39,10 +42,11 @@ def create_user(
             status_code=400,
             data=None,
         )
-    user = User(username=username, hashed_password=get_password_hash(password))
+    hashed_password = await hash_password(password)
+    user = User(username=username, hashed_password=hashed_password)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     logging.info(f"User created: {username}")
     return UserCreateResponse(
         message="User created successfully",
@@ -53,11 +57,11 @@ def create_user(
 
 
 @router.post("/token", response_model=UserLoginResponse)
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
     logging.info(f"Login attempt for user: {form_data.username}")
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     token_data = {"sub": user.username}
@@ -65,12 +69,16 @@ def login(
     from app.core.config import SECRET_KEY, ALGORITHM
 
     token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+    # Tokens carry only the username, so a re-created account gets the same
+    # token string; replace whatever snapshot is cached under it.
+    db.expunge(user)
+    user_cache.put(token, user)
     logging.info(f"User logged in: {form_data.username}")
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserDetailResponse)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return UserDetailResponse(
         message="Current user fetched successfully",
         status=True,
@@ -80,17 +88,22 @@ def read_users_me(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/", response_model=UserListResponse)
-def list_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
+async def list_users(db: AsyncSession = Depends(get_db)):
+    users = (await db.scalars(select(User).where(User.deleted_at.is_(None)))).all()
     data = [UserBaseSchema.from_orm(u) for u in users]
     return UserListResponse(
         message="Users fetched successfully", status=True, status_code=200, data=data
     )
 
 
+async def _active_user(db: AsyncSession, user_id: int):
+    user = await db.get(User, user_id)
+    return None if user is None or user.deleted_at is not None else user
+
+
 @router.get("/{user_id}", response_model=UserDetailResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await _active_user(db, user_id)
     if not user:
         return UserDetailResponse(
             message="User not found", status=False, status_code=404, data=None
@@ -104,13 +117,13 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserDetailResponse)
-def update_user(
+async def update_user(
     user_id: int,
     username: str = Form(None),
     password: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await _active_user(db, user_id)
     if not user:
         return UserDetailResponse(
             message="User not found", status=False, status_code=404, data=None
@@ -118,9 +131,10 @@ def update_user(
     if username:
         user.username = username  # type: ignore
     if password:
-        user.hashed_password = get_password_hash(password)  # type: ignore
-    db.commit()
-    db.refresh(user)
+        user.hashed_password = await hash_password(password)  # type: ignore
+    await db.commit()
+    await db.refresh(user)
+    user_cache.invalidate_user(user_id)
     return UserDetailResponse(
         message="User updated successfully",
         status=True,
@@ -130,14 +144,29 @@ def update_user(
 
 
 @router.delete("/{user_id}", response_model=UserDeleteResponse)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(
+    user_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)
+):
+    user = await _active_user(db, user_id)
     if not user:
         return UserDeleteResponse(
             message="User not found", status=False, status_code=404, data=None
         )
-    db.delete(user)
-    db.commit()
+    chunks = await deletion.count_user_chunks(db, user_id, USER_DELETE_SYNC_MAX_CHUNKS)
+    # Marked first, so the account is gone for the API whatever happens to
+    # the purge; an interrupted purge is resumed at the next startup.
+    user.deleted_at = datetime.datetime.utcnow()
+    await db.commit()
+    user_cache.invalidate_user(user_id)
+    if chunks > USER_DELETE_SYNC_MAX_CHUNKS:
+        background_tasks.add_task(deletion.purge_user, user_id)
+        return UserDeleteResponse(
+            message="User deleted; their documents are being removed",
+            status=True,
+            status_code=202,
+            data={"id": user_id},
+        )
+    await run_in_threadpool(deletion.purge_user, user_id)
     return UserDeleteResponse(
         message="User deleted successfully",
         status=True,
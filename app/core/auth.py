@@ -1,27 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.models.user import User
-from app.core.config import SECRET_KEY
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from passlib.context import CryptContext
-from app.services.user import get_user_by_username, authenticate_user, get_password_hash
+from app.core.config import AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL, SECRET_KEY
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
+from app.services.user import get_user_by_username
 
 ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+
+class UserCache:
+    """TTL + LRU map of bearer token to the ``User`` it authenticated.
+
+    Cached users are detached snapshots, read-only for callers. An entry
+    lives for ``ttl`` seconds (never past the token's own ``exp``); user
+    updates and deletes call :meth:`invalidate_user` so this process stops
+    serving the old row at once. Other processes see the change within
+    ``ttl``. A ``ttl`` of 0 disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(token)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._drop(token)
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, token: str, user: User, expires_at: Optional[float] = None) -> None:
+        """Cache ``user`` for ``token``; ``expires_at`` is the token's ``exp`` (epoch seconds)."""
+        if self.ttl <= 0:
+            return
+        lifetime = self.ttl
+        if expires_at is not None:
+            lifetime = min(lifetime, expires_at - time.time())
+            if lifetime <= 0:
+                return
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (self._clock() + lifetime, user)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _drop(self, token: str) -> None:
+        _, user = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+
+user_cache = UserCache(max_entries=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    # Routers and routes both depend on this; FastAPI's per-request dependency
+    # cache runs it once. Across requests the token is looked up in user_cache.
+    user = user_cache.get(token)
+    if user is not None:
+        return user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -34,19 +114,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user_by_username(db, username)
+    user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
-    return user
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
-        return None
+    # Detach it so no session (including this request's) mutates the cached copy.
+    db.expunge(user)
+    user_cache.put(token, user, expires_at=payload.get("exp"))
     return user
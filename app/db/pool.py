@@ -0,0 +1,165 @@
+import threading
+import time
+import weakref
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+
+
+class PoolStats:
+    """Counters for one engine's connection pool, fed by pool events.
+
+    ``wait`` is the time ``Pool.connect()`` takes to hand out a connection:
+    queueing for a free one, opening a new one and the pre-ping.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        queued = isinstance(pool, QueuePool)
+        with self._lock:
+            return {
+                "pool_class": type(pool).__name__,
+                "size": pool.size() if queued else None,
+                "max_overflow": pool._max_overflow if queued else None,
+                "timeout": pool.timeout() if queued else None,
+                "recycle": pool._recycle,
+                "pre_ping": pool._pre_ping,
+                "checked_out": self.checked_out,
+                "idle": pool.checkedin() if queued else None,
+                "overflow": max(pool.overflow(), 0) if queued else None,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "wait_seconds_total": self.wait_total,
+                "wait_seconds_max": self.wait_max,
+                "wait_seconds_avg": self.wait_total / self.waits if self.waits else 0.0,
+            }
+
+
+_engine_stats: "weakref.WeakKeyDictionary[Engine, PoolStats]" = weakref.WeakKeyDictionary()
+
+
+class _TimedPoolMixin:
+    """Times ``connect()`` into ``self.stats``; kept across ``dispose()``."""
+
+    stats = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, asyncio: bool = False) -> Dict[str, Any]:
+    """Engine keyword arguments for the configured pool (DB_POOL_* settings).
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool, which has no
+    size to configure; every other database gets a timed queue pool.
+    """
+    options: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if asyncio else TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def instrument_pool(engine: Engine) -> PoolStats:
+    """Attach a ``PoolStats`` to ``engine``'s pool and return it.
+
+    Pass ``AsyncEngine.sync_engine`` for an asyncio engine.
+    """
+    stats = PoolStats()
+    _engine_stats[engine] = stats
+    engine.pool.stats = stats
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool = engine.pool
+        with stats._lock:
+            stats.connects += 1
+            # A new connection beyond pool_size is an overflow connection.
+            if isinstance(pool, QueuePool) and pool.overflow() > 0:
+                stats.overflow_events += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with stats._lock:
+            stats.checkouts += 1
+            stats.checked_out += 1
+            stats.peak_checked_out = max(stats.peak_checked_out, stats.checked_out)
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        with stats._lock:
+            stats.checked_out -= 1
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with stats._lock:
+            stats.invalidations += 1
+
+    return stats
+
+
+def pool_snapshot(engine: Engine) -> Dict[str, Any]:
+    return _engine_stats[engine].snapshot(engine.pool)
@@ -1,9 +1,49 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from app.core.config import ASYNC_DATABASE_URL, DATABASE_URL
+from app.db.pool import instrument_pool, pool_options
 
-# SQLAlchemy engine and session setup
-engine = create_engine(DATABASE_URL)
+# asyncio drivers for the dialects DATABASE_URL may name
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str) -> str:
+    """Return ``url`` with its driver replaced by the dialect's asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def enforce_foreign_keys(engine) -> None:
+    """Have SQLite enforce foreign keys (and ON DELETE actions) like PostgreSQL does."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys_on(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# SQLAlchemy engine and session setup. The sync engine serves ingestion
+# workers, startup and scripts; request handlers use the asyncio engine.
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+instrument_pool(engine)
+enforce_foreign_keys(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# ...existing code...
+_async_database_url = ASYNC_DATABASE_URL or async_url(DATABASE_URL)
+async_engine = create_async_engine(_async_database_url, **pool_options(_async_database_url, asyncio=True))
+instrument_pool(async_engine.sync_engine)
+enforce_foreign_keys(async_engine.sync_engine)
+# Objects stay usable after commit: an expired attribute cannot lazy-load
+# outside the greenlet that runs the session's I/O.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Engines reported by GET /metrics/db_pool
+ENGINES = {"sync": engine, "async": async_engine.sync_engine}
@@ -1,11 +1,54 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request, HTTPException
 from fastapi.responses import JSONResponse
 from app.api.documents import router as documents_router
+from app.api.metrics import router as metrics_router
 from app.api.users import router as users_router
 from app.core.auth import get_current_user
+from app.core.config import INGESTION_WORKER_ENABLED
+from app.db.session import SessionLocal
+from app.services import deletion, document, ingestion_jobs, keyword_index, vector_store
+from app.services.embeddings import embedding_provider
+from app.services.user import HashingPoolSaturated
 import logging
+import threading
 
-app = FastAPI(title="IngeXai Document Connector")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The in-memory store starts empty. The mmap store is normally already
+    # populated, but not the first time a deployment switches to it, and
+    # rows it wrote before recording owners need reloading.
+    db = SessionLocal()
+    try:
+        loaded = vector_store.vector_store.populate(
+            lambda store, chunk_ids=None: vector_store.load_vectors_from_db(
+                db, store, embedding_provider.dim, chunk_ids=chunk_ids
+            )
+        )
+    finally:
+        db.close()
+    logging.getLogger("ingexai").info(f"Loaded {loaded} chunk vectors into the vector store")
+    if keyword_index.KEYWORD_BACKEND == "memory" and len(keyword_index.keyword_index) == 0:
+        db = SessionLocal()
+        try:
+            indexed = keyword_index.load_index_from_db(db, keyword_index.keyword_index)
+        finally:
+            db.close()
+        logging.getLogger("ingexai").info(f"Indexed {indexed} chunks for keyword search")
+    # Chunks embedded by a previous embedding model were not loaded above.
+    threading.Thread(target=document.reembed_stale_chunks, name="reembed", daemon=True).start()
+    threading.Thread(target=document.prune_embedding_cache, name="embedding-cache-prune", daemon=True).start()
+    # Users whose purge was cut short by a restart; see DELETE /users/{id}.
+    threading.Thread(target=deletion.purge_deleted_users, name="user-purge", daemon=True).start()
+    if INGESTION_WORKER_ENABLED:
+        ingestion_jobs.worker.start()
+    yield
+    if INGESTION_WORKER_ENABLED:
+        ingestion_jobs.worker.stop()
+
+
+app = FastAPI(title="IngeXai Document Connector", lifespan=lifespan)
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +71,16 @@ async def generic_exception_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    logging.warning(f"Password hashing pool saturated: {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many concurrent password operations; retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     logging.warning(f"HTTP error: {exc.detail}")
@@ -37,5 +90,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 # Protect all /documents endpoints with authentication
 app.include_router(documents_router, dependencies=[Depends(get_current_user)])
 
+app.include_router(metrics_router, dependencies=[Depends(get_current_user)])
+
 # Add users_router without authentication dependency
 app.include_router(users_router)
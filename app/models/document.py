@@ -1,9 +1,13 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Index
 from app.models.base import BaseModel
 
 
 class Document(BaseModel):
     __tablename__ = "documents"
+    # keyset pagination of a user's documents: WHERE owner_id = ? AND id > ? ORDER BY id
+    __table_args__ = (Index("ix_documents_owner_id_id", "owner_id", "id"),)
     name = Column(String, nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
+    # sha256 of the uploaded file, used to short-circuit identical re-uploads
+    content_hash = Column(String(64), nullable=True, index=True)
@@ -1,13 +1,27 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, LargeBinary, Index, text
 from app.models.base import BaseModel
 
 
 class DocumentChunk(BaseModel):
     __tablename__ = "document_chunks"
+    # ordered/ranged chunk access; also serves plain document_id lookups
+    __table_args__ = (
+        Index("ix_document_chunks_document_id_chunk_index", "document_id", "chunk_index", unique=True),
+        # keyword search on PostgreSQL; see keyword_index.search_keywords
+        Index(
+            "ix_document_chunks_chunk_text_fts",
+            text("to_tsvector('english'::regconfig, chunk_text)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
     document_id = Column(
-        Integer, ForeignKey("documents.id"), nullable=False, index=True
+        Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
     )
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
-    embedding = Column(Text, nullable=True)
+    # character span of chunk_text within documents.content
+    char_start = Column(Integer, nullable=True)
+    char_end = Column(Integer, nullable=True)
+    # float32 little-endian bytes, see vector_store.encode_embedding
+    embedding = Column(LargeBinary, nullable=True)
     status = Column(String, default="active")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, LargeBinary
+from app.models.base import BaseModel
+
+
+class EmbeddingCacheEntry(BaseModel):
+    __tablename__ = "embedding_cache"
+    # sha256 of provider namespace + chunk text, see embeddings.EmbeddingCache
+    text_hash = Column(String(64), nullable=False, unique=True, index=True)
+    embedding = Column(LargeBinary, nullable=False)
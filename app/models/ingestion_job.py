@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, String, Text, Integer, ForeignKey
+from app.models.base import BaseModel
+
+
+class IngestionJob(BaseModel):
+    __tablename__ = "ingestion_jobs"
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True)
+    # pending -> running -> completed | failed (running -> pending on retry)
+    status = Column(String, nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    pages_parsed = Column(Integer, nullable=False, default=0)
+    chunks_embedded = Column(Integer, nullable=False, default=0)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    # A failed job waiting to be retried is not claimed before this time.
+    next_attempt_at = Column(DateTime, nullable=True)
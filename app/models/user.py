@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, DateTime
 from app.models.base import BaseModel
 
 
@@ -7,3 +7,6 @@ class User(BaseModel):
     username = Column(String, unique=True, nullable=False, index=True)
     is_admin = Column(Boolean, default=False, nullable=False)
     hashed_password = Column(String, nullable=False)
+    # Set by DELETE /users/{id}: the account is gone for the API while its
+    # data is purged, then the row itself is deleted.
+    deleted_at = Column(DateTime, nullable=True)
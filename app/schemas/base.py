@@ -1,5 +1,5 @@
-from typing import Any, Optional
-from pydantic import BaseModel
+from typing import Any, ClassVar, Optional
+from pydantic import BaseModel, ValidationInfo, model_validator
 
 
 class BaseResponseSchema(BaseModel):
@@ -9,3 +9,29 @@ class BaseResponseSchema(BaseModel):
     status: bool
     status_code: int
     data: Optional[Any]
+
+
+class ORMProjectionSchema(BaseModel):
+    """Schema whose ``deferred_fields`` are only read from ORM objects on request.
+
+    Validate with ``model_validate(obj, context={"include": {...}})`` to load
+    a deferred field; otherwise it is left at its default and the attribute
+    is never touched, so a column deferred in the query is not lazy-loaded.
+    ``derived_fields`` are never read from the object; the caller fills them
+    in (e.g. a search score).
+    """
+    model_config = {'from_attributes': True}
+    deferred_fields: ClassVar[frozenset] = frozenset()
+    derived_fields: ClassVar[frozenset] = frozenset()
+
+    @model_validator(mode="before")
+    @classmethod
+    def _project_deferred_fields(cls, data: Any, info: ValidationInfo) -> Any:
+        if isinstance(data, dict):
+            return data
+        include = (info.context or {}).get("include", ())
+        return {
+            name: getattr(data, name)
+            for name in cls.model_fields
+            if name not in cls.derived_fields and (name not in cls.deferred_fields or name in include)
+        }
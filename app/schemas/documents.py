@@ -1,31 +1,52 @@
 from typing import Any, Optional
-from pydantic import BaseModel
-from app.schemas.base import BaseResponseSchema
+from pydantic import BaseModel, field_validator
+from app.schemas.base import BaseResponseSchema, ORMProjectionSchema
+from app.services.vector_store import decode_embedding
 
 
-class DocumentBaseSchema(BaseModel):
+class DocumentBaseSchema(ORMProjectionSchema):
+    deferred_fields = frozenset({"content"})
+
     id: int
     name: str
     created_at: Any
     updated_at: Any
     content: Optional[str] = None
-    model_config = {'from_attributes': True}
 
 
-class DocumentChunkSchema(BaseModel):
+class DocumentChunkSchema(ORMProjectionSchema):
+    deferred_fields = frozenset({"embedding"})
+    derived_fields = frozenset({"score", "vector_score", "keyword_score"})
+
     id: int
     document_id: Optional[int] = None
     chunk_index: int
     chunk_text: str
-    embedding: Optional[str] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
+    embedding: Optional[list[float]] = None
     status: Optional[str] = None
     created_at: Any
     updated_at: Any
-    model_config = {'from_attributes': True}
+    # relevance from the search that returned the chunk, higher is better
+    score: Optional[float] = None
+    # hybrid search only: the vector and keyword scores that were fused into
+    # ``score`` (None when that retriever did not return the chunk)
+    vector_score: Optional[float] = None
+    keyword_score: Optional[float] = None
+
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def _decode_embedding(cls, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decode_embedding(bytes(value)).tolist()
+        return value
 
 
 class DocumentListResponse(BaseResponseSchema):
     data: Optional[list[DocumentBaseSchema]]
+    # pass as ``cursor`` to fetch the next page; None on the last page
+    next_cursor: Optional[int] = None
 
 
 class DocumentDetail(BaseModel):
@@ -35,6 +56,8 @@ class DocumentDetail(BaseModel):
 
 class DocumentDetailResponse(BaseResponseSchema):
     data: Optional[DocumentDetail]
+    # pass as ``offset_index`` to fetch the next page of chunks; None on the last page
+    next_offset_index: Optional[int] = None
 
 
 class DocumentChunkListResponse(DocumentDetailResponse):
@@ -42,17 +65,57 @@ class DocumentChunkListResponse(DocumentDetailResponse):
     pass
 
 
+class ChunkSearchResult(BaseModel):
+    query: str
+    chunks: list[DocumentChunkSchema]
+
+
+class ChunkBatchSearchResponse(BaseResponseSchema):
+    # one result per query, in request order
+    data: Optional[list[ChunkSearchResult]]
+
+
 class DocumentUploadResponseDetail(BaseModel):
-    document_id: str
-    chunks: int
-    external_status: Any
-    external_id: Any
+    # document_id/chunks are None when ingestion was queued as a job
+    document_id: Optional[str] = None
+    chunks: Optional[int] = None
+    external_status: Any = None
+    external_id: Any = None
+    job_id: Optional[int] = None
 
 
 class DocumentUploadResponse(BaseResponseSchema):
     data: Optional[DocumentUploadResponseDetail]
 
 
+class BulkUploadFileResult(BaseModel):
+    # zip members are named "archive.zip/member/path"
+    name: str
+    # "created", "duplicate" (document_id is the existing copy) or "failed"
+    status: str
+    document_id: Optional[int] = None
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+
+
+class DocumentBulkUploadResponse(BaseResponseSchema):
+    # one result per file, zip members included, in upload order
+    data: Optional[list[BulkUploadFileResult]]
+
+
+class DocumentReingestDetail(BaseModel):
+    document_id: int
+    chunks: int
+    # chunks kept with their embeddings, embedded anew, and marked removed
+    unchanged: int
+    added: int
+    removed: int
+
+
+class DocumentReingestResponse(BaseResponseSchema):
+    data: Optional[DocumentReingestDetail]
+
+
 class DocumentDeleteResponseDetail(BaseModel):
     external_status: Any
     external_id: Any
@@ -60,3 +123,23 @@ class DocumentDeleteResponseDetail(BaseModel):
 
 class DocumentDeleteResponse(BaseResponseSchema):
     data: Optional[DocumentDeleteResponseDetail]
+
+
+class IngestionJobSchema(BaseModel):
+    id: int
+    filename: str
+    content_type: str
+    status: str
+    attempts: int
+    pages_parsed: int
+    chunks_embedded: int
+    document_id: Optional[int] = None
+    error: Optional[str] = None
+    next_attempt_at: Any = None
+    created_at: Any
+    updated_at: Any
+    model_config = {'from_attributes': True}
+
+
+class IngestionJobResponse(BaseResponseSchema):
+    data: Optional[IngestionJobSchema]
@@ -0,0 +1,42 @@
+from typing import List, Optional
+from pydantic import BaseModel
+from app.schemas.base import BaseResponseSchema
+
+
+class EmbeddingCacheStats(BaseModel):
+    memory_hits: int
+    db_hits: int
+    misses: int
+    hit_rate: float
+    entries: int
+    max_entries: int
+
+
+class EmbeddingCacheStatsResponse(BaseResponseSchema):
+    data: Optional[EmbeddingCacheStats]
+
+
+class DbPoolStats(BaseModel):
+    engine: str
+    pool_class: str
+    size: Optional[int]
+    max_overflow: Optional[int]
+    timeout: Optional[float]
+    recycle: int
+    pre_ping: bool
+    checked_out: int
+    idle: Optional[int]
+    overflow: Optional[int]
+    peak_checked_out: int
+    checkouts: int
+    connects: int
+    overflow_events: int
+    timeouts: int
+    invalidations: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    wait_seconds_avg: float
+
+
+class DbPoolStatsResponse(BaseResponseSchema):
+    data: Optional[List[DbPoolStats]]
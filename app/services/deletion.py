@@ -0,0 +1,120 @@
+import logging
+import os
+from typing import List, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import USER_DELETE_BATCH_SIZE
+from app.db.session import SessionLocal
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.models.ingestion_job import IngestionJob
+from app.models.user import User
+from app.services import keyword_index, vector_store
+
+logger = logging.getLogger("ingexai.deletion")
+
+
+def evict_chunks(chunk_ids: Sequence[int]) -> None:
+    """Drop deleted chunks from the vector store and the keyword index in bulk."""
+    if len(chunk_ids):
+        vector_store.vector_store.remove_vectors(chunk_ids)
+        keyword_index.unindex_chunks(chunk_ids)
+
+
+async def delete_document(db: AsyncSession, document_id: int) -> int:
+    """Delete a document and its chunks in one transaction, then evict the chunks.
+
+    The chunks go in a single ``DELETE ... RETURNING id``, which also yields
+    the ids to evict; the foreign key cascades would remove them with the
+    document, but not tell us which. Returns the number of chunks deleted.
+    """
+    chunk_ids = list(
+        await db.scalars(
+            delete(DocumentChunk)
+            .where(DocumentChunk.document_id == document_id)
+            .returning(DocumentChunk.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+    await db.execute(delete(Document).where(Document.id == document_id))
+    await db.commit()
+    await run_in_threadpool(evict_chunks, chunk_ids)
+    return len(chunk_ids)
+
+
+async def count_user_chunks(db: AsyncSession, user_id: int, limit: int) -> int:
+    """``user_id``'s chunks, counted up to ``limit`` + 1 so a huge corpus is not scanned."""
+    owned = (
+        select(DocumentChunk.id)
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(Document.owner_id == user_id)
+        .limit(limit + 1)
+        .subquery()
+    )
+    return await db.scalar(select(func.count()).select_from(owned))
+
+
+def _delete_batch(db, model, condition, batch_size: int) -> List[int]:
+    """DELETE up to ``batch_size`` rows of ``model`` matching ``condition``; returns their ids."""
+    batch = select(model.id).where(condition).limit(batch_size)
+    return list(
+        db.scalars(
+            delete(model)
+            .where(model.id.in_(batch))
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+
+
+def purge_user(user_id: int, batch_size: int = USER_DELETE_BATCH_SIZE) -> int:
+    """Delete a user marked ``deleted_at`` and everything they own.
+
+    Blocking, for a worker thread or background task. Chunks, then
+    documents, go ``batch_size`` rows per transaction, and each chunk batch
+    is evicted from the vector store and keyword index once committed, so a
+    corpus of millions of chunks never holds one long transaction or leaves
+    searchable vectors behind. Deleting the user row last cascades to its
+    ingestion jobs. If the process dies half way, :func:`purge_deleted_users`
+    picks up where it stopped. Returns the number of chunks deleted.
+    """
+    db = SessionLocal()
+    deleted = 0
+    try:
+        owned = DocumentChunk.document_id.in_(select(Document.id).where(Document.owner_id == user_id))
+        while True:
+            chunk_ids = _delete_batch(db, DocumentChunk, owned, batch_size)
+            db.commit()
+            evict_chunks(chunk_ids)
+            deleted += len(chunk_ids)
+            if len(chunk_ids) < batch_size:
+                break
+        while _delete_batch(db, Document, Document.owner_id == user_id, batch_size):
+            db.commit()
+        # Uploads still waiting for a worker would otherwise stay on disk.
+        for path in db.scalars(
+            select(IngestionJob.file_path).where(IngestionJob.owner_id == user_id, IngestionJob.status == "pending")
+        ):
+            if os.path.exists(path):
+                os.remove(path)
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Purged user {user_id}: {deleted} chunks")
+    return deleted
+
+
+def purge_deleted_users() -> int:
+    """Finish every purge interrupted by a restart; returns how many users were purged."""
+    db = SessionLocal()
+    try:
+        user_ids = list(db.scalars(select(User.id).where(User.deleted_at.isnot(None))))
+    finally:
+        db.close()
+    for user_id in user_ids:
+        purge_user(user_id)
+    return len(user_ids)
@@ -0,0 +1,360 @@
+import contextlib
+import json
+import os
+
+import numpy as np
+
+from app.services.vector_store import InMemoryVectorStore, _row_keys
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; fall back to in-process locking
+    fcntl = None
+
+MANIFEST = "MANIFEST.json"
+
+
+class _FileLock:
+    """``flock`` on ``path``: exclusive for writers, :meth:`shared` for readers.
+
+    Taking it again while it is held (in either mode) is a no-op, so callers
+    must already hold the store's thread lock. It cannot be upgraded from
+    shared to exclusive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._depth = 0
+
+    def __enter__(self):
+        return self._acquire(fcntl.LOCK_EX if fcntl is not None else None)
+
+    def __exit__(self, *exc):
+        self._release()
+
+    @contextlib.contextmanager
+    def shared(self):
+        self._acquire(fcntl.LOCK_SH if fcntl is not None else None)
+        try:
+            yield self
+        finally:
+            self._release()
+
+    def _acquire(self, operation):
+        if self._fd is not None:
+            self._depth += 1
+            return self
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._depth = 1
+        if operation is not None:
+            fcntl.flock(self._fd, operation)
+        return self
+
+    def _release(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class MmapVectorStore(InMemoryVectorStore):
+    """Exact vector index persisted as append-only files and read via ``np.memmap``.
+
+    A segment (one per generation) is five files: ``vectors-N.f32`` holds
+    float32 rows, ``ids-N.i64`` the chunk id of each row, ``owners-N.i64``
+    and ``documents-N.i64`` its owner and document (-1 if unknown) and
+    ``tombstones-N.i64`` the rows that were deleted or superseded. Writers
+    only ever append under an exclusive ``flock``; the ids file is written
+    last and acts as the commit point. Every uvicorn worker maps the same
+    files read-only, so they share one copy in the page cache and opening a
+    store does not read its rows. :meth:`compact` rewrites the live rows into
+    the next generation and swaps ``MANIFEST.json`` atomically; readers pick
+    up the new generation on their next call.
+    """
+
+    def __init__(self, path: str, metric: str = "cosine", compaction_ratio: float = 0.25):
+        super().__init__(metric=metric, compaction_ratio=compaction_ratio)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._file_lock = _FileLock(os.path.join(path, ".lock"))
+        self._generation = None
+        self._dim = None
+        self._rows = None  # built lazily; searches never need it
+        self._partitioned = 0  # rows listed in the owner/document partitions
+        self._tombstones_read = 0
+        with self._lock:
+            self._refresh_reader()
+
+    @property
+    def dim(self):
+        return self._dim
+
+    # -- file layout -----------------------------------------------------
+
+    def _file(self, kind: str, generation: int = None) -> str:
+        generation = self._generation if generation is None else generation
+        suffix = "f32" if kind == "vectors" else "i64"
+        return os.path.join(self.path, f"{kind}-{generation:06d}.{suffix}")
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, generation: int, dim: int):
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"generation": generation, "dim": dim, "metric": self.metric}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+    # -- mapping ---------------------------------------------------------
+
+    def _refresh_reader(self, attempts: int = 3):
+        """:meth:`_refresh` for read calls, which do not take the file lock.
+
+        A compaction in another process unlinks the generation being read
+        once the new manifest is in place, so a reader that raced it sees a
+        missing file or a manifest that moved on; it then refreshes again.
+        After ``attempts`` tries it waits for the writer under a shared lock.
+        """
+        for _ in range(attempts):
+            try:
+                self._refresh()
+            except (FileNotFoundError, ValueError):
+                continue
+            manifest = self._read_manifest()
+            if manifest is None or manifest["generation"] == self._generation:
+                return
+        with self._file_lock.shared():
+            self._refresh()
+
+    def _refresh(self):
+        """Pick up appends, tombstones and compactions made by any process."""
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        if manifest.get("metric", self.metric) != self.metric:
+            raise ValueError(f"{self.path} was built with metric {manifest['metric']!r}")
+        if manifest["generation"] != self._generation:
+            self._generation = manifest["generation"]
+            self._dim = manifest["dim"]
+            self._size = 0
+            self._deleted = 0
+            self._tombstones_read = 0
+            self._rows = None
+            self._partitioned = 0
+            self._matrix = None
+            self._ids = np.empty(0, dtype=np.int64)
+            self._alive = np.empty(0, dtype=bool)
+            self._owners = np.empty(0, dtype=np.int64)
+            self._documents = np.empty(0, dtype=np.int64)
+            self._owner_rows.rebuild(self._owners)
+            self._document_rows.rebuild(self._documents)
+        # Writers append ids before tombstones, so counting the tombstones
+        # first guarantees every row they name is mapped below.
+        tombstones = self._file("tombstones")
+        count = os.path.getsize(tombstones) // 8 if os.path.exists(tombstones) else 0
+        size = os.path.getsize(self._file("ids")) // 8 if os.path.exists(self._file("ids")) else 0
+        # Files only grow within a generation (a crashed write is truncated
+        # from the vectors file, never from ids).
+        if size > self._size:
+            self._map(size)
+        if count > self._tombstones_read:
+            dead = np.fromfile(tombstones, dtype=np.int64, count=count - self._tombstones_read,
+                               offset=self._tombstones_read * 8)
+            self._tombstones_read = count
+            dead = dead[self._alive[dead]]
+            self._alive[dead] = False
+            self._deleted += len(np.unique(dead))
+            if self._rows is not None:
+                for row, chunk_id in zip(dead.tolist(), self._ids[dead].tolist()):
+                    if self._rows.get(chunk_id) == row:
+                        del self._rows[chunk_id]
+
+    def _map(self, size: int):
+        previous = self._size
+        if size:
+            self._matrix = np.memmap(self._file("vectors"), dtype=np.float32, mode="r", shape=(size, self._dim))
+            self._ids = np.memmap(self._file("ids"), dtype=np.int64, mode="r", shape=(size,))
+        alive = np.ones(size, dtype=bool)
+        alive[:previous] = self._alive[:previous]
+        self._alive = alive
+        # Owner and document ids are small, so they are read into memory
+        # rather than mapped; the filter partitions over them are only built
+        # by the first filtered search (see _partition).
+        for kind in ("owners", "documents"):
+            column = np.empty(size, dtype=np.int64)
+            column[:previous] = getattr(self, f"_{kind}")[:previous]
+            column[previous:] = self._read_keys(kind, previous, size)
+            setattr(self, f"_{kind}", column)
+        self._size = size
+        if self._rows is not None:
+            for row, chunk_id in enumerate(self._ids[previous:size].tolist(), start=previous):
+                self._rows[chunk_id] = row
+
+    def _read_keys(self, kind: str, start: int, stop: int) -> np.ndarray:
+        keys = np.full(stop - start, -1, dtype=np.int64)
+        path = self._file(kind)
+        if os.path.exists(path):
+            # Segments written before owners/documents files existed read as
+            # -1 until populate reloads their rows.
+            stored = np.fromfile(path, dtype=np.int64, count=stop - start, offset=start * 8)
+            keys[: len(stored)] = stored
+        return keys
+
+    def _partition(self):
+        """List the rows mapped since the last call in the owner/document partitions."""
+        if self._partitioned < self._size:
+            rows = np.arange(self._partitioned, self._size, dtype=np.int64)
+            self._owner_rows.extend(rows, self._owners[rows])
+            self._document_rows.extend(rows, self._documents[rows])
+            self._partitioned = self._size
+
+    def _row_map(self) -> dict:
+        if self._rows is None:
+            live = np.flatnonzero(self._alive[: self._size])
+            self._rows = dict(zip(self._ids[live].tolist(), live.tolist()))
+        return self._rows
+
+    def __len__(self):
+        with self._lock:
+            self._refresh_reader()
+            return self._size - self._deleted
+
+    # -- writes ----------------------------------------------------------
+
+    def add_vectors(self, chunk_ids, vectors, owner_ids=None, document_ids=None):
+        self.update_vectors([], chunk_ids, vectors, owner_ids=owner_ids, document_ids=document_ids)
+
+    def populate(self, load) -> int:
+        """Run ``load(self)`` if the files hold no vectors, under the exclusive lock.
+
+        Every uvicorn worker calls this at startup; the first fills the
+        store and the others, waiting on the lock, then find it populated.
+        Live rows without an owner, from segments written before owners and
+        documents were recorded, can never match an owner-scoped search:
+        they are dropped and reloaded with ``load(self, chunk_ids)``.
+        """
+        with self._lock, self._file_lock:
+            self._refresh()
+            if self._size == self._deleted:
+                return load(self)
+            live = self._alive[: self._size]
+            unkeyed = self._ids[: self._size][live & (self._owners[: self._size] < 0)]
+            if not len(unkeyed):
+                return 0
+            self.remove_vectors(unkeyed)
+            return load(self, unkeyed.tolist())
+
+    def remove_vectors(self, chunk_ids) -> int:
+        return self.update_vectors(chunk_ids, [], None)
+
+    def update_vectors(self, remove_ids, chunk_ids, vectors, owner_ids=None, document_ids=None) -> int:
+        """Append ``chunk_ids`` and tombstone ``remove_ids`` under one flock.
+
+        Other processes may refresh between the ids write and the tombstones
+        write, so for them the swap is not atomic; within this process it is.
+        Returns how many of ``remove_ids`` were present.
+        """
+        if len(chunk_ids):
+            vectors = self._prepare(vectors)
+            if len(chunk_ids) != len(vectors):
+                raise ValueError("chunk_ids and vectors must have the same length")
+            chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+            keys = {"owners": _row_keys(owner_ids, len(vectors)), "documents": _row_keys(document_ids, len(vectors))}
+        with self._lock, self._file_lock:
+            self._refresh()
+            rows = self._row_map()
+            dead = [rows[int(i)] for i in remove_ids if int(i) in rows]
+            removed = len(dead)
+            if len(chunk_ids):
+                if self._generation is None:
+                    self._generation, self._dim = 1, vectors.shape[1]
+                    self._write_manifest(self._generation, self._dim)
+                elif vectors.shape[1] != self._dim:
+                    raise ValueError(f"Expected vectors of dimension {self._dim}, got {vectors.shape[1]}")
+                # Re-adding an id appends a new row and tombstones the old one.
+                dead += [rows[i] for i in chunk_ids.tolist() if i in rows]
+                with open(self._file("vectors"), "ab") as f:
+                    # Drop bytes of a write that crashed before its ids landed.
+                    f.truncate(self._size * self._dim * 4)
+                    f.write(vectors.tobytes())
+                for kind, values in keys.items():
+                    with open(self._file(kind), "ab") as f:
+                        # Pad a segment from before this file existed with -1
+                        # (unknown), or drop a crashed write as above.
+                        missing = self._size - f.tell() // 8
+                        if missing > 0:
+                            f.write(np.full(missing, -1, dtype=np.int64).tobytes())
+                        f.truncate(self._size * 8)
+                        f.write(values.tobytes())
+                with open(self._file("ids"), "ab") as f:
+                    f.write(chunk_ids.tobytes())
+            self._append_tombstones(dead)
+            self._refresh()
+            if removed and self._deleted > self.compaction_ratio * self._size:
+                self._compact_locked()
+            return removed
+
+    def remove_vector(self, chunk_id: int) -> bool:
+        return self.remove_vectors([chunk_id]) == 1
+
+    def _append_tombstones(self, rows):
+        if rows:
+            with open(self._file("tombstones"), "ab") as f:
+                f.write(np.asarray(rows, dtype=np.int64).tobytes())
+
+    def compact(self):
+        with self._lock, self._file_lock:
+            self._refresh()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        if not self._deleted:
+            return
+        old, new = self._generation, self._generation + 1
+        live = np.flatnonzero(self._alive[: self._size])
+        with open(self._file("vectors", new), "wb") as vf, open(self._file("ids", new), "wb") as idf:
+            for start in range(0, len(live), 65536):
+                block = live[start : start + 65536]
+                vf.write(np.ascontiguousarray(self._matrix[block]).tobytes())
+                idf.write(np.ascontiguousarray(self._ids[block]).tobytes())
+        self._owners[live].tofile(self._file("owners", new))
+        self._documents[live].tofile(self._file("documents", new))
+        self._write_manifest(new, self._dim)
+        self._matrix = None
+        for kind in ("vectors", "ids", "owners", "documents", "tombstones"):
+            # Other processes keep their mappings of the unlinked files valid.
+            if os.path.exists(self._file(kind, old)):
+                os.remove(self._file(kind, old))
+        self._refresh()
+
+    # -- reads -----------------------------------------------------------
+
+    def get_vector(self, chunk_id: int):
+        with self._lock:
+            self._refresh_reader()
+            row = self._row_map().get(int(chunk_id))
+            return None if row is None else np.array(self._matrix[row])
+
+    def search_with_scores(self, query_vector, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        with self._lock:
+            self._refresh_reader()
+            self._partition()
+            return super().search_with_scores(query_vector, top_k=top_k, owner_id=owner_id, document_ids=document_ids)
+
+    def search_many_with_scores(self, query_vectors, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        with self._lock:
+            self._refresh_reader()
+            self._partition()
+            return super().search_many_with_scores(
+                query_vectors, top_k=top_k, owner_id=owner_id, document_ids=document_ids
+            )
@@ -1,14 +1,114 @@
+import codecs
+import contextlib
+import hashlib
 import io
-from typing import List
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from PyPDF2 import PdfReader
 import docx
+from app.core.config import (
+    BULK_UPLOAD_MAX_MEMBER_BYTES,
+    CHUNK_BOUNDARY,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+    INGESTION_PROCESS_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PARALLEL_WORKERS,
+    PDF_SLOW_PAGE_SECONDS,
+)
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_bytes))
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+PDF_CONTENT_TYPE = "application/pdf"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TXT_CONTENT_TYPE = "text/plain"
+SUPPORTED_CONTENT_TYPES = (PDF_CONTENT_TYPE, DOCX_CONTENT_TYPE, TXT_CONTENT_TYPE)
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+CONTENT_TYPES_BY_EXTENSION = {
+    ".pdf": PDF_CONTENT_TYPE,
+    ".docx": DOCX_CONTENT_TYPE,
+    ".txt": TXT_CONTENT_TYPE,
+    ".zip": ZIP_CONTENT_TYPES[0],
+}
+
+SPOOL_BLOCK_SIZE = 1024 * 1024
+TXT_BLOCK_SIZE = 256 * 1024
+
+class PageText(NamedTuple):
+    index: int
+    text: str
+    seconds: float
+
+
+def _open_pdf(source: Union[bytes, str], stack: contextlib.ExitStack) -> PdfReader:
+    if isinstance(source, str):
+        # PdfReader copies a whole file into memory when given a path, but
+        # parses pages lazily from an open file object.
+        return PdfReader(stack.enter_context(open(source, "rb")))
+    return PdfReader(io.BytesIO(source))
+
+def _timed_pages(reader: PdfReader, start: int, stop: int) -> Iterator[PageText]:
+    for index in range(start, stop):
+        began = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        seconds = time.perf_counter() - began
+        if seconds >= PDF_SLOW_PAGE_SECONDS:
+            logging.warning(f"PDF page {index} took {seconds:.2f}s to extract")
+        yield PageText(index, text, seconds)
+
+def _extract_page_range(source: Union[bytes, str], start: int, stop: int) -> List[PageText]:
+    # Runs in a worker process: every shard opens its own reader.
+    with contextlib.ExitStack() as stack:
+        return list(_timed_pages(_open_pdf(source, stack), start, stop))
+
+def iter_pdf_page_texts(
+    source: Union[bytes, str],
+    executor: Optional[Executor] = None,
+    workers: int = PDF_PARALLEL_WORKERS,
+    min_pages: int = PDF_PARALLEL_MIN_PAGES,
+) -> Iterator[PageText]:
+    """Yield every page of a PDF (bytes or path) in order, with its extraction time.
+
+    Documents with at least ``min_pages`` pages are split into page ranges
+    extracted in parallel by ``executor`` (or a temporary process pool of
+    ``workers``); results are still yielded in page order as shards finish.
+    Smaller documents are extracted in one piece: by ``executor`` if one is
+    given, so parsing still stays off the calling thread, otherwise in the
+    calling thread itself.
+    """
+    with contextlib.ExitStack() as stack:
+        reader = _open_pdf(source, stack)
+        page_count = len(reader.pages)
+        if executor is None and (page_count < min_pages or workers <= 1):
+            yield from _timed_pages(reader, 0, page_count)
+            return
+    owned = None
+    if executor is None:
+        owned = executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # A few shards per worker keeps a slow page range from idling the rest.
+        shard = max(1, -(-page_count // (workers * 4)) if page_count >= min_pages else page_count)
+        futures = [
+            executor.submit(_extract_page_range, source, start, min(start + shard, page_count))
+            for start in range(0, page_count, shard)
+        ]
+        for future in futures:
+            yield from future.result()
+    finally:
+        if owned is not None:
+            owned.shutdown(cancel_futures=True)
+
+def extract_pdf_pages(source: Union[bytes, str], **kwargs) -> List[PageText]:
+    return list(iter_pdf_page_texts(source, **kwargs))
+
+def extract_text_from_pdf(file_bytes: bytes, **kwargs) -> str:
+    return "".join(page.text for page in iter_pdf_page_texts(file_bytes, **kwargs))
 
 def extract_text_from_docx(file_bytes: bytes) -> str:
     doc = docx.Document(io.BytesIO(file_bytes))
@@ -18,10 +118,420 @@ def extract_text_from_txt(file_bytes: bytes) -> str:
     return file_bytes.decode("utf-8")
 
 def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
+    return list(iter_chunks([text], chunk_size=chunk_size))
+
+
+# Streaming ingestion: the upload is spooled to disk and text is produced
+# page-by-page / paragraph-by-paragraph / block-by-block, so memory stays
+# bounded by one page or block rather than the whole document.
+
+class SpooledUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+
+
+async def spool_upload(upload, directory: Optional[str] = None) -> SpooledUpload:
+    """Copy an ``UploadFile`` to a named temporary file in fixed-size blocks.
+
+    The file is hashed on the way through so duplicates can be detected
+    without reading it again.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await upload.read(SPOOL_BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                size += len(block)
+                out.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, digest.hexdigest(), size)
+
+def guess_content_type(name: str, declared: Optional[str] = None) -> Optional[str]:
+    """``declared`` if it is a type we read, else the type of ``name``'s extension (None if unknown)."""
+    if declared in SUPPORTED_CONTENT_TYPES or declared in ZIP_CONTENT_TYPES:
+        return declared
+    return CONTENT_TYPES_BY_EXTENSION.get(os.path.splitext(name)[1].lower())
+
+def _zip_files(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return [info for info in archive.infolist() if not info.is_dir() and not info.filename.startswith("__MACOSX/")]
+
+def count_zip_files(path: str) -> int:
+    """Number of files in a zip archive; reads only its central directory."""
+    with zipfile.ZipFile(path) as archive:
+        return len(_zip_files(archive))
+
+def _spool_member(
+    archive: zipfile.ZipFile, info: zipfile.ZipInfo, directory: Optional[str], max_size: int
+) -> SpooledUpload:
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=directory)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+            while True:
+                block = member.read(SPOOL_BLOCK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                # Counted on the inflated bytes: the sizes in the header can lie.
+                if size > max_size:
+                    raise ValueError(f"File is larger than {max_size} bytes uncompressed")
+                digest.update(block)
+                out.write(block)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, digest.hexdigest(), size)
+
+def iter_zip_members(
+    path: str, directory: Optional[str] = None, max_size: int = BULK_UPLOAD_MAX_MEMBER_BYTES
+) -> Iterator[Tuple[str, Optional[SpooledUpload], Optional[str]]]:
+    """Yield ``(name, spooled, error)`` for each file in a zip archive.
+
+    Members are inflated one at a time to temporary files (which the caller
+    removes), so the archive is never extracted in memory or all at once.
+    ``spooled`` is None and ``error`` says why if a member cannot be read.
+    """
+    with zipfile.ZipFile(path) as archive:
+        for info in _zip_files(archive):
+            try:
+                spooled = _spool_member(archive, info, directory, max_size)
+            except (ValueError, RuntimeError, zipfile.BadZipFile, NotImplementedError) as exc:
+                yield info.filename, None, str(exc)
+                continue
+            yield info.filename, spooled, None
+
+def iter_pdf_pages(path: str, **kwargs) -> Iterator[str]:
+    for page in iter_pdf_page_texts(path, **kwargs):
+        yield page.text
+
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
+    for i, para in enumerate(docx.Document(path).paragraphs):
+        if i:
+            yield "\n"
+        yield para.text
+
+def iter_txt_blocks(path: str, block_size: int = TXT_BLOCK_SIZE) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            text = decoder.decode(block, final=not block)
+            if text:
+                yield text
+            if not block:
+                break
+
+def iter_text(path: str, content_type: str) -> Iterator[str]:
+    if content_type == PDF_CONTENT_TYPE:
+        return iter_pdf_pages(path)
+    if content_type == DOCX_CONTENT_TYPE:
+        return iter_docx_paragraphs(path)
+    if content_type == TXT_CONTENT_TYPE:
+        return iter_txt_blocks(path)
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int = 500) -> Iterator[str]:
+    """Yield ``chunk_size``-word chunks of the concatenation of ``pieces``.
+
+    A word split across two pieces is carried over, so the output matches
+    chunking the joined text.
+    """
     if chunk_size <= 0:
         raise ValueError("chunk_size must be positive")
-    words = text.split()
-    return [
-        " ".join(words[i:i+chunk_size])
-        for i in range(0, len(words), chunk_size)
-    ]
+    words: List[str] = []
+    carry = ""
+    for piece in pieces:
+        if not piece:
+            continue
+        piece = carry + piece
+        carry = ""
+        parts = piece.split()
+        if parts and not piece[-1].isspace():
+            carry = parts.pop()
+        words.extend(parts)
+        start = 0
+        while len(words) - start >= chunk_size:
+            yield " ".join(words[start:start + chunk_size])
+            start += chunk_size
+        del words[:start]
+    if carry:
+        words.append(carry)
+    for i in range(0, len(words), chunk_size):
+        yield " ".join(words[i:i + chunk_size])
+
+# Boundary-aware chunking. Text is cut into units (sentences, or words when a
+# sentence alone exceeds the budget) which are packed greedily into chunks.
+
+CHUNK_BOUNDARIES = ("word", "sentence", "paragraph")
+
+_NO_BREAK, _SENTENCE_BREAK, _PARAGRAPH_BREAK = 0, 1, 2
+# Whitespace after sentence-final punctuation (optionally followed by a closing
+# quote or bracket), or whitespace starting with a newline, which is only a
+# break when it contains a blank line. The whitespace is captured as group 1/2.
+_BREAK = re.compile(r"""[.!?]["'\u201d\u2019)\]]?(\s+)|(\n\s+)""")
+_BLANK_LINE = re.compile(r"\n[^\S\n]*\n")
+_TOKEN = re.compile(r"\S+")
+
+
+class Chunk(NamedTuple):
+    index: int
+    text: str
+    start: int  # character offsets into the concatenated text
+    end: int
+    tokens: int
+
+
+class _Unit(NamedTuple):
+    start: int
+    text: str
+    gap: str  # whitespace between the previous unit and this one
+    level: int  # strength of the break before this unit
+    tokens: int
+    part: bool = False  # piece of an over-budget run; may be split anywhere
+
+
+@lru_cache(maxsize=64)
+def _run_pattern(size: int) -> "re.Pattern":
+    # Up to ``size`` tokens per match, so long runs are cut without a
+    # Python-level step per word.
+    return re.compile(r"\S+(?:\s+\S+){0,%d}" % (size - 1))
+
+def _split_unit(unit: _Unit, tokens: int) -> Tuple[_Unit, _Unit]:
+    """Split ``unit`` after its first ``tokens`` tokens (``0 < tokens < unit.tokens``)."""
+    head = _run_pattern(tokens).match(unit.text).group()
+    rest = unit.text[len(head):].lstrip()
+    rest_start = len(unit.text) - len(rest)
+    return (
+        _Unit(unit.start, head, unit.gap, unit.level, tokens, True),
+        _Unit(unit.start + rest_start, rest, unit.text[len(head):rest_start], _NO_BREAK, unit.tokens - tokens, True),
+    )
+
+def _make_units(
+    start: int, text: str, gap: str, level: int, max_tokens: int, part: bool = False, tokens: Optional[int] = None
+) -> Iterator[_Unit]:
+    stripped = text.strip()
+    if not stripped:
+        return
+    lead = len(text) - len(text.lstrip())
+    start, gap = start + lead, gap + text[:lead]
+    if tokens is None:
+        tokens = len(stripped.split())
+    if tokens <= max_tokens and not part:
+        yield _Unit(start, stripped, gap, level, tokens)
+        return
+    end = 0
+    for match in _run_pattern(max_tokens).finditer(stripped):
+        if end:
+            gap, level = stripped[end:match.start()], _NO_BREAK
+        # Every match but the last holds exactly max_tokens tokens.
+        count = min(tokens, max_tokens)
+        tokens -= count
+        yield _Unit(start + match.start(), match.group(), gap, level, count, True)
+        end = match.end()
+
+def _breaks(text: str, pos: int, final: bool) -> Iterator[Tuple[int, int, int]]:
+    """Yield ``(start, end, level)`` of the breaks in ``text[pos:]``."""
+    floor = pos
+    for match in _BREAK.finditer(text, pos):
+        if match.end() == len(text) and not final:
+            return  # the whitespace may continue in the next piece
+        start, end = match.span(match.lastindex)
+        if _BLANK_LINE.search(text, start, end):
+            while start > floor and text[start - 1].isspace():
+                start -= 1
+            yield start, end, _PARAGRAPH_BREAK
+        elif match.lastindex == 1:
+            yield start, end, _SENTENCE_BREAK
+        else:
+            continue
+        floor = end
+
+def _iter_units(pieces: Iterable[str], max_tokens: int) -> Iterator[_Unit]:
+    pending = ""  # text of the unit being read, up to the end of the last piece
+    offset = 0  # offset of pending[0] in the concatenated text
+    gap = ""
+    level = _NO_BREAK
+    tokens = 0  # tokens in pending, counted per piece rather than rescanned
+    part = False  # pending continues a run that was already released in parts
+    for piece in pieces:
+        if not piece:
+            continue
+        # Resume just before the trailing punctuation/whitespace of pending.
+        scan = max(0, len(pending.rstrip()) - 2)
+        tokens += len(piece.split()) - (bool(pending) and not pending[-1].isspace() and not piece[0].isspace())
+        pending += piece
+        begin = 0
+        for start, end, brk in _breaks(pending, scan, final=False):
+            yield from _make_units(offset + begin, pending[begin:start], gap, level, max_tokens, part)
+            begin, gap, level, part = end, pending[start:end], brk, False
+        if begin:
+            pending = pending[begin:]
+            offset += begin
+            tokens = len(pending.split())
+        if tokens > max_tokens:
+            # A run with no break that is already over budget will be split
+            # anyway; release it now instead of letting the buffer (and every
+            # rescan of it) grow. The last token is kept as it may continue,
+            # or end a sentence, in the next piece.
+            keep = len(pending.rstrip())
+            while keep and not pending[keep - 1].isspace():
+                keep -= 1
+            head = pending[:keep].rstrip()
+            yield from _make_units(offset, head, gap, level, max_tokens, part=True, tokens=tokens - 1)
+            gap, level, part = pending[len(head):keep], _NO_BREAK, True
+            pending = pending[keep:]
+            offset += keep
+            tokens = len(pending.split())
+    begin = 0
+    for start, end, brk in _breaks(pending, 0, final=True):
+        yield from _make_units(offset + begin, pending[begin:start], gap, level, max_tokens, part)
+        begin, gap, level, part = end, pending[start:end], brk, False
+    yield from _make_units(offset + begin, pending[begin:], gap, level, max_tokens, part)
+
+def _join_units(index: int, units: List[_Unit]) -> Chunk:
+    text = units[0].text + "".join(unit.gap + unit.text for unit in units[1:])
+    return Chunk(index, text, units[0].start, units[-1].start + len(units[-1].text), sum(u.tokens for u in units))
+
+def _cut_point(window: List[_Unit], stale: int, max_tokens: int, boundary: str) -> int:
+    if boundary == "paragraph":
+        # Prefer the last paragraph break that still leaves the chunk half full.
+        best, size = len(window), 0
+        for i, unit in enumerate(window):
+            if i > stale and unit.level == _PARAGRAPH_BREAK and size >= max_tokens // 2:
+                best = i
+            size += unit.tokens
+        return best
+    return len(window)
+
+def _overlap_units(emitted: List[_Unit], overlap: int, boundary: str) -> List[_Unit]:
+    i, size = len(emitted), 0
+    while i and size + emitted[i - 1].tokens <= overlap:
+        i -= 1
+        size += emitted[i].tokens
+    keep = emitted[i:]
+    if i and size < overlap and (boundary == "word" or emitted[i - 1].part or not keep):
+        # Top up with the tail of the unit that did not fit whole.
+        keep.insert(0, _split_unit(emitted[i - 1], emitted[i - 1].tokens - (overlap - size))[1])
+    return keep
+
+def iter_text_chunks(
+    pieces: Iterable[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    boundary: str = CHUNK_BOUNDARY,
+) -> Iterator[Chunk]:
+    """Yield :class:`Chunk` objects of at most ``max_tokens`` whitespace tokens.
+
+    With ``boundary="sentence"`` chunks end at sentence ends (and blank lines);
+    ``"paragraph"`` additionally prefers blank lines; ``"word"`` fills every
+    chunk exactly. A sentence longer than ``max_tokens`` is split between
+    words. Each chunk after the first starts with up to ``overlap`` tokens of
+    whole sentences from the end of the previous one (falling back to words
+    when no whole sentence fits).
+
+    ``pieces`` is consumed as a stream: time is linear in the text length and
+    memory is bounded by one chunk plus one piece. ``start``/``end`` are
+    offsets into ``"".join(pieces)`` and ``text`` is exactly that slice.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be at least 0 and less than max_tokens")
+    if boundary not in CHUNK_BOUNDARIES:
+        raise ValueError(f"boundary must be one of {', '.join(CHUNK_BOUNDARIES)}")
+    window: List[_Unit] = []
+    size = 0
+    stale = 0  # leading units of window that were already emitted (the overlap)
+    index = 0
+    for unit in _iter_units(pieces, max_tokens):
+        while size + unit.tokens > max_tokens:
+            room = max_tokens - size
+            if room and (unit.part or boundary == "word"):
+                head, unit = _split_unit(unit, room)
+                window.append(head)
+                size += room
+            elif len(window) == stale:
+                # A whole sentence does not fit next to the overlap: shed
+                # overlap from the front instead of emitting nothing new.
+                excess = size + unit.tokens - max_tokens
+                if window[0].part and window[0].tokens > excess:
+                    window[0] = _split_unit(window[0], excess)[1]
+                    size -= excess
+                else:
+                    size -= window.pop(0).tokens
+                    stale -= 1
+                continue
+            cut = _cut_point(window, stale, max_tokens, boundary)
+            yield _join_units(index, window[:cut])
+            index += 1
+            keep = _overlap_units(window[:cut], overlap, boundary) if overlap else []
+            window = keep + window[cut:]
+            stale = len(keep)
+            size = sum(u.tokens for u in window)
+        window.append(unit)
+        size += unit.tokens
+    if len(window) > stale:
+        yield _join_units(index, window)
+
+def extract_to_file(path: str, content_type: str, out_path: str, pieces: Optional[Iterable[str]] = None) -> int:
+    """Write the extracted text of ``path`` (or the given ``pieces``) to ``out_path``.
+
+    Returns the number of pieces (pages for PDFs) parsed. Module-level so it
+    can run in a worker process.
+    """
+    if pieces is None:
+        pieces = iter_text(path, content_type)
+    count = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        for piece in pieces:
+            out.write(piece)
+            count += 1
+    if content_type == DOCX_CONTENT_TYPE:
+        count = (count + 1) // 2  # paragraphs, not separators
+    return count
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared parsing pool, or ``None`` when INGESTION_PROCESS_WORKERS is 0."""
+    global _process_pool
+    if INGESTION_PROCESS_WORKERS <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=INGESTION_PROCESS_WORKERS)
+        return _process_pool
+
+
+def extract_text_file(path: str, content_type: str) -> Tuple[str, int]:
+    """Return ``(text_path, pages)``; PDF/docx parsing goes to the process pool.
+
+    Plain text is returned as is; other types are written to ``path + ".txt"``,
+    which the caller removes.
+    """
+    if content_type == TXT_CONTENT_TYPE:
+        return path, 0
+    text_path = path + ".txt"
+    pool = get_process_pool()
+    if pool is None:
+        pages = extract_to_file(path, content_type, text_path)
+    elif content_type == PDF_CONTENT_TYPE:
+        # Large PDFs are sharded by page range across the pool, small ones
+        # parsed there in one piece.
+        pieces = iter_pdf_pages(path, executor=pool, workers=INGESTION_PROCESS_WORKERS)
+        pages = extract_to_file(path, content_type, text_path, pieces=pieces)
+    else:
+        pages = pool.submit(extract_to_file, path, content_type, text_path).result()
+    return text_path, pages
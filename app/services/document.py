@@ -0,0 +1,756 @@
+import datetime
+import logging
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+
+from app.core.config import (
+    BULK_COMMIT_CHUNKS,
+    BULK_COMMIT_FILES,
+    BULK_UPLOAD_WORKERS,
+    CHUNK_BOUNDARY,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_TOKENS,
+)
+from app.db.session import SessionLocal
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.services import doc_ingestion, keyword_index, vector_store
+from app.services.doc_ingestion import Chunk
+from app.services.embeddings import embedding_cache
+
+logger = logging.getLogger("ingexai.ingestion")
+
+CHUNK_BATCH_SIZE = 2000
+# Extracted text beyond this size is spooled to disk until it is stored.
+CONTENT_SPOOL_SIZE = 8 * 1024 * 1024
+# Characters compared per step when looking for the unchanged ends of a text.
+DIFF_BLOCK_SIZE = 4096
+# db.info key of the chunks inserted in a session's open transaction.
+_UNINDEXED = "unindexed_chunks"
+
+
+def _insert_chunks(
+    db: Session, document_ids: Sequence[int], chunks: List[Chunk]
+) -> Tuple[List[int], np.ndarray]:
+    """Embed and INSERT ``chunks`` (of the documents ``document_ids``, one per chunk).
+
+    Returns the chunk ids in input order and their embeddings.
+    """
+    embeddings = embedding_cache.embed_many([chunk.text for chunk in chunks], db=db)
+    rows = [
+        {
+            "document_id": document_id,
+            "chunk_index": chunk.index,
+            "chunk_text": chunk.text,
+            "char_start": chunk.start,
+            "char_end": chunk.end,
+            "embedding": vector_store.encode_embedding(embedding),
+        }
+        for document_id, chunk, embedding in zip(document_ids, chunks, embeddings)
+    ]
+    chunk_ids = list(
+        db.scalars(insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True), rows)
+    )
+    return chunk_ids, embeddings
+
+
+def _index_on_commit(db: Session, chunk_ids: List[int]) -> None:
+    """Add inserted chunks to the vector store and keyword index once ``db`` commits.
+
+    Until then their ids are held in ``db.info``; a rollback (or closing the
+    session uncommitted) drops them, so the indexes never point at rows
+    that were not stored, or whose ids the database hands out again. Vectors
+    and texts are read back after the commit rather than kept alive until
+    then, so a large upload does not hold all of its chunks in memory.
+    """
+    db.info.setdefault(_UNINDEXED, []).extend(chunk_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _index_committed_chunks(db: Session) -> None:
+    if db.in_nested_transaction():
+        return  # a savepoint; the outer transaction may still roll back
+    chunk_ids = db.info.pop(_UNINDEXED, None)
+    if chunk_ids:
+        # ``db`` cannot run queries from inside its own commit.
+        with Session(db.get_bind()) as reader:
+            vector_store.load_vectors_from_db(
+                reader, vector_store.vector_store, embedding_cache.dim, batch_size=CHUNK_BATCH_SIZE, chunk_ids=chunk_ids
+            )
+            keyword_index.index_stored_chunks(reader, chunk_ids)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_uncommitted_chunks(db: Session, transaction) -> None:
+    if transaction.parent is None:
+        db.info.pop(_UNINDEXED, None)
+
+
+def store_chunks(db: Session, document: Document, chunks: List[Chunk]) -> List[int]:
+    """Insert one batch of chunks with a single multi-row INSERT ... RETURNING.
+
+    Returns the new chunk ids in input order; their vectors are registered
+    with the vector store in batched calls when the session commits.
+    Embeddings go through the content-hash cache, so repeated chunk texts
+    are only embedded once.
+    """
+    chunk_ids, _ = _insert_chunks(db, [document.id] * len(chunks), chunks)
+    _index_on_commit(db, chunk_ids)
+    return chunk_ids
+
+
+def ingest_document(
+    db: Session,
+    document: Document,
+    pieces: Iterable[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    boundary: str = CHUNK_BOUNDARY,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Chunk, embed and store streamed text for a flushed ``document``.
+
+    Chunks are written in batches of ``CHUNK_BATCH_SIZE`` as the text arrives,
+    so memory is bounded by one batch plus one extraction piece. The
+    exception is ``Document.content``: the column holds the full text, so it
+    is read back from the spool file in one piece to be stored, and the
+    decoder and database driver briefly hold copies of it too. That is the
+    limit on the size of a document.
+    ``on_progress`` is called with the running chunk count after each batch.
+    Returns the number of chunks stored.
+    """
+    count = 0
+    batch: List[Chunk] = []
+    with tempfile.SpooledTemporaryFile(max_size=CONTENT_SPOOL_SIZE, mode="w+", encoding="utf-8") as content:
+
+        def tee(pieces):
+            for piece in pieces:
+                content.write(piece)
+                yield piece
+
+        chunks = doc_ingestion.iter_text_chunks(tee(pieces), max_tokens=max_tokens, overlap=overlap, boundary=boundary)
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == CHUNK_BATCH_SIZE:
+                store_chunks(db, document, batch)
+                count += len(batch)
+                batch = []
+                if on_progress:
+                    on_progress(count)
+        if batch:
+            store_chunks(db, document, batch)
+            count += len(batch)
+            if on_progress:
+                on_progress(count)
+        content.seek(0)
+        document.content = content.read()
+    return count
+
+
+def ingest_upload(
+    db: Session,
+    owner_id: int,
+    name: str,
+    path: str,
+    content_type: str,
+    on_progress: Optional[Callable[[int], None]] = None,
+    content_hash: Optional[str] = None,
+) -> Tuple[Document, int]:
+    """Create a document from a spooled upload and ingest it in one transaction."""
+    document = Document(name=name, owner_id=owner_id, content="", content_hash=content_hash)
+    db.add(document)
+    db.flush()
+    chunk_count = ingest_document(db, document, doc_ingestion.iter_text(path, content_type), on_progress=on_progress)
+    db.commit()
+    # Not the content: no caller needs it back, and it may be large.
+    db.refresh(document, ["id", "name", "owner_id", "content_hash", "created_at", "updated_at"])
+    return document, chunk_count
+
+
+def ingest_file(
+    owner_id: int, name: str, path: str, content_type: str, content_hash: Optional[str] = None
+) -> Tuple[int, int]:
+    """Ingest a spooled upload in a session of its own; returns ``(document_id, chunk_count)``.
+
+    Blocking from start to finish, for a worker thread: PDF/docx parsing is
+    handed to the process pool, then chunks are embedded and written through
+    the sync engine.
+    """
+    text_path, _ = doc_ingestion.extract_text_file(path, content_type)
+    db = SessionLocal()
+    try:
+        document, chunk_count = ingest_upload(
+            db, owner_id, name, text_path, doc_ingestion.TXT_CONTENT_TYPE, content_hash=content_hash
+        )
+        return document.id, chunk_count
+    finally:
+        db.close()
+        if text_path != path:
+            os.remove(text_path)
+
+
+class ReingestResult(NamedTuple):
+    chunks: int  # active chunks after the update
+    unchanged: int  # rows kept as they were, possibly renumbered or shifted
+    added: int  # chunks embedded and inserted
+    removed: int  # rows marked ``status="removed"``
+
+
+def _common_prefix(a: str, b: str) -> int:
+    """Length of the longest common prefix of ``a`` and ``b``."""
+    limit = min(len(a), len(b))
+    n = 0
+    # Whole blocks first, so a large unchanged head costs a few slice compares.
+    while n < limit and a[n:n + DIFF_BLOCK_SIZE] == b[n:n + DIFF_BLOCK_SIZE]:
+        n += DIFF_BLOCK_SIZE
+    n = min(n, limit)
+    while n < limit and a[n] == b[n]:
+        n += 1
+    return n
+
+
+def reingest_document(
+    db: Session,
+    document: Document,
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+    boundary: str = CHUNK_BOUNDARY,
+) -> ReingestResult:
+    """Replace the content of ``document`` with ``text``, re-embedding only what changed.
+
+    Chunks that lie wholly inside the unchanged head or tail of the text are
+    kept. The changed span between them is re-chunked on its own, starting
+    where the first affected chunk started; if its last chunk would start
+    inside the first kept chunk after it, that chunk joins the span. Each new chunk whose text matches
+    an affected row (by the embedding cache's content hash) reuses that row
+    and its vector; the rest are embedded and inserted, and affected rows left
+    over are marked ``status="removed"``. Kept rows after the span are
+    renumbered and their offsets shifted with two range UPDATEs, without
+    re-embedding. Commits, then swaps the changed vectors and keyword entries
+    in one step each.
+
+    Chunks without offsets (stored before they were recorded) are all treated
+    as affected.
+    """
+    old_text = document.content
+    rows = db.execute(
+        select(DocumentChunk.id, DocumentChunk.chunk_index, DocumentChunk.char_start, DocumentChunk.char_end)
+        .where(DocumentChunk.document_id == document.id, DocumentChunk.status == "active")
+        .order_by(DocumentChunk.chunk_index)
+    ).all()
+    if text == old_text:
+        db.commit()
+        return ReingestResult(len(rows), len(rows), 0, 0)
+
+    delta = len(text) - len(old_text)
+    head, tail = 0, len(rows)
+    start, end = 0, len(text)
+    if all(row.char_start is not None for row in rows):
+        prefix = _common_prefix(old_text, text)
+        suffix = min(_common_prefix(old_text[::-1], text[::-1]), min(len(old_text), len(text)) - prefix)
+        while head < len(rows) and rows[head].char_end <= prefix:
+            head += 1
+        while tail > head and rows[tail - 1].char_start >= len(old_text) - suffix:
+            tail -= 1
+    base = rows[head - 1].chunk_index + 1 if head else 0
+    while True:
+        if head:
+            # Start at the first affected chunk so its overlap is carried over.
+            start = min(rows[head].char_start, prefix) if head < tail else rows[head - 1].char_end
+        if tail < len(rows):
+            last = rows[tail - 1].char_end if head < tail else rows[tail].char_start
+            end = max(last + delta, len(text) - suffix)
+        else:
+            end = len(text)
+        fresh = [
+            chunk._replace(index=base + chunk.index, start=start + chunk.start, end=start + chunk.end)
+            for chunk in doc_ingestion.iter_text_chunks(
+                [text[start:end]], max_tokens=max_tokens, overlap=overlap, boundary=boundary
+            )
+        ]
+        if tail == len(rows) or not fresh or fresh[-1].start < rows[tail].char_start + delta:
+            break
+        # With a large overlap the span can be re-chunked into more, shorter
+        # steps than before, so that its last chunk starts inside the first
+        # kept one. Take that chunk into the span too, until they line up.
+        tail += 1
+    affected = rows[head:tail]
+
+    reusable: Dict[str, List[int]] = {}
+    if affected:
+        old_chunks = db.execute(
+            select(DocumentChunk.id, DocumentChunk.chunk_text).where(
+                DocumentChunk.document_id == document.id,
+                DocumentChunk.status == "active",
+                DocumentChunk.chunk_index.between(affected[0].chunk_index, affected[-1].chunk_index),
+            )
+        )
+        for chunk_id, chunk_text in old_chunks:
+            reusable.setdefault(embedding_cache.key(chunk_text), []).append(chunk_id)
+    reused, added = [], []
+    for chunk in fresh:
+        matches = reusable.get(embedding_cache.key(chunk.text))
+        if matches:
+            reused.append(
+                {"id": matches.pop(), "chunk_index": chunk.index, "char_start": chunk.start, "char_end": chunk.end}
+            )
+        else:
+            added.append(chunk)
+    removed = [chunk_id for ids in reusable.values() for chunk_id in ids]
+
+    # (document_id, chunk_index) is unique and checked row by row, so rows
+    # that move are first parked above every index in use or to come.
+    # Removed rows go to -id, out of everyone's way.
+    park = rows[-1].chunk_index + 1 + len(fresh) if rows else 0
+    if removed:
+        db.execute(
+            update(DocumentChunk)
+            .where(DocumentChunk.id.in_(removed))
+            .values(status="removed", chunk_index=-DocumentChunk.id)
+        )
+    shift = 0
+    if tail < len(rows):
+        first, final = rows[tail].chunk_index, rows[-1].chunk_index
+        shift = base + len(fresh) - first
+        if shift:
+            db.execute(
+                update(DocumentChunk)
+                .where(DocumentChunk.document_id == document.id, DocumentChunk.chunk_index.between(first, final))
+                .values(chunk_index=DocumentChunk.chunk_index + park)
+            )
+            first, final = first + park, final + park
+    if reused:
+        db.execute(
+            update(DocumentChunk)
+            .where(DocumentChunk.id.in_([row["id"] for row in reused]))
+            .values(chunk_index=DocumentChunk.chunk_index + park)
+        )
+        db.execute(update(DocumentChunk), reused)
+    added_ids, embeddings = _insert_chunks(db, [document.id] * len(added), added) if added else ([], None)
+    if tail < len(rows) and (shift or delta):
+        db.execute(
+            update(DocumentChunk)
+            .where(DocumentChunk.document_id == document.id, DocumentChunk.chunk_index.between(first, final))
+            .values(
+                chunk_index=DocumentChunk.chunk_index - (park if shift else 0) + shift,
+                char_start=DocumentChunk.char_start + delta,
+                char_end=DocumentChunk.char_end + delta,
+            )
+        )
+    document.content = text
+    db.commit()
+
+    vector_store.vector_store.update_vectors(
+        removed, added_ids, embeddings, owner_ids=document.owner_id, document_ids=document.id
+    )
+    keyword_index.reindex_chunks(removed, added_ids, [chunk.text for chunk in added], document.owner_id, document.id)
+    return ReingestResult(len(rows) - len(removed) + len(added), len(rows) - len(removed), len(added), len(removed))
+
+
+def reingest_file(
+    document_id: int, owner_id: int, path: str, content_type: str, content_hash: Optional[str] = None
+) -> Optional[ReingestResult]:
+    """Re-ingest a spooled upload as the new content of a document in a session of its own.
+
+    Blocking, for a worker thread like :func:`ingest_file`. The document row
+    is locked for the update, so two updates of one document apply in turn.
+    Returns None if ``owner_id`` has no such document.
+    """
+    text_path, _ = doc_ingestion.extract_text_file(path, content_type)
+    db = SessionLocal()
+    try:
+        document = db.scalar(
+            select(Document).where(Document.id == document_id, Document.owner_id == owner_id).with_for_update()
+        )
+        if document is None:
+            return None
+        document.content_hash = content_hash
+        text = "".join(doc_ingestion.iter_text(text_path, doc_ingestion.TXT_CONTENT_TYPE))
+        return reingest_document(db, document, text)
+    finally:
+        db.close()
+        if text_path != path:
+            os.remove(text_path)
+
+
+def reembed_stale_chunks(batch_size: int = CHUNK_BATCH_SIZE) -> int:
+    """Re-embed active chunks whose stored embedding is missing or of another size.
+
+    Embeddings from a previous embedding model are skipped when the vector
+    store is loaded, which would leave their chunks out of vector search for
+    good. Blocking, for a thread started at startup: batches of
+    ``batch_size`` chunks are embedded, written back and committed, then
+    added to the vector store. Returns the number of chunks re-embedded.
+    """
+    stale = (
+        DocumentChunk.status == "active",
+        or_(DocumentChunk.embedding.is_(None), func.length(DocumentChunk.embedding) != embedding_cache.dim * 4),
+    )
+    db = SessionLocal()
+    done = 0
+    try:
+        total = db.scalar(select(func.count(DocumentChunk.id)).where(*stale))
+        if not total:
+            return 0
+        logger.warning(f"Re-embedding {total} chunks stored without a {embedding_cache.dim}-dim embedding")
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(DocumentChunk.id, DocumentChunk.chunk_text, DocumentChunk.document_id, Document.owner_id)
+                .join(Document, Document.id == DocumentChunk.document_id)
+                .where(*stale, DocumentChunk.id > last_id)
+                .order_by(DocumentChunk.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            embeddings = embedding_cache.embed_many([row.chunk_text for row in rows], db=db)
+            db.execute(
+                update(DocumentChunk),
+                [
+                    {"id": row.id, "embedding": vector_store.encode_embedding(embedding)}
+                    for row, embedding in zip(rows, embeddings)
+                ],
+            )
+            db.commit()
+            vector_store.vector_store.add_vectors(
+                [row.id for row in rows],
+                embeddings,
+                owner_ids=[row.owner_id for row in rows],
+                document_ids=[row.document_id for row in rows],
+            )
+            done += len(rows)
+            last_id = rows[-1].id
+    finally:
+        db.close()
+    logger.info(f"Re-embedded {done} chunks")
+    return done
+
+
+def prune_embedding_cache(batch_size: int = CHUNK_BATCH_SIZE) -> int:
+    """Delete ``embedding_cache`` rows that no stored chunk's text hashes to.
+
+    Rows are left behind when documents are deleted or re-ingested, and
+    when the embedding model changes. Blocking, for a thread started at
+    startup like :func:`reembed_stale_chunks`. Rows written after the pass
+    starts are kept, as their chunks may not be committed yet. Returns the
+    number of rows deleted.
+    """
+    started = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        texts = db.scalars(select(DocumentChunk.chunk_text).execution_options(yield_per=batch_size))
+        pruned = embedding_cache.prune(db, texts, before=started)
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Pruned {pruned} unreferenced embedding cache rows")
+    return pruned
+
+
+class BulkSource(NamedTuple):
+    name: str
+    path: str  # spooled upload, removed by the caller
+    content_type: Optional[str]  # a supported type, a zip type, or None
+    sha256: str
+
+
+class BulkFileResult(NamedTuple):
+    name: str  # zip members are named "archive.zip/member/path"
+    status: str  # "created", "duplicate" or "failed"
+    document_id: Optional[int] = None
+    chunks: Optional[int] = None
+    error: Optional[str] = None
+
+
+class _BulkFile(NamedTuple):
+    position: int  # index into the results
+    name: str
+    path: str
+    content_type: str
+    sha256: str
+    temporary: bool  # spooled from an archive, removed once read
+
+
+def count_bulk_files(sources: Sequence[BulkSource]) -> int:
+    """Files ``sources`` will produce results for, counting each zip member."""
+    total = 0
+    for source in sources:
+        if source.content_type in doc_ingestion.ZIP_CONTENT_TYPES:
+            try:
+                total += doc_ingestion.count_zip_files(source.path)
+                continue
+            except zipfile.BadZipFile:
+                pass
+        total += 1
+    return total
+
+
+def _extract_chunks(path: str, content_type: str) -> Tuple[str, Optional[str], Optional[List[Chunk]]]:
+    """``(text_path, text, chunks)`` for one file; text and chunks are None
+    when the text is too large to hold and should be streamed instead."""
+    text_path, _ = doc_ingestion.extract_text_file(path, content_type)
+    if os.path.getsize(text_path) > CONTENT_SPOOL_SIZE:
+        return text_path, None, None
+    text = "".join(doc_ingestion.iter_txt_blocks(text_path))
+    return text_path, text, list(doc_ingestion.iter_text_chunks([text]))
+
+
+class _BulkIngestion:
+    """State of one :func:`ingest_files` call; see there."""
+
+    def __init__(self, db: Session, owner_id: int, commit_files: int, commit_chunks: int):
+        self.db = db
+        self.owner_id = owner_id
+        self.commit_files = commit_files
+        self.commit_chunks = commit_chunks
+        self.results: List[Optional[BulkFileResult]] = []
+        self.group: List[Tuple[_BulkFile, str, List[Chunk]]] = []
+        self.group_chunks = 0
+        # content hash -> (document_id, chunks) of documents created by this call
+        self.created: Dict[str, Tuple[int, int]] = {}
+
+    def files(self, sources: Iterable[BulkSource]) -> Iterator[_BulkFile]:
+        """Supported files in upload order, archives expanded; the others get their result here."""
+        for source in sources:
+            if source.content_type not in doc_ingestion.ZIP_CONTENT_TYPES:
+                yield from self._file(source.name, source.path, source.content_type, source.sha256, False)
+                continue
+            try:
+                for name, spooled, error in doc_ingestion.iter_zip_members(source.path):
+                    name = f"{source.name}/{name}"
+                    if spooled is None:
+                        self.fail(name, error)
+                        continue
+                    content_type = doc_ingestion.guess_content_type(name)
+                    yield from self._file(name, spooled.path, content_type, spooled.sha256, True)
+            except zipfile.BadZipFile as exc:
+                self.fail(source.name, f"Invalid zip archive: {exc}")
+
+    def _file(self, name: str, path: str, content_type: Optional[str], sha256: str, temporary: bool):
+        if content_type in doc_ingestion.SUPPORTED_CONTENT_TYPES:
+            self.results.append(None)
+            yield _BulkFile(len(self.results) - 1, name, path, content_type, sha256, temporary)
+            return
+        self.fail(name, "Unsupported file type")
+        if temporary:
+            os.remove(path)
+
+    def fail(self, name: str, error: str, position: Optional[int] = None) -> None:
+        result = BulkFileResult(name, "failed", error=error)
+        if position is None:
+            self.results.append(result)
+        else:
+            self.results[position] = result
+
+    def settle(self, item: _BulkFile, extracted) -> None:
+        """Queue an extracted file for the next group write, or stream it alone if large."""
+        text_path = None
+        try:
+            text_path, text, chunks = extracted.result()
+            if text is None:
+                self.flush()
+                self._ingest_large(item, text_path)
+            else:
+                self.group.append((item, text, chunks))
+                self.group_chunks += len(chunks)
+                if len(self.group) >= self.commit_files or self.group_chunks >= self.commit_chunks:
+                    self.flush()
+        except Exception as exc:
+            logger.warning(f"Bulk upload of {item.name} failed: {exc}")
+            self.fail(item.name, str(exc), item.position)
+        finally:
+            if text_path is not None and text_path != item.path:
+                os.remove(text_path)
+            if item.temporary:
+                os.remove(item.path)
+
+    def _duplicates(self, hashes: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """``(document_id, chunks)`` of the owner's documents with these content hashes."""
+        found = {sha256: self.created[sha256] for sha256 in hashes if sha256 in self.created}
+        missing = [sha256 for sha256 in hashes if sha256 not in found]
+        if not missing:
+            return found
+        documents = {}
+        rows = self.db.execute(
+            select(Document.id, Document.content_hash)
+            .where(Document.owner_id == self.owner_id, Document.content_hash.in_(missing))
+            .order_by(Document.id)
+        )
+        for document_id, sha256 in rows:
+            documents.setdefault(sha256, document_id)
+        if documents:
+            counts = dict(
+                self.db.execute(
+                    select(DocumentChunk.document_id, func.count(DocumentChunk.id))
+                    .where(DocumentChunk.document_id.in_(documents.values()), DocumentChunk.status == "active")
+                    .group_by(DocumentChunk.document_id)
+                ).all()
+            )
+            for sha256, document_id in documents.items():
+                found[sha256] = (document_id, counts.get(document_id, 0))
+        return found
+
+    def _ingest_large(self, item: _BulkFile, text_path: str) -> None:
+        duplicate = self._duplicates([item.sha256]).get(item.sha256)
+        if duplicate:
+            self.results[item.position] = BulkFileResult(item.name, "duplicate", *duplicate)
+            return
+        try:
+            document, chunks = ingest_upload(
+                self.db, self.owner_id, item.name, text_path, doc_ingestion.TXT_CONTENT_TYPE, content_hash=item.sha256
+            )
+        except Exception:
+            self.db.rollback()
+            raise
+        self.created[item.sha256] = (document.id, chunks)
+        self.results[item.position] = BulkFileResult(item.name, "created", document.id, chunks)
+
+    def _try_write(self, group: List[Tuple[_BulkFile, str, List[Chunk]]]) -> Optional[str]:
+        try:
+            self._write(group)
+        except Exception as exc:
+            self.db.rollback()
+            logger.exception(f"Bulk write of {len(group)} file(s) failed")
+            return str(exc)
+        return None
+
+    def flush(self) -> None:
+        """Write the queued files in one transaction.
+
+        If that fails, they are written one transaction each, so only the
+        file at fault is reported as failed.
+        """
+        group, self.group, self.group_chunks = self.group, [], 0
+        if not group:
+            return
+        error = self._try_write(group)
+        if error is None:
+            return
+        for entry in group:
+            if len(group) > 1:
+                error = self._try_write([entry])
+            if error is not None:
+                self.fail(entry[0].name, error, entry[0].position)
+
+    def _write(self, group: List[Tuple[_BulkFile, str, List[Chunk]]]) -> None:
+        duplicates = self._duplicates({item.sha256 for item, _, _ in group})
+        fresh, repeats = {}, []
+        for entry in group:
+            sha256 = entry[0].sha256
+            if sha256 in duplicates or sha256 in fresh:
+                repeats.append(entry[0])
+            else:
+                fresh[sha256] = entry
+        entries = list(fresh.values())
+        document_ids = []
+        if entries:
+            document_ids = list(
+                self.db.scalars(
+                    insert(Document).returning(Document.id, sort_by_parameter_order=True),
+                    [
+                        {"name": item.name, "owner_id": self.owner_id, "content": text, "content_hash": item.sha256}
+                        for item, text, _ in entries
+                    ],
+                )
+            )
+        chunk_document_ids = [document_id for document_id, (_, _, chunks) in zip(document_ids, entries) for _ in chunks]
+        chunks = [chunk for _, _, file_chunks in entries for chunk in file_chunks]
+        chunk_ids, embeddings = [], []
+        for start in range(0, len(chunks), CHUNK_BATCH_SIZE):
+            ids, vectors = _insert_chunks(
+                self.db, chunk_document_ids[start:start + CHUNK_BATCH_SIZE], chunks[start:start + CHUNK_BATCH_SIZE]
+            )
+            chunk_ids.extend(ids)
+            embeddings.append(vectors)
+        self.db.commit()
+
+        if chunk_ids:
+            vector_store.vector_store.add_vectors(
+                chunk_ids, np.vstack(embeddings), owner_ids=self.owner_id, document_ids=chunk_document_ids
+            )
+            keyword_index.index_chunks(chunk_ids, [chunk.text for chunk in chunks], self.owner_id, chunk_document_ids)
+        for document_id, (item, _, file_chunks) in zip(document_ids, entries):
+            self.created[item.sha256] = (document_id, len(file_chunks))
+            self.results[item.position] = BulkFileResult(item.name, "created", document_id, len(file_chunks))
+        for item in repeats:
+            duplicate = duplicates.get(item.sha256) or self.created[item.sha256]
+            self.results[item.position] = BulkFileResult(item.name, "duplicate", *duplicate)
+
+
+def _discard(item: _BulkFile, extracted) -> None:
+    if not extracted.cancel() and extracted.exception() is None:
+        text_path = extracted.result()[0]
+        if text_path != item.path:
+            os.remove(text_path)
+    if item.temporary:
+        os.remove(item.path)
+
+
+def ingest_files(
+    owner_id: int,
+    sources: Sequence[BulkSource],
+    workers: int = BULK_UPLOAD_WORKERS,
+    commit_files: int = BULK_COMMIT_FILES,
+    commit_chunks: int = BULK_COMMIT_CHUNKS,
+) -> List[BulkFileResult]:
+    """Ingest many spooled uploads (zip archives expanded); one result per file, in order.
+
+    Blocking, for a worker thread. A pool of ``workers`` threads extracts
+    and chunks files ahead of this thread (PDF/docx parsing goes on to the
+    process pool), at most ``2 * workers`` files at a time. This thread
+    embeds and writes them in groups: each group of up to ``commit_files``
+    files or ``commit_chunks`` chunks gets one multi-row document INSERT,
+    batched chunk INSERTs and one commit. Text too large to hold is streamed
+    in a transaction of its own. Files whose content hash matches one of the
+    owner's documents are reported as duplicates and not stored again.
+    """
+    db = SessionLocal()
+    run = _BulkIngestion(db, owner_id, commit_files, commit_chunks)
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-ingest") as pool:
+            try:
+                for item in run.files(sources):
+                    pending.append((item, pool.submit(_extract_chunks, item.path, item.content_type)))
+                    if len(pending) >= 2 * workers:
+                        run.settle(*pending.popleft())
+                while pending:
+                    run.settle(*pending.popleft())
+                run.flush()
+            finally:
+                # Only left over after an error: drop what is still queued.
+                for item, extracted in pending:
+                    _discard(item, extracted)
+    finally:
+        db.close()
+    return run.results
+
+
+async def find_duplicate(db: AsyncSession, owner_id: int, content_hash: str) -> Optional[Tuple[Document, int]]:
+    """Return ``(document, chunk_count)`` if ``owner_id`` already uploaded this file."""
+    document = await db.scalar(
+        select(Document)
+        .options(defer(Document.content))
+        .where(Document.owner_id == owner_id, Document.content_hash == content_hash)
+        .order_by(Document.id)
+        .limit(1)
+    )
+    if document is None:
+        return None
+    chunk_count = await db.scalar(
+        select(func.count(DocumentChunk.id)).where(
+            DocumentChunk.document_id == document.id, DocumentChunk.status == "active"
+        )
+    )
+    return document, chunk_count
@@ -0,0 +1,257 @@
+import datetime
+import hashlib
+import string
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CONCURRENCY,
+    EMBEDDING_DIM,
+    EMBEDDING_PROVIDER,
+    EMBEDDING_QUERY_CACHE_SIZE,
+)
+from app.models.embedding_cache import EmbeddingCacheEntry
+
+# str.translate + split tokenizes several times faster than a \w+ regex.
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation})
+
+
+class EmbeddingProvider:
+    """Turns texts into a ``(len(texts), dim)`` float32 matrix.
+
+    Subclasses implement :meth:`_embed_batch`; :meth:`embed_many` splits the
+    input into ``batch_size`` requests and runs up to ``concurrency`` of them
+    at a time, which is what remote providers need to stay within rate and
+    payload limits.
+    """
+
+    def __init__(self, dim: int, batch_size: int = 256, concurrency: int = 1):
+        if batch_size <= 0 or concurrency <= 0:
+            raise ValueError("batch_size and concurrency must be positive")
+        self.dim = dim
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _embed_batch(self, texts: list) -> np.ndarray:
+        raise NotImplementedError
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embedding")
+            return self._executor
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if self.concurrency > 1 and len(batches) > 1:
+            results = list(self._get_executor().map(self._embed_batch, batches))
+        else:
+            results = [self._embed_batch(batch) for batch in batches]
+        return np.vstack(results).astype(np.float32, copy=False)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+
+class HashEmbeddingProvider(EmbeddingProvider):
+    """Deterministic local embeddings via signed feature hashing.
+
+    Each lower-cased word token is hashed (CRC32, stable across processes)
+    into one of ``dim`` buckets with a +/-1 sign; rows are L2-normalized. It
+    needs no model or network, is thread-safe, and texts sharing words get
+    similar vectors, so it is good enough for tests and local development.
+    """
+
+    def _embed_batch(self, texts: list) -> np.ndarray:
+        counts, hashes = [], []
+        for text in texts:
+            tokens = text.lower().translate(_PUNCTUATION).split()
+            counts.append(len(tokens))
+            hashes.extend(map(_token_hash, tokens))
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if hashes:
+            hashes = np.asarray(hashes, dtype=np.uint32)
+            rows = np.repeat(np.arange(len(texts)), counts)
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            # Flattened bincount is a much faster scatter-add than np.add.at.
+            flat = rows * self.dim + hashes % self.dim
+            matrix += np.bincount(flat, weights=signs, minlength=matrix.size).reshape(matrix.shape).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class EmbeddingCache:
+    """Content-addressed cache in front of an :class:`EmbeddingProvider`.
+
+    Texts are keyed by ``sha256(namespace + text)`` where the namespace names
+    the provider and dimension, so switching models never serves stale
+    vectors. Lookups go to an in-process LRU first, then (when a session is
+    passed) to the ``embedding_cache`` table; only the remaining distinct
+    texts are sent to the provider, and those results are written back to
+    both layers.
+    """
+
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, provider: EmbeddingProvider, max_entries: int = 10000):
+        self.provider = provider
+        self.max_entries = max_entries
+        self.namespace = f"{type(provider).__name__}:{provider.dim}"
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    @property
+    def dim(self) -> int:
+        return self.provider.dim
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._lru), max_entries=self.max_entries)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def embed_many(self, texts: Iterable[str], db: Optional[Session] = None) -> np.ndarray:
+        texts = list(texts)
+        keys = [self.key(text) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+            self._stats["memory_hits"] += sum(1 for key in keys if key in found)
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing and db is not None:
+            stored = self._load(db, missing)
+            found.update(stored)
+            with self._lock:
+                for key, vector in stored.items():
+                    self._remember(key, vector)
+                self._stats["db_hits"] += sum(1 for key in keys if key in stored)
+            missing = [key for key in missing if key not in stored]
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            computed = self.provider.embed_many([text_by_key[key] for key in missing])
+            computed = dict(zip(missing, computed))
+            found.update(computed)
+            if db is not None:
+                self._store(db, computed)
+            with self._lock:
+                for key, vector in computed.items():
+                    self._remember(key, vector)
+                self._stats["misses"] += sum(1 for key in keys if key in computed)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+    def embed(self, text: str, db: Optional[Session] = None) -> np.ndarray:
+        return self.embed_many([text], db=db)[0]
+
+    def prune(self, db: Session, texts: Iterable[str], before: datetime.datetime) -> int:
+        """Delete table rows written before ``before`` that none of ``texts`` hash to.
+
+        ``texts`` is streamed and only a 64-bit prefix of each key is kept, so
+        the pass costs 8 bytes per text; a prefix collision merely keeps a
+        row. Rows of another provider or dimension never match. Returns the
+        number of rows deleted; the caller commits.
+        """
+        kept = np.unique(np.fromiter((_key_prefix(self.key(text)) for text in texts), dtype=np.uint64))
+        stmt = (
+            select(EmbeddingCacheEntry.id, EmbeddingCacheEntry.text_hash)
+            .where(EmbeddingCacheEntry.created_at < before)
+            .execution_options(yield_per=self.LOOKUP_BATCH_SIZE * 20)
+        )
+        stale = []
+        for rows in db.execute(stmt).partitions():
+            ids = np.fromiter((row.id for row in rows), dtype=np.int64, count=len(rows))
+            prefixes = np.fromiter((_key_prefix(row.text_hash) for row in rows), dtype=np.uint64, count=len(rows))
+            stale.append(ids[~np.isin(prefixes, kept)])
+        stale = np.concatenate(stale).tolist() if stale else []
+        for start in range(0, len(stale), self.LOOKUP_BATCH_SIZE):
+            batch = stale[start : start + self.LOOKUP_BATCH_SIZE]
+            db.execute(delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.id.in_(batch)))
+        return len(stale)
+
+    def _load(self, db: Session, keys: list) -> dict:
+        stored = {}
+        for start in range(0, len(keys), self.LOOKUP_BATCH_SIZE):
+            rows = db.execute(
+                select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding).where(
+                    EmbeddingCacheEntry.text_hash.in_(keys[start : start + self.LOOKUP_BATCH_SIZE])
+                )
+            )
+            for text_hash, data in rows:
+                vector = np.frombuffer(data, dtype="<f4")
+                if len(vector) == self.dim:
+                    stored[text_hash] = vector
+        return stored
+
+    def _store(self, db: Session, vectors: dict) -> None:
+        rows = [
+            {"text_hash": key, "embedding": np.asarray(vector, dtype="<f4").tobytes()}
+            for key, vector in vectors.items()
+        ]
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql_insert(EmbeddingCacheEntry).on_conflict_do_nothing(index_elements=["text_hash"])
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(EmbeddingCacheEntry).on_conflict_do_nothing(index_elements=["text_hash"])
+        else:
+            stmt = insert(EmbeddingCacheEntry)
+        db.execute(stmt, rows)
+
+
+def _key_prefix(key: str) -> int:
+    return int(key[:16], 16)
+
+
+def create_embedding_provider() -> EmbeddingProvider:
+    if EMBEDDING_PROVIDER == "hash":
+        return HashEmbeddingProvider(EMBEDDING_DIM, batch_size=EMBEDDING_BATCH_SIZE, concurrency=EMBEDDING_CONCURRENCY)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {EMBEDDING_PROVIDER}")
+
+
+embedding_provider = create_embedding_provider()
+embedding_cache = EmbeddingCache(embedding_provider, max_entries=EMBEDDING_CACHE_SIZE)
+# Search queries, never written to the table.
+query_cache = EmbeddingCache(embedding_provider, max_entries=EMBEDDING_QUERY_CACHE_SIZE)
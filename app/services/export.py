@@ -0,0 +1,89 @@
+import base64
+import datetime
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+
+EXPORT_FORMAT_VERSION = 1
+# Embeddings are the stored float32 little-endian bytes, base64-encoded.
+EMBEDDING_ENCODING = "base64-f32le"
+# Rows fetched per round trip from the server-side cursor; documents carry
+# their full text, so they come in smaller batches.
+DOCUMENT_BATCH_SIZE = 10
+CHUNK_BATCH_SIZE = 2000
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=_json_default) + "\n"
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def iter_export(
+    owner_id: int, include_content: bool = True, include_chunks: bool = True, include_embeddings: bool = False
+) -> AsyncIterator[bytes]:
+    """Yield ``owner_id``'s corpus as NDJSON, one batch of lines at a time.
+
+    The first line is an ``export`` header, then one ``document`` line per
+    document in id order, then one ``chunk`` line per active chunk in
+    (document_id, chunk_index) order. Rows come from server-side cursors
+    (``yield_per``) and only plain columns are selected, so nothing
+    accumulates in the session and memory stays at one batch however large
+    the corpus is. On PostgreSQL both queries read one REPEATABLE READ
+    snapshot, so chunks always belong to exported documents.
+    """
+    async with AsyncSessionLocal() as db:
+        if db.bind.dialect.name == "postgresql":
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        header = {
+            "type": "export",
+            "version": EXPORT_FORMAT_VERSION,
+            "owner_id": owner_id,
+            "embedding_encoding": EMBEDDING_ENCODING if include_embeddings else None,
+        }
+        yield _line(header).encode("utf-8")
+
+        columns = [Document.id, Document.name, Document.content_hash, Document.created_at, Document.updated_at]
+        if include_content:
+            columns.append(Document.content)
+        stmt = (
+            select(*columns)
+            .where(Document.owner_id == owner_id)
+            .order_by(Document.id)
+            .execution_options(yield_per=DOCUMENT_BATCH_SIZE)
+        )
+        async for rows in (await db.stream(stmt)).partitions():
+            yield "".join(_line({"type": "document", **row._asdict()}) for row in rows).encode("utf-8")
+        if not include_chunks:
+            return
+
+        columns = [
+            DocumentChunk.id, DocumentChunk.document_id, DocumentChunk.chunk_index, DocumentChunk.chunk_text,
+            DocumentChunk.char_start, DocumentChunk.char_end, DocumentChunk.created_at, DocumentChunk.updated_at,
+        ]
+        if include_embeddings:
+            columns.append(DocumentChunk.embedding)
+        stmt = (
+            select(*columns)
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .where(Document.owner_id == owner_id, DocumentChunk.status == "active")
+            .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            .execution_options(yield_per=CHUNK_BATCH_SIZE)
+        )
+        async for rows in (await db.stream(stmt)).partitions():
+            lines = []
+            for row in rows:
+                record = {"type": "chunk", **row._asdict()}
+                if include_embeddings and record["embedding"] is not None:
+                    record["embedding"] = base64.b64encode(record["embedding"]).decode("ascii")
+                lines.append(_line(record))
+            yield "".join(lines).encode("utf-8")
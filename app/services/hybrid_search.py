@@ -0,0 +1,61 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+class FusedHit(NamedTuple):
+    chunk_id: int
+    score: float
+    # component scores as the retrievers reported them; None if not retrieved
+    vector_score: Optional[float]
+    keyword_score: Optional[float]
+
+
+def _min_max(ranked: Sequence[Tuple[int, float]]) -> Dict[int, float]:
+    """Scale scores to [0, 1] within one result list (all 1.0 if they tie)."""
+    if not ranked:
+        return {}
+    scores = [score for _, score in ranked]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return {chunk_id: 1.0 for chunk_id, _ in ranked}
+    return {chunk_id: (score - low) / (high - low) for chunk_id, score in ranked}
+
+
+def fuse(
+    vector: Sequence[Tuple[int, float]],
+    keyword: Sequence[Tuple[int, float]],
+    method: str = "rrf",
+    vector_weight: float = 0.5,
+    rrf_k: int = 60,
+    top_k: Optional[int] = None,
+) -> List[FusedHit]:
+    """Merge two ranked ``[(chunk_id, score), ...]`` lists, best first.
+
+    ``rrf`` sums ``weight / (rrf_k + rank)`` over the lists a chunk appears
+    in (rank from 1), so only positions matter and cosine and BM25 scales
+    never meet. ``weighted`` min-max normalises each list and sums
+    ``weight * normalised score``; a chunk missing from a list gets 0 there.
+    The keyword weight is ``1 - vector_weight``. Ties go to the better
+    vector rank, then the better keyword rank.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}")
+    weights = (vector_weight, 1.0 - vector_weight)
+    component_scores: Dict[int, List[Optional[float]]] = {}
+    ranks: Dict[int, List[int]] = {}
+    fused: Dict[int, float] = {}
+    for side, ranked in enumerate((vector, keyword)):
+        normalised = _min_max(ranked) if method == "weighted" else None
+        for rank, (chunk_id, score) in enumerate(ranked, start=1):
+            component_scores.setdefault(chunk_id, [None, None])[side] = score
+            ranks.setdefault(chunk_id, [len(vector) + 1, len(keyword) + 1])[side] = rank
+            if method == "rrf":
+                contribution = weights[side] / (rrf_k + rank)
+            else:
+                contribution = weights[side] * normalised[chunk_id]
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + contribution
+    order = sorted(fused, key=lambda chunk_id: (-fused[chunk_id], *ranks[chunk_id]))
+    if top_k is not None:
+        order = order[:top_k]
+    return [FusedHit(chunk_id, fused[chunk_id], *component_scores[chunk_id]) for chunk_id in order]
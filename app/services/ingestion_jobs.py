@@ -0,0 +1,295 @@
+import contextlib
+import datetime
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    INGESTION_MAX_ATTEMPTS,
+    INGESTION_POLL_INTERVAL,
+    INGESTION_RETRY_BASE_DELAY,
+    INGESTION_RETRY_MAX_DELAY,
+    INGESTION_WORKERS,
+)
+from app.db.session import SessionLocal
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.models.ingestion_job import IngestionJob
+from app.models.user import User
+from app.services import deletion, doc_ingestion, mock_external
+from app.services.document import ingest_document
+
+logger = logging.getLogger("ingexai.ingestion")
+
+# A running job whose row has not been touched for this long is assumed to
+# belong to a dead worker and is queued again.
+STALE_JOB_AFTER = datetime.timedelta(minutes=30)
+# How often a worker touches the row of the job it is running.
+HEARTBEAT_INTERVAL = STALE_JOB_AFTER / 10
+
+async def enqueue_upload(
+    db: AsyncSession,
+    owner_id: int,
+    filename: str,
+    content_type: str,
+    file_path: str,
+    content_hash: Optional[str] = None,
+) -> IngestionJob:
+    job = IngestionJob(
+        owner_id=owner_id,
+        filename=filename,
+        content_type=content_type,
+        file_path=file_path,
+        content_hash=content_hash,
+        status="pending",
+        attempts=0,
+        pages_parsed=0,
+        chunks_embedded=0,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before retrying a job that has failed ``attempts`` times.
+
+    The delay doubles with every attempt up to INGESTION_RETRY_MAX_DELAY; a
+    random half of it is jitter, so jobs that failed together (say, during an
+    embedding outage) do not all come back at once.
+    """
+    delay = min(INGESTION_RETRY_MAX_DELAY, INGESTION_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_next_job(db: Session) -> Optional[int]:
+    """Atomically move the oldest pending job that is due to ``running``; returns its id."""
+    while True:
+        now = datetime.datetime.utcnow()
+        job_id = (
+            db.query(IngestionJob.id)
+            .filter(
+                IngestionJob.status == "pending",
+                or_(IngestionJob.next_attempt_at.is_(None), IngestionJob.next_attempt_at <= now),
+            )
+            .order_by(IngestionJob.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            return None
+        # The status guard makes this a compare-and-set: if another worker
+        # won the race, rowcount is 0 and we look for the next job.
+        claimed = db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, IngestionJob.status == "pending")
+            .values(status="running", attempts=IngestionJob.attempts + 1)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return job_id
+
+
+def requeue_stale_jobs(db: Session) -> int:
+    cutoff = datetime.datetime.utcnow() - STALE_JOB_AFTER
+    count = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.status == "running", IngestionJob.updated_at < cutoff)
+        .values(status="pending")
+    ).rowcount
+    db.commit()
+    return count
+
+
+def _discard_document(db: Session, document_id: int) -> None:
+    chunk_ids = [row.id for row in db.query(DocumentChunk.id).filter(DocumentChunk.document_id == document_id)]
+    db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete(synchronize_session=False)
+    db.query(Document).filter(Document.id == document_id).delete(synchronize_session=False)
+    deletion.evict_chunks(chunk_ids)
+
+
+@contextlib.contextmanager
+def _heartbeat(job_id: int) -> Iterator[None]:
+    """Touch the job's ``updated_at`` every HEARTBEAT_INTERVAL while the block runs.
+
+    Extracting a large PDF can outlast STALE_JOB_AFTER without any progress
+    to commit; the job would then be requeued and run a second time
+    alongside this attempt.
+    """
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(HEARTBEAT_INTERVAL.total_seconds()):
+            db = SessionLocal()
+            try:
+                db.execute(
+                    update(IngestionJob)
+                    .where(IngestionJob.id == job_id, IngestionJob.status == "running")
+                    .values(updated_at=datetime.datetime.utcnow())
+                )
+                db.commit()
+            except Exception:
+                logger.exception(f"Failed to refresh ingestion job {job_id}")
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=beat, name=f"ingestion-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _remove_files(*paths: str) -> None:
+    for path in set(paths):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+def run_job(job_id: int) -> None:
+    """Process one claimed job, retrying later or failing it on error.
+
+    Chunks are committed batch by batch together with the progress counters,
+    so ``GET /documents/jobs/{id}`` sees progress; a failed attempt deletes
+    the partial document, and the job is not claimed again before
+    ``next_attempt_at`` (see :func:`retry_delay`). A document left by an
+    attempt that never finished (its worker died, or the job was requeued
+    as stale) is deleted first. The row is kept fresh by :func:`_heartbeat`
+    throughout, so a slow attempt is not mistaken for a dead one.
+    """
+    db = SessionLocal()
+    text_path = None
+    try:
+        job = db.get(IngestionJob, job_id)
+        try:
+            with _heartbeat(job_id):
+                if job.document_id is not None:
+                    _discard_document(db, job.document_id)
+                    job.document_id = None
+                    job.chunks_embedded = 0
+                    db.commit()
+                text_path, pages = doc_ingestion.extract_text_file(job.file_path, job.content_type)
+                job.pages_parsed = pages
+                document = Document(
+                    name=job.filename, owner_id=job.owner_id, content="", content_hash=job.content_hash
+                )
+                db.add(document)
+                db.flush()
+                job.document_id = document.id
+                db.commit()
+
+                def progress(count: int) -> None:
+                    job.chunks_embedded = count
+                    db.commit()
+
+                chunks = ingest_document(
+                    db, document, doc_ingestion.iter_txt_blocks(text_path), on_progress=progress
+                )
+                job.chunks_embedded = chunks
+                job.status = "completed"
+                job.error = None
+                db.commit()
+        except Exception as exc:
+            logger.exception(f"Ingestion job {job_id} failed (attempt {job.attempts})")
+            db.rollback()
+            if job.document_id is not None:
+                _discard_document(db, job.document_id)
+                job.document_id = None
+            job.chunks_embedded = 0
+            job.error = str(exc)
+            job.status = "failed" if job.attempts >= INGESTION_MAX_ATTEMPTS else "pending"
+            if job.status == "pending":
+                job.next_attempt_at = datetime.datetime.utcnow() + datetime.timedelta(
+                    seconds=retry_delay(job.attempts)
+                )
+            db.commit()
+            if job.status == "failed":
+                _remove_files(job.file_path, text_path)
+            return
+        _remove_files(job.file_path, text_path)
+        owner = db.get(User, job.owner_id)
+        mock_external.external_create_document({"name": job.filename, "owner": owner.username})
+        logger.info(f"Ingestion job {job_id} completed: document {job.document_id}, {chunks} chunks")
+    finally:
+        db.close()
+
+
+def run_pending_jobs(limit: Optional[int] = None) -> int:
+    """Drain the queue in the calling thread; returns the number of jobs run."""
+    processed = 0
+    while limit is None or processed < limit:
+        db = SessionLocal()
+        try:
+            job_id = claim_next_job(db)
+        finally:
+            db.close()
+        if job_id is None:
+            break
+        run_job(job_id)
+        processed += 1
+    return processed
+
+
+class IngestionWorker:
+    """Polls ``ingestion_jobs`` and runs at most ``concurrency`` jobs at once.
+
+    Jobs are claimed with a compare-and-set update, so several app processes
+    can each run a worker against the same table without a broker.
+    """
+
+    def __init__(self, concurrency: int = INGESTION_WORKERS, poll_interval: float = INGESTION_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._stop = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ingestion")
+        self._thread = threading.Thread(target=self._loop, name="ingestion-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if not self._slots.acquire(timeout=self.poll_interval):
+                continue
+            db = SessionLocal()
+            try:
+                job_id = claim_next_job(db)
+                if job_id is None:
+                    requeue_stale_jobs(db)
+            except Exception:
+                logger.exception("Failed to poll ingestion jobs")
+                job_id = None
+            finally:
+                db.close()
+            if job_id is None:
+                self._slots.release()
+                self._stop.wait(self.poll_interval)
+                continue
+            future = self._executor.submit(run_job, job_id)
+            future.add_done_callback(lambda _: self._slots.release())
+
+
+worker = IngestionWorker()
@@ -0,0 +1,326 @@
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.engine import make_url
+
+from app.core.config import DATABASE_URL, KEYWORD_SEARCH_BACKEND
+
+_TOKEN = re.compile(r"\w+")
+# PostgreSQL text search configuration; must match the GIN index expression.
+TS_CONFIG = literal_column("'english'::regconfig")
+MAX_TF = 0xFFFF
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class InvertedIndex:
+    """In-process BM25 keyword index over chunk texts.
+
+    Each term has a posting list of (row, term frequency) in two compact
+    ``array`` buffers; a row per chunk records its id, length, owner and
+    document.
+    Queries view the buffers as NumPy arrays, so scoring a term is a few
+    vector operations over its postings rather than a loop. Removed chunks
+    are tombstoned and still count towards document frequencies (as in
+    Lucene) until ``compaction_ratio`` of the rows are dead and the
+    postings are rewritten.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compaction_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.compaction_ratio = compaction_ratio
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._term_ids = {}  # term -> index into the posting lists
+        self._post_rows: List[array] = []  # int32 rows
+        self._post_tfs: List[array] = []  # uint16 term frequencies
+        self._chunk_ids = array("q")  # row -> chunk id
+        self._lengths = array("I")  # row -> tokens
+        self._owners = array("q")  # row -> owner id
+        self._documents = array("q")  # row -> document id, -1 if unknown
+        self._alive = bytearray()  # row -> 1 unless removed
+        self._row_of = {}  # chunk id -> row (live rows only)
+        self._total_length = 0  # tokens over live rows
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def add(
+        self,
+        chunk_ids: Sequence[int],
+        texts: Sequence[str],
+        owner_ids: Union[int, Sequence[int]],
+        document_ids: Union[None, int, Sequence[int]] = None,
+    ) -> None:
+        """Index chunks; ``owner_ids`` and ``document_ids`` are one id for all
+        of them or one per chunk."""
+        if isinstance(owner_ids, int):
+            owner_ids = [owner_ids] * len(chunk_ids)
+        if document_ids is None or isinstance(document_ids, int):
+            document_ids = [-1 if document_ids is None else document_ids] * len(chunk_ids)
+        with self._lock:
+            for chunk_id, text, owner_id, document_id in zip(chunk_ids, texts, owner_ids, document_ids):
+                if chunk_id in self._row_of:
+                    self._tombstone(chunk_id)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                row = len(self._chunk_ids)
+                self._chunk_ids.append(chunk_id)
+                self._lengths.append(length)
+                self._owners.append(owner_id)
+                self._documents.append(document_id)
+                self._alive.append(1)
+                self._row_of[chunk_id] = row
+                self._total_length += length
+                for term, tf in counts.items():
+                    term_id = self._term_ids.get(term)
+                    if term_id is None:
+                        term_id = self._term_ids[term] = len(self._post_rows)
+                        self._post_rows.append(array("i"))
+                        self._post_tfs.append(array("H"))
+                    self._post_rows[term_id].append(row)
+                    self._post_tfs[term_id].append(min(tf, MAX_TF))
+            self._maybe_compact()
+
+    def remove(self, chunk_ids: Iterable[int]) -> int:
+        """Tombstone chunks; returns how many were indexed."""
+        removed = 0
+        with self._lock:
+            for chunk_id in chunk_ids:
+                if chunk_id in self._row_of:
+                    self._tombstone(chunk_id)
+                    removed += 1
+            self._maybe_compact()
+        return removed
+
+    def update(
+        self,
+        remove_ids: Iterable[int],
+        chunk_ids: Sequence[int],
+        texts: Sequence[str],
+        owner_ids: Union[int, Sequence[int]],
+        document_ids: Union[None, int, Sequence[int]] = None,
+    ) -> int:
+        """Remove ``remove_ids`` and index ``chunk_ids`` without a search
+        seeing one half done; returns how many of ``remove_ids`` were indexed."""
+        with self._lock:
+            self.add(chunk_ids, texts, owner_ids, document_ids)
+            return self.remove(remove_ids)
+
+    def _tombstone(self, chunk_id: int) -> None:
+        row = self._row_of.pop(chunk_id)
+        self._alive[row] = 0
+        self._total_length -= self._lengths[row]
+        self._deleted += 1
+
+    def _maybe_compact(self) -> None:
+        if self._deleted and self._deleted > self.compaction_ratio * len(self._chunk_ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned rows from every posting list and renumber the rest."""
+        with self._lock:
+            if not self._deleted:
+                return
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            new_row = np.cumsum(alive, dtype=np.int64) - 1
+            chunk_ids = np.frombuffer(self._chunk_ids, dtype=np.int64)[alive]
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)[alive]
+            owners = np.frombuffer(self._owners, dtype=np.int64)[alive]
+            documents = np.frombuffer(self._documents, dtype=np.int64)[alive]
+            postings = []
+            for term, term_id in self._term_ids.items():
+                rows = np.frombuffer(self._post_rows[term_id], dtype=np.int32)
+                keep = alive[rows]
+                if keep.any():
+                    tfs = np.frombuffer(self._post_tfs[term_id], dtype=np.uint16)
+                    postings.append((term, new_row[rows[keep]].astype(np.int32), tfs[keep]))
+            self._reset()
+            self._chunk_ids.frombytes(chunk_ids.tobytes())
+            self._lengths.frombytes(lengths.tobytes())
+            self._owners.frombytes(owners.tobytes())
+            self._documents.frombytes(documents.tobytes())
+            self._alive.extend(b"\x01" * len(chunk_ids))
+            self._row_of = {int(chunk_id): row for row, chunk_id in enumerate(chunk_ids.tolist())}
+            self._total_length = int(lengths.sum())
+            for term, rows, tfs in postings:
+                self._term_ids[term] = len(self._post_rows)
+                self._post_rows.append(array("i", rows.tobytes()))
+                self._post_tfs.append(array("H", tfs.tobytes()))
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        owner_id: Optional[int] = None,
+        document_ids: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return up to ``top_k`` ``(chunk_id, bm25_score)`` pairs, best first."""
+        terms = set(tokenize(query))
+        if document_ids is not None:
+            document_ids = np.fromiter(set(document_ids), dtype=np.int64)
+        with self._lock:
+            if not self._row_of or not terms or top_k <= 0:
+                return []
+            rows_total = len(self._chunk_ids)
+            avg_length = self._total_length / len(self._row_of)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).view(bool)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            owners = np.frombuffer(self._owners, dtype=np.int64)
+            documents = np.frombuffer(self._documents, dtype=np.int64)
+            hit_rows, hit_scores = [], []
+            for term in terms:
+                term_id = self._term_ids.get(term)
+                if term_id is None:
+                    continue
+                rows = np.frombuffer(self._post_rows[term_id], dtype=np.int32)
+                df = len(rows)
+                keep = alive[rows]
+                if owner_id is not None:
+                    keep &= owners[rows] == owner_id
+                if document_ids is not None:
+                    keep &= np.isin(documents[rows], document_ids)
+                rows = rows[keep]
+                if not len(rows):
+                    continue
+                tf = np.frombuffer(self._post_tfs[term_id], dtype=np.uint16)[keep].astype(np.float32)
+                idf = math.log(1.0 + (rows_total - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / avg_length)
+                hit_rows.append(rows)
+                hit_scores.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+            if not hit_rows:
+                return []
+            rows = np.concatenate(hit_rows)
+            scores = np.concatenate(hit_scores)
+            if len(hit_rows) > 1:
+                if len(rows) > rows_total // 16:
+                    dense = np.bincount(rows, weights=scores, minlength=rows_total)
+                    rows = np.flatnonzero(dense)
+                    scores = dense[rows]
+                else:
+                    rows, inverse = np.unique(rows, return_inverse=True)
+                    scores = np.bincount(inverse, weights=scores)
+            if len(rows) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                rows, scores = rows[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            chunk_ids = np.frombuffer(self._chunk_ids, dtype=np.int64)
+            return [(int(chunk_ids[rows[i]]), float(scores[i])) for i in order]
+
+
+def _resolve_backend() -> str:
+    if KEYWORD_SEARCH_BACKEND != "auto":
+        return KEYWORD_SEARCH_BACKEND
+    return "postgres" if make_url(DATABASE_URL).get_backend_name() == "postgresql" else "memory"
+
+
+def load_index_from_db(
+    db, index: InvertedIndex, batch_size: int = 10000, chunk_ids: Optional[Sequence[int]] = None
+) -> int:
+    """Index every active chunk, streamed ``batch_size`` rows at a time.
+
+    With ``chunk_ids``, only those chunks are indexed, ``batch_size`` ids per query.
+    """
+    from app.models.document import Document
+    from app.models.document_chunk import DocumentChunk
+
+    stmt = (
+        select(DocumentChunk.id, DocumentChunk.chunk_text, DocumentChunk.document_id, Document.owner_id)
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(DocumentChunk.status == "active")
+        .execution_options(yield_per=batch_size)
+    )
+    if chunk_ids is None:
+        statements = [stmt]
+    else:
+        chunk_ids = [int(chunk_id) for chunk_id in chunk_ids]
+        statements = (
+            stmt.where(DocumentChunk.id.in_(chunk_ids[start : start + batch_size]))
+            for start in range(0, len(chunk_ids), batch_size)
+        )
+    loaded = 0
+    for statement in statements:
+        for rows in db.execute(statement).partitions():
+            index.add(
+                [row.id for row in rows],
+                [row.chunk_text for row in rows],
+                [row.owner_id for row in rows],
+                [row.document_id for row in rows],
+            )
+            loaded += len(rows)
+    return loaded
+
+
+def index_chunks(
+    chunk_ids: Sequence[int], texts: Sequence[str], owner_id: int, document_ids: Union[int, Sequence[int]]
+) -> None:
+    """Keep the in-process index in step with new chunks (Postgres indexes them itself)."""
+    if KEYWORD_BACKEND == "memory":
+        keyword_index.add(chunk_ids, texts, owner_id, document_ids)
+
+
+def index_stored_chunks(db, chunk_ids: Sequence[int]) -> None:
+    """Like ``index_chunks``, reading the texts of committed chunks back from ``db``."""
+    if KEYWORD_BACKEND == "memory":
+        load_index_from_db(db, keyword_index, chunk_ids=chunk_ids)
+
+
+def unindex_chunks(chunk_ids: Iterable[int]) -> None:
+    if KEYWORD_BACKEND == "memory":
+        keyword_index.remove(chunk_ids)
+
+
+def reindex_chunks(
+    remove_ids: Iterable[int], chunk_ids: Sequence[int], texts: Sequence[str], owner_id: int, document_id: int
+) -> None:
+    if KEYWORD_BACKEND == "memory":
+        keyword_index.update(remove_ids, chunk_ids, texts, owner_id, document_id)
+
+
+async def search_keywords(
+    db, owner_id: int, query: str, top_k: int = 5, document_ids: Optional[Sequence[int]] = None
+) -> List[Tuple[int, float]]:
+    """Ranked ``(chunk_id, score)`` pairs among ``owner_id``'s active chunks,
+    optionally only those of ``document_ids``.
+
+    On PostgreSQL this is a ``websearch_to_tsquery`` match on the GIN index
+    ranked with ``ts_rank_cd``; otherwise BM25 over the in-process index.
+    """
+    if KEYWORD_BACKEND == "memory":
+        return await run_in_threadpool(
+            keyword_index.search, query, top_k=top_k, owner_id=owner_id, document_ids=document_ids
+        )
+    from app.models.document import Document
+    from app.models.document_chunk import DocumentChunk
+
+    vector = func.to_tsvector(TS_CONFIG, DocumentChunk.chunk_text)
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, query)
+    rank = func.ts_rank_cd(vector, tsquery)
+    conditions = [Document.owner_id == owner_id, DocumentChunk.status == "active", vector.op("@@")(tsquery)]
+    if document_ids is not None:
+        conditions.append(DocumentChunk.document_id.in_(document_ids))
+    stmt = (
+        select(DocumentChunk.id, rank.label("score"))
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(*conditions)
+        .order_by(rank.desc(), DocumentChunk.id)
+        .limit(top_k)
+    )
+    return [(row.id, float(row.score)) for row in await db.execute(stmt)]
+
+
+KEYWORD_BACKEND = _resolve_backend()
+keyword_index = InvertedIndex()
@@ -1,11 +1,67 @@
-from sqlalchemy.orm import Session
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import BCRYPT_ROUNDS, PASSWORD_HASH_QUEUE, PASSWORD_HASH_WORKERS
 from app.models.user import User
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other cost count as outdated and are rehashed on login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+class HashingPoolSaturated(Exception):
+    """Every hashing worker is busy and the wait queue is full."""
+
+
+class HashingPool:
+    """Bounded thread pool for bcrypt, which is slow on purpose.
+
+    ``workers`` hashes run at once (bcrypt releases the GIL) and at most
+    ``max_queue`` more wait for a worker; beyond that :meth:`run` raises
+    :class:`HashingPoolSaturated` at once, so a login burst is turned away
+    with 429s instead of piling up requests and starving the rest of the app.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+    async def run(self, fn: Callable, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolSaturated()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"pending": self._pending, "rejected": self._rejected}
+
+
+hashing_pool = HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    # A user being deleted can no longer sign in or use a token.
+    return await db.scalar(select(User).where(User.username == username, User.deleted_at.is_(None)))
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -13,8 +69,18 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+async def hash_password(password: str) -> str:
+    return await hashing_pool.run(get_password_hash, password)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    valid, new_hash = await hashing_pool.run(pwd_context.verify_and_update, password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Stored with a different BCRYPT_ROUNDS; upgrade while we have the password.
+        user.hashed_password = new_hash
+        await db.commit()
     return user
@@ -1,23 +1,650 @@
-import random
+import threading
+
+import numpy as np
+
+from app.core.config import (
+    VECTOR_INDEX,
+    VECTOR_IVF_LISTS,
+    VECTOR_IVF_NPROBE,
+    VECTOR_METRIC,
+    VECTOR_STORE_BACKEND,
+    VECTOR_STORE_PATH,
+)
+
+
+class _Partitions:
+    """Rows grouped by a key (owner or document id) for filtered search.
+
+    Each key keeps an append-only list of its rows plus a cached array of
+    them, so a filtered search gathers just those rows instead of masking
+    the whole matrix. Keys below 0 mean "unknown" and are not listed.
+    """
 
-# Mocked in-memory vector store
-class InMemoryVectorStore:
     def __init__(self):
-        self.vectors = {}  # {chunk_id: vector}
+        self._lists = {}
+        self._arrays = {}
+
+    def assign(self, rows: np.ndarray, keys: np.ndarray, column: np.ndarray):
+        """Move ``rows`` to ``keys``, keeping the per-row ``column`` in step.
+
+        A row given twice takes its last key.
+        """
+        rows, last = np.unique(np.asarray(rows, dtype=np.int64)[::-1], return_index=True)
+        keys = np.asarray(keys, dtype=np.int64)[::-1][last]
+        previous = column[rows]
+        moved = previous != keys
+        rows, keys, previous = rows[moved], keys[moved], previous[moved]
+        # Only a chunk re-added under another owner or document leaves a list.
+        for row, key in zip(rows[previous >= 0].tolist(), previous[previous >= 0].tolist()):
+            self._lists[key].remove(row)
+            self._arrays.pop(key, None)
+        column[rows] = keys
+        self.extend(rows, keys)
+
+    def extend(self, rows: np.ndarray, keys: np.ndarray):
+        """List ``rows``, which are in no list yet, under ``keys``.
+
+        Rows are grouped by key with one sort, as in :meth:`rebuild`, so a
+        large batch costs a few array operations per key rather than a
+        Python step per row.
+        """
+        listed = keys >= 0
+        rows, keys = rows[listed], keys[listed]
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        for i, key in enumerate(unique.tolist()):
+            self._lists.setdefault(key, []).extend(rows[order[bounds[i] : bounds[i + 1]]].tolist())
+            self._arrays.pop(key, None)
+
+    def rebuild(self, column: np.ndarray):
+        order = np.argsort(column, kind="stable")
+        keys, starts = np.unique(column[order], return_index=True)
+        bounds = np.append(starts, len(order))
+        self._lists = {
+            int(key): order[bounds[i] : bounds[i + 1]].tolist() for i, key in enumerate(keys.tolist()) if key >= 0
+        }
+        self._arrays = {}
+
+    def rows(self, key: int) -> np.ndarray:
+        rows = self._arrays.get(key)
+        if rows is None:
+            rows = np.array(self._lists.get(key, ()), dtype=np.int64)
+            self._arrays[key] = rows
+        return rows
+
+
+def _row_keys(keys, count: int) -> np.ndarray:
+    """One key per row from None (unknown), a single id or a sequence of ids."""
+    if keys is None:
+        return np.full(count, -1, dtype=np.int64)
+    if np.ndim(keys) == 0:
+        return np.full(count, int(keys), dtype=np.int64)
+    keys = np.asarray(keys, dtype=np.int64)
+    if len(keys) != count:
+        raise ValueError("Expected one key per vector")
+    return keys
+
+
+class InMemoryVectorStore:
+    """Exact nearest-neighbour index over a contiguous float32 matrix.
+
+    Vectors live in one pre-allocated ``(capacity, dim)`` array that grows
+    geometrically, so a search is a single matrix-vector product followed by
+    an ``argpartition`` top-k instead of a Python loop over every chunk.
+
+    Each row also records the owner and document of its chunk, and rows are
+    partitioned by both, so a search filtered to one owner (or a few
+    documents) only scores that owner's rows.
+    """
+
+    def __init__(
+        self,
+        metric: str = "cosine",
+        initial_capacity: int = 1024,
+        compaction_ratio: float = 0.25,
+    ):
+        if metric not in ("cosine", "dot"):
+            raise ValueError("metric must be 'cosine' or 'dot'")
+        self.metric = metric
+        self.compaction_ratio = compaction_ratio
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix = None  # (capacity, dim) float32, allocated on first add
+        self._ids = np.empty(0, dtype=np.int64)  # row -> chunk_id
+        self._alive = np.empty(0, dtype=bool)  # row -> not tombstoned
+        self._owners = np.empty(0, dtype=np.int64)  # row -> owner id, -1 if unknown
+        self._documents = np.empty(0, dtype=np.int64)  # row -> document id, -1 if unknown
+        self._owner_rows = _Partitions()
+        self._document_rows = _Partitions()
+        self._rows = {}  # chunk_id -> row (live rows only)
+        self._size = 0  # rows in use, including tombstones
+        self._deleted = 0
+        self._lock = threading.RLock()
 
-    def add_vector(self, chunk_id: int, vector):
-        self.vectors[chunk_id] = vector
+    @property
+    def dim(self):
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    def __len__(self):
+        return self._size - self._deleted
+
+    def _prepare(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.dim is not None and vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+        return vectors
+
+    def _reserve(self, rows: int, dim: int):
+        if self._matrix is None:
+            self._matrix = np.zeros((0, dim), dtype=np.float32)
+            self._resize(max(self._initial_capacity, rows))
+            return
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        # Amortized O(1) appends: double until the new rows fit.
+        while capacity < rows:
+            capacity *= 2
+        self._resize(capacity)
+
+    def _resize(self, capacity: int):
+        # Subclasses keeping extra per-row arrays extend this.
+        self._matrix = _resized(self._matrix, capacity, self._size)
+        self._ids = _resized(self._ids, capacity, self._size)
+        self._alive = _resized(self._alive, capacity, self._size)
+        self._owners = _resized(self._owners, capacity, self._size, fill=-1)
+        self._documents = _resized(self._documents, capacity, self._size, fill=-1)
+
+    def populate(self, load) -> int:
+        """Run ``load(self)`` if the store holds no vectors; returns its result, else 0.
+
+        Stores that persist their rows may also call ``load(self, chunk_ids)``
+        to reload just the chunks they cannot serve.
+        """
+        with self._lock:
+            return load(self) if len(self) == 0 else 0
+
+    def add_vector(self, chunk_id: int, vector, owner_id=None, document_id=None):
+        self.add_vectors([chunk_id], [vector], owner_ids=owner_id, document_ids=document_id)
+
+    def add_vectors(self, chunk_ids, vectors, owner_ids=None, document_ids=None):
+        """Add or replace vectors.
+
+        ``owner_ids`` and ``document_ids`` are one id for every vector or one
+        per vector; vectors added without them only show up in unfiltered
+        searches.
+        """
+        vectors = self._prepare(vectors)
+        if len(chunk_ids) != len(vectors):
+            raise ValueError("chunk_ids and vectors must have the same length")
+        owners = _row_keys(owner_ids, len(vectors))
+        documents = _row_keys(document_ids, len(vectors))
+        with self._lock:
+            self._add(chunk_ids, vectors, owners, documents)
+
+    def _add(self, chunk_ids, vectors: np.ndarray, owners: np.ndarray, documents: np.ndarray) -> np.ndarray:
+        """Write prepared vectors and return the rows they landed in."""
+        self._reserve(self._size + len(vectors), vectors.shape[1])
+        rows = np.empty(len(vectors), dtype=np.int64)
+        for i, chunk_id in enumerate(chunk_ids):
+            chunk_id = int(chunk_id)
+            row = self._rows.get(chunk_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._rows[chunk_id] = row
+                self._ids[row] = chunk_id
+                self._alive[row] = True
+            rows[i] = row
+        self._matrix[rows] = vectors
+        self._owner_rows.assign(rows, owners, self._owners)
+        self._document_rows.assign(rows, documents, self._documents)
+        return rows
+
+    def remove_vector(self, chunk_id: int) -> bool:
+        """Tombstone a vector; storage is reclaimed by :meth:`compact`."""
+        return self.remove_vectors([chunk_id]) == 1
+
+    def remove_vectors(self, chunk_ids) -> int:
+        """Tombstone many vectors; returns how many were present.
+
+        The rows are marked dead in one array write and the store is
+        compacted at most once, after all of them, when tombstones pass
+        ``compaction_ratio`` of the rows; removing a large document one id
+        at a time could otherwise compact several times along the way.
+        """
+        with self._lock:
+            pop = self._rows.pop
+            rows = [row for row in (pop(int(chunk_id), None) for chunk_id in chunk_ids) if row is not None]
+            if not rows:
+                return 0
+            self._alive[rows] = False
+            self._deleted += len(rows)
+            if self._deleted > self.compaction_ratio * self._size:
+                self.compact()
+            return len(rows)
+
+    def update_vectors(self, remove_ids, chunk_ids, vectors, owner_ids=None, document_ids=None) -> int:
+        """Remove ``remove_ids`` and add ``chunk_ids`` as one step.
+
+        Both happen under the store lock, so a concurrent search sees either
+        the old set of vectors or the new one, never half of each. Returns
+        how many of ``remove_ids`` were present.
+        """
+        if len(chunk_ids):
+            vectors = self._prepare(vectors)
+            if len(chunk_ids) != len(vectors):
+                raise ValueError("chunk_ids and vectors must have the same length")
+            owners = _row_keys(owner_ids, len(vectors))
+            documents = _row_keys(document_ids, len(vectors))
+        with self._lock:
+            if len(chunk_ids):
+                self._add(chunk_ids, vectors, owners, documents)
+            return self.remove_vectors(remove_ids)
+
+    def compact(self):
+        """Drop tombstoned rows so the matrix is dense again."""
+        with self._lock:
+            if not self._deleted:
+                return
+            keep = self._alive[: self._size].copy()
+            self._compact_rows(keep)
+            self._size = int(keep.sum())
+            self._deleted = 0
+            self._rows = {int(chunk_id): row for row, chunk_id in enumerate(self._ids[: self._size])}
+
+    def _compact_rows(self, keep: np.ndarray):
+        # Subclasses keeping extra per-row arrays extend this.
+        live = int(keep.sum())
+        self._matrix[:live] = self._matrix[: self._size][keep]
+        self._ids[:live] = self._ids[: self._size][keep]
+        self._alive[:live] = True
+        self._alive[live : self._size] = False
+        for column, partitions in ((self._owners, self._owner_rows), (self._documents, self._document_rows)):
+            column[:live] = column[: self._size][keep]
+            column[live : self._size] = -1
+            partitions.rebuild(column[:live])
 
     def get_vector(self, chunk_id: int):
-        return self.vectors.get(chunk_id)
+        row = self._rows.get(chunk_id)
+        if row is None:
+            return None
+        return self._matrix[row].copy()
+
+    def _filtered_rows(self, owner_id=None, document_ids=None):
+        """Live rows passing the filters, or None when there are none."""
+        if owner_id is None and document_ids is None:
+            return None
+        if document_ids is not None:
+            parts = [self._document_rows.rows(int(document_id)) for document_id in set(document_ids)]
+            rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+            if owner_id is not None:
+                rows = rows[self._owners[rows] == owner_id]
+        else:
+            rows = self._owner_rows.rows(int(owner_id))
+        return rows[self._alive[rows]]
+
+    def _score_rows(self, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """``queries @ matrix[rows].T`` for one query or a batch."""
+        if 2 * len(rows) > self._size:
+            # Gathering most of the matrix costs more than scoring all of it.
+            return (queries @ self._matrix[: self._size].T)[..., rows]
+        return queries @ self._matrix[rows].T
+
+    def _exact_search(self, query: np.ndarray, rows, top_k: int):
+        if rows is None:
+            scores = self._matrix[: self._size] @ query
+            if self._deleted:
+                scores[~self._alive[: self._size]] = -np.inf
+            return _top_k(self._ids[: self._size], scores, min(top_k, len(self)))
+        if len(rows) == 0:
+            return []
+        return _top_k(self._ids[rows], self._score_rows(query, rows), top_k)
+
+    def search_with_scores(self, query_vector, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        """Return ``[(chunk_id, score), ...]`` ordered by descending score.
+
+        With ``owner_id`` and/or ``document_ids`` only matching chunks are
+        scored. ``nprobe`` only applies to approximate indexes and is
+        ignored here.
+        """
+        with self._lock:
+            if len(self) == 0 or top_k <= 0:
+                return []
+            query = self._prepare(query_vector)[0]
+            return self._exact_search(query, self._filtered_rows(owner_id, document_ids), top_k)
+
+    def search(self, query_vector, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        results = self.search_with_scores(
+            query_vector, top_k=top_k, nprobe=nprobe, owner_id=owner_id, document_ids=document_ids
+        )
+        return [chunk_id for chunk_id, _ in results]
+
+    def search_many_with_scores(self, query_vectors, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        """``search_with_scores`` for a batch of queries, one result list each.
+
+        All queries are scored in a single matrix-matrix product, which
+        reads the (filtered) rows once instead of once per query.
+        """
+        with self._lock:
+            queries = self._prepare(query_vectors)
+            if len(self) == 0 or top_k <= 0:
+                return [[] for _ in range(len(queries))]
+            rows = self._filtered_rows(owner_id, document_ids)
+            if rows is None:
+                scores = queries @ self._matrix[: self._size].T
+                if self._deleted:
+                    scores[:, ~self._alive[: self._size]] = -np.inf
+                return _top_k_many(self._ids[: self._size], scores, min(top_k, len(self)))
+            if len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+            return _top_k_many(self._ids[rows], self._score_rows(queries, rows), top_k)
+
+
+class IVFVectorStore(InMemoryVectorStore):
+    """Approximate index: inverted lists over a k-means coarse quantizer.
+
+    Each vector is assigned to its nearest of ``n_lists`` centroids; a query
+    only scores the vectors in the ``nprobe`` closest lists. Until
+    ``train_size`` vectors have been added the index answers exactly, then it
+    trains itself once. Later adds are assigned to the existing centroids and
+    deletes are tombstones, so neither needs a rebuild; call :meth:`train`
+    again if the data distribution drifts.
+    """
+
+    def __init__(
+        self,
+        metric: str = "cosine",
+        n_lists: int = 256,
+        nprobe: int = 8,
+        train_size: int = None,
+        kmeans_iterations: int = 10,
+        **kwargs,
+    ):
+        super().__init__(metric=metric, **kwargs)
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.train_size = train_size if train_size is not None else n_lists * 39
+        self.kmeans_iterations = kmeans_iterations
+        self._centroids = None
+        self._assign = np.empty(0, dtype=np.int32)  # row -> list, -1 if unassigned
+        self._lists = []
+        self._list_arrays = []
+        self._stale = {}  # row -> lists still holding a stale posting of it
+
+    @property
+    def is_trained(self):
+        return self._centroids is not None
+
+    def _resize(self, capacity: int):
+        super()._resize(capacity)
+        self._assign = _resized(self._assign, capacity, self._size, fill=-1)
+
+    def _add(self, chunk_ids, vectors, owners, documents):
+        rows = super()._add(chunk_ids, vectors, owners, documents)
+        if self.is_trained:
+            self._assign_rows(rows)
+        elif len(self) >= self.train_size:
+            self.train()
+        return rows
+
+    def train(self, seed: int = 0):
+        """(Re)build the coarse quantizer from the live vectors."""
+        with self._lock:
+            live_rows = np.flatnonzero(self._alive[: self._size])
+            n_lists = min(self.n_lists, len(live_rows))
+            if n_lists == 0:
+                return
+            rng = np.random.default_rng(seed)
+            sample_rows = live_rows
+            if len(sample_rows) > n_lists * 256:
+                sample_rows = rng.choice(sample_rows, n_lists * 256, replace=False)
+            sample = self._matrix[sample_rows]
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+            for _ in range(self.kmeans_iterations):
+                labels = _nearest(sample, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                counts = np.bincount(labels, minlength=n_lists)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+                centroids = self._prepare(centroids)
+            self._centroids = centroids
+            self._assign[: self._size] = -1
+            self._lists = [[] for _ in range(n_lists)]
+            self._list_arrays = [None] * n_lists
+            self._stale = {}
+            self._assign_rows(live_rows)
+
+    def _assign_rows(self, rows: np.ndarray):
+        for start in range(0, len(rows), 65536):
+            block = rows[start : start + 65536]
+            labels = _nearest(self._matrix[block], self._centroids)
+            for row, label in zip(block.tolist(), labels.tolist()):
+                previous = self._assign[row]
+                if previous == label:
+                    continue
+                # The posting left in the previous list goes stale and is
+                # filtered out at query time (see _probed_rows). A row moving
+                # back to a list revives its stale posting there rather than
+                # listing the row twice.
+                self._assign[row] = label
+                stale = self._stale.get(row)
+                if previous >= 0:
+                    if stale is None:
+                        stale = self._stale[row] = set()
+                    stale.add(int(previous))
+                if stale is not None and label in stale:
+                    stale.discard(label)
+                    continue
+                self._lists[label].append(row)
+                self._list_arrays[label] = None
+
+    def _probed_rows(self, labels) -> np.ndarray:
+        """Rows listed under ``labels``, without the stale postings of rows
+        that have since moved to another list."""
+        parts = [self._list_rows(label) for label in labels]
+        rows = np.concatenate(parts)
+        listed_under = np.repeat(np.asarray(labels), [len(part) for part in parts])
+        return rows[self._assign[rows] == listed_under]
+
+    def _list_rows(self, label: int) -> np.ndarray:
+        rows = self._list_arrays[label]
+        if rows is None:
+            rows = np.array(self._lists[label], dtype=np.int64)
+            self._list_arrays[label] = rows
+        return rows
+
+    def _compact_rows(self, keep):
+        old_assign = self._assign[: self._size][keep]
+        super()._compact_rows(keep)
+        live = len(old_assign)
+        self._assign[:live] = old_assign
+        self._assign[live : self._size] = -1
+        if self.is_trained:
+            order = np.argsort(self._assign[:live], kind="stable")
+            bounds = np.searchsorted(self._assign[:live][order], np.arange(len(self._lists) + 1))
+            self._lists = [order[bounds[i] : bounds[i + 1]].tolist() for i in range(len(self._lists))]
+            self._list_arrays = [None] * len(self._lists)
+            self._stale = {}
+
+    def search_with_scores(self, query_vector, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        with self._lock:
+            if not self.is_trained:
+                return super().search_with_scores(
+                    query_vector, top_k=top_k, owner_id=owner_id, document_ids=document_ids
+                )
+            if len(self) == 0 or top_k <= 0:
+                return []
+            query = self._prepare(query_vector)[0]
+            nprobe = min(nprobe or self.nprobe, len(self._lists))
+            filtered = self._filtered_rows(owner_id, document_ids)
+            # A filtered set no larger than what the probes would visit is
+            # cheaper to scan exactly, and then recall is exact too.
+            if filtered is not None and len(filtered) <= len(self) * nprobe / len(self._lists):
+                return self._exact_search(query, filtered, top_k)
+            probes = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            rows = self._probed_rows(probes)
+            keep = self._alive[rows]
+            if filtered is not None:
+                member = np.zeros(self._size, dtype=bool)
+                member[filtered] = True
+                keep &= member[rows]
+            rows = rows[keep]
+            if len(rows) == 0:
+                return []
+            scores = self._matrix[rows] @ query
+            return _top_k(self._ids[rows], scores, top_k)
+
+    def search_many_with_scores(self, query_vectors, top_k=5, nprobe=None, owner_id=None, document_ids=None):
+        with self._lock:
+            if not self.is_trained:
+                return super().search_many_with_scores(
+                    query_vectors, top_k=top_k, owner_id=owner_id, document_ids=document_ids
+                )
+            queries = self._prepare(query_vectors)
+            if len(self) == 0 or top_k <= 0:
+                return [[] for _ in range(len(queries))]
+            nprobe = min(nprobe or self.nprobe, len(self._lists))
+            filtered = self._filtered_rows(owner_id, document_ids)
+            if filtered is not None and len(filtered) <= len(self) * nprobe / len(self._lists):
+                if len(filtered) == 0:
+                    return [[] for _ in range(len(queries))]
+                return _top_k_many(self._ids[filtered], self._score_rows(queries, filtered), top_k)
+            # Score the union of every query's probed lists in one product,
+            # then hide each row from the queries that did not probe its list.
+            probes = np.argpartition(-(queries @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            probed = np.zeros((len(queries), len(self._lists)), dtype=bool)
+            np.put_along_axis(probed, probes, True, axis=1)
+            labels = np.flatnonzero(probed.any(axis=0))
+            rows = self._probed_rows(labels)
+            keep = self._alive[rows]
+            if filtered is not None:
+                member = np.zeros(self._size, dtype=bool)
+                member[filtered] = True
+                keep &= member[rows]
+            rows = rows[keep]
+            if len(rows) == 0:
+                return [[] for _ in range(len(queries))]
+            scores = queries @ self._matrix[rows].T
+            scores[~probed[:, self._assign[rows]]] = -np.inf
+            return _top_k_many(self._ids[rows], scores, top_k)
+
+
+def _resized(array: np.ndarray, capacity: int, used: int, fill=0) -> np.ndarray:
+    resized = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    resized[:used] = array[:used]
+    return resized
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    return np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, top_k: int):
+    # argpartition is O(n); only the k winners get fully sorted.
+    k = min(top_k, len(scores))
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(ids[i]), float(scores[i])) for i in best]
+
+
+def _top_k_many(ids: np.ndarray, scores: np.ndarray, top_k: int):
+    """Per-row ``_top_k`` over a ``(queries, rows)`` score matrix; -inf scores are dropped."""
+    k = min(top_k, scores.shape[1])
+    if k < scores.shape[1]:
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        best = np.broadcast_to(np.arange(scores.shape[1]), (len(scores), k))
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    return [
+        [(int(ids[i]), float(score)) for i, score in zip(row, row_scores) if score != -np.inf]
+        for row, row_scores in zip(best.tolist(), best_scores.tolist())
+    ]
+
+
+def create_vector_store():
+    """Build the process-wide store selected by ``VECTOR_STORE_BACKEND``/``VECTOR_INDEX``."""
+    if VECTOR_STORE_BACKEND == "mmap":
+        # Imported here: disk_vector_store subclasses InMemoryVectorStore.
+        from app.services.disk_vector_store import MmapVectorStore
+
+        if VECTOR_INDEX != "flat":
+            raise ValueError("The mmap vector store only supports VECTOR_INDEX=flat")
+        return MmapVectorStore(VECTOR_STORE_PATH, metric=VECTOR_METRIC)
+    if VECTOR_STORE_BACKEND != "memory":
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND}")
+    if VECTOR_INDEX == "flat":
+        return InMemoryVectorStore(metric=VECTOR_METRIC)
+    if VECTOR_INDEX == "ivf":
+        return IVFVectorStore(metric=VECTOR_METRIC, n_lists=VECTOR_IVF_LISTS, nprobe=VECTOR_IVF_NPROBE)
+    raise ValueError(f"Unknown VECTOR_INDEX: {VECTOR_INDEX}")
+
+
+def encode_embedding(vector) -> bytes:
+    """Pack an embedding as little-endian float32 for ``DocumentChunk.embedding``."""
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def decode_embedding(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<f4")
+
+
+def load_vectors_from_db(db, store, dim: int, batch_size: int = 10000, chunk_ids=None) -> int:
+    """Bulk-load stored ``dim``-sized chunk embeddings into ``store``.
+
+    Rows are streamed ``batch_size`` at a time and each batch is decoded with a
+    single ``np.frombuffer`` over the concatenated blobs. Embeddings of another
+    size (from a previous embedding model) are skipped; see
+    ``document.reembed_stale_chunks``. With ``chunk_ids``, only those chunks
+    are loaded, ``batch_size`` ids per query. Returns the number loaded.
+    """
+    # Imported here so the store itself stays independent of the ORM.
+    from sqlalchemy import func, select
+
+    from app.models.document import Document
+    from app.models.document_chunk import DocumentChunk
 
-    def search(self, query_vector, top_k=5):
-        # Mocked: just return first top_k chunk_ids
-        return list(self.vectors.keys())[:top_k]
+    stmt = (
+        select(DocumentChunk.id, DocumentChunk.embedding, DocumentChunk.document_id, Document.owner_id)
+        .join(Document, Document.id == DocumentChunk.document_id)
+        .where(
+            DocumentChunk.embedding.isnot(None),
+            func.length(DocumentChunk.embedding) == dim * 4,
+            DocumentChunk.status == "active",
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    if chunk_ids is None:
+        statements = [stmt]
+    else:
+        chunk_ids = [int(chunk_id) for chunk_id in chunk_ids]
+        statements = (
+            stmt.where(DocumentChunk.id.in_(chunk_ids[start : start + batch_size]))
+            for start in range(0, len(chunk_ids), batch_size)
+        )
+    loaded = 0
+    for statement in statements:
+        for rows in db.execute(statement).partitions():
+            ids = [row.id for row in rows]
+            vectors = decode_embedding(b"".join(row.embedding for row in rows)).reshape(len(ids), dim)
+            store.add_vectors(
+                ids, vectors, owner_ids=[row.owner_id for row in rows], document_ids=[row.document_id for row in rows]
+            )
+            loaded += len(ids)
+    return loaded
 
-def mock_embedding(text: str):
-    # Return a mock embedding (list of floats)
-    random.seed(hash(text))
-    return [random.random() for _ in range(8)]
 
-vector_store = InMemoryVectorStore()
+vector_store = create_vector_store()
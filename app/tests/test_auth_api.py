@@ -1,5 +1,12 @@
+import asyncio
+import threading
+import time
+
 import pytest
+from passlib.context import CryptContext
 from fastapi.testclient import TestClient
+from app.core.auth import UserCache, user_cache
+from app.services.user import HashingPool, HashingPoolSaturated
 from app.main import app
 from app.db.session import SessionLocal
 from app.models.user import User
@@ -55,4 +62,105 @@ def test_protected_endpoint_with_auth(auth_token):
     assert response.status_code == 200
     data = response.json()
     assert data["status"] is True
-    assert isinstance(data["data"], list)
\ No newline at end of file
+    assert isinstance(data["data"], list)
+
+def test_current_user_resolved_once_per_request(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_cache.clear()
+    # /documents/ depends on get_current_user at router and route level.
+    assert client.get("/documents/", headers=headers).status_code == 200
+    assert user_cache.stats()["misses"] == 1
+    assert user_cache.stats()["hits"] == 0
+    assert client.get("/documents/", headers=headers).status_code == 200
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_user_update_and_delete_invalidate_cached_token(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_id = client.get("/users/me", headers=headers).json()["data"]["id"]
+    client.put(f"/users/{user_id}", data={"username": "renameduser"})
+    try:
+        # The token names the old username, which no longer exists.
+        assert client.get("/users/me", headers=headers).status_code == 401
+        token = client.post("/users/token", data={"username": "renameduser", "password": "testpass"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/users/me", headers=headers).json()["data"]["username"] == "renameduser"
+        client.delete(f"/users/{user_id}")
+        assert client.get("/users/me", headers=headers).status_code == 401
+    finally:
+        delete_test_user("renameduser")
+
+
+def test_user_cache_ttl_and_lru():
+    clock = [1000.0]
+    cache = UserCache(max_entries=2, ttl=10, clock=lambda: clock[0])
+    users = [User(id=i, username=f"u{i}", hashed_password="x") for i in range(3)]
+    cache.put("a", users[0])
+    cache.put("b", users[1])
+    assert cache.get("a") is users[0]
+    cache.put("c", users[2])  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") is users[0]
+    clock[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+    cache.invalidate_user(2)
+    assert cache.get("c") is None
+    assert cache.stats()["entries"] == 0
+    # Never cached past the token's own expiry.
+    cache.put("expired", users[0], expires_at=time.time() - 1)
+    assert cache.get("expired") is None
+
+
+def test_login_rehashes_password_with_new_cost():
+    delete_test_user("rehashuser")
+    db = SessionLocal()
+    try:
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("rehashpass")
+        db.add(User(username="rehashuser", hashed_password=old_hash))
+        db.commit()
+        response = client.post("/users/token", data={"username": "rehashuser", "password": "rehashpass"})
+        assert response.status_code == 200
+        db.expire_all()
+        new_hash = db.query(User.hashed_password).filter(User.username == "rehashuser").scalar()
+        assert new_hash != old_hash
+        assert not new_hash.startswith("$2b$04$")
+        response = client.post("/users/token", data={"username": "rehashuser", "password": "rehashpass"})
+        assert response.status_code == 200
+    finally:
+        db.close()
+        delete_test_user("rehashuser")
+
+
+def test_hashing_pool_rejects_when_saturated():
+    pool = HashingPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def burst():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HashingPoolSaturated):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(burst())
+    assert pool.stats() == {"pending": 0, "rejected": 1}
+
+
+def test_login_returns_429_when_hashing_pool_saturated(monkeypatch):
+    async def saturated(*args):
+        raise HashingPoolSaturated()
+
+    monkeypatch.setattr("app.services.user.hashing_pool.run", saturated)
+    delete_test_user("busyuser")
+    db = SessionLocal()
+    try:
+        db.add(User(username="busyuser", hashed_password="x"))
+        db.commit()
+    finally:
+        db.close()
+    response = client.post("/users/token", data={"username": "busyuser", "password": "busypass"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    delete_test_user("busyuser")
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.db.pool import TimedQueuePool, instrument_pool, pool_options, pool_snapshot
+
+
+@pytest.fixture
+def small_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05
+    )
+    instrument_pool(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_pool_counts_checkouts_and_overflow(small_engine):
+    first = small_engine.connect()
+    first.execute(text("select 1"))
+    second = small_engine.connect()
+    second.execute(text("select 1"))
+    stats = pool_snapshot(small_engine)
+    assert stats["checked_out"] == 2
+    assert stats["overflow"] == 1
+    assert stats["overflow_events"] == 1
+    assert stats["connects"] == 2
+    first.close()
+    second.close()
+    stats = pool_snapshot(small_engine)
+    assert stats["checked_out"] == 0
+    assert stats["peak_checked_out"] == 2
+    assert stats["checkouts"] == 2
+
+
+def test_pool_records_timeouts_and_wait(small_engine):
+    held = [small_engine.connect(), small_engine.connect()]
+    for conn in held:
+        conn.execute(text("select 1"))
+    with pytest.raises(exc.TimeoutError):
+        small_engine.connect().execute(text("select 1"))
+    stats = pool_snapshot(small_engine)
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+    for conn in held:
+        conn.close()
+
+
+def test_pool_stats_survive_dispose(small_engine):
+    with small_engine.connect() as conn:
+        conn.execute(text("select 1"))
+    small_engine.dispose()
+    with small_engine.connect() as conn:
+        conn.execute(text("select 1"))
+    stats = pool_snapshot(small_engine)
+    assert stats["checkouts"] == 2
+    assert stats["wait_seconds_total"] > 0
+
+
+def test_pool_options(monkeypatch):
+    monkeypatch.setattr("app.db.pool.DB_POOL_SIZE", 7)
+    options = pool_options("postgresql://u:p@localhost/db")
+    assert options["pool_size"] == 7
+    assert options["poolclass"] is TimedQueuePool
+    assert "pool_size" not in pool_options("sqlite://")
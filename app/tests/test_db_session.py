@@ -0,0 +1,12 @@
+from app.db.session import async_url
+
+
+def test_async_url_swaps_driver():
+    assert async_url("postgresql://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+    assert async_url("postgresql+psycopg2://u:p@localhost/db") == "postgresql+asyncpg://u:p@localhost/db"
+    assert async_url("sqlite:////tmp/app.db") == "sqlite+aiosqlite:////tmp/app.db"
+    assert async_url("sqlite+aiosqlite:///app.db") == "sqlite+aiosqlite:///app.db"
+
+
+def test_async_url_leaves_other_dialects():
+    assert async_url("mysql+aiomysql://u:p@localhost/db") == "mysql+aiomysql://u:p@localhost/db"
@@ -0,0 +1,138 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+from app.services.disk_vector_store import MmapVectorStore, fcntl
+
+
+def test_vectors_survive_reopen(tmp_path):
+    store = MmapVectorStore(str(tmp_path))
+    store.add_vectors([1, 2, 3], [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]])
+    reopened = MmapVectorStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.search([0.0, 1.0], top_k=2) == [2, 3]
+    np.testing.assert_allclose(reopened.get_vector(3), [0.6, 0.8], rtol=1e-6)
+
+def test_writes_are_visible_to_other_instances(tmp_path):
+    writer = MmapVectorStore(str(tmp_path))
+    reader = MmapVectorStore(str(tmp_path))
+    assert reader.search([1.0, 0.0]) == []
+    writer.add_vector(7, [1.0, 0.0])
+    assert reader.search([1.0, 0.0]) == [7]
+    writer.remove_vector(7)
+    assert reader.search([1.0, 0.0]) == []
+
+def test_overwrite_supersedes_previous_row(tmp_path):
+    store = MmapVectorStore(str(tmp_path), compaction_ratio=1.0)
+    store.add_vector(1, [1.0, 0.0])
+    store.add_vector(1, [0.0, 1.0])
+    assert len(store) == 1
+    assert store.search_with_scores([0.0, 1.0], top_k=5)[0][0] == 1
+    np.testing.assert_allclose(store.get_vector(1), [0.0, 1.0])
+
+def test_compaction_starts_new_generation(tmp_path):
+    store = MmapVectorStore(str(tmp_path), compaction_ratio=1.0)
+    reader = MmapVectorStore(str(tmp_path))
+    store.add_vectors(list(range(10)), np.eye(10, dtype=np.float32))
+    assert store.remove_vectors([0, 1, 2, 99]) == 3
+    store.compact()
+    assert sorted(tmp_path.glob("ids-*")) == [tmp_path / "ids-000002.i64"]
+    assert len(reader) == 7
+    assert reader.search(np.eye(10)[5], top_k=1) == [5]
+    assert reader.get_vector(0) is None
+
+def test_filters_survive_reopen_and_compaction(tmp_path):
+    store = MmapVectorStore(str(tmp_path), compaction_ratio=1.0)
+    store.add_vectors([1, 2, 3], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], owner_ids=[5, 6, 5], document_ids=[50, 60, 51])
+    reader = MmapVectorStore(str(tmp_path))
+    assert reader.search([1.0, 0.0], top_k=5, owner_id=5) == [1, 3]
+    assert reader.search([1.0, 0.0], top_k=5, document_ids=[60]) == [2]
+    store.remove_vectors([1])
+    store.compact()
+    assert reader.search([1.0, 0.0], top_k=5, owner_id=5) == [3]
+    assert MmapVectorStore(str(tmp_path)).search([1.0, 0.0], top_k=5, owner_id=6) == [2]
+
+def test_segment_without_owner_files_reads_as_unknown_until_reloaded(tmp_path):
+    store = MmapVectorStore(str(tmp_path))
+    store.add_vectors([1, 3], [[1.0, 0.0], [0.0, 1.0]])
+    for kind in ("owners", "documents"):
+        (tmp_path / f"{kind}-000001.i64").unlink()
+    store.add_vectors([2], [[1.0, 0.0]], owner_ids=9)
+    reopened = MmapVectorStore(str(tmp_path))
+    assert reopened.search([1.0, 0.0], top_k=5, owner_id=9) == [2]
+    assert sorted(reopened.search([1.0, 0.0], top_k=5)) == [1, 2, 3]
+    reloaded = []
+
+    def load(store, chunk_ids=None):
+        reloaded.append(chunk_ids)
+        # Chunk 3 was deleted from the database in the meantime.
+        store.add_vectors([1], [[1.0, 0.0]], owner_ids=9, document_ids=90)
+        return 1
+
+    assert reopened.populate(load) == 1
+    assert reloaded == [[1, 3]]
+    assert sorted(MmapVectorStore(str(tmp_path)).search([1.0, 0.0], top_k=5, owner_id=9)) == [1, 2]
+    assert sorted(store.search([1.0, 0.0], top_k=5)) == [1, 2]
+    assert reopened.populate(load) == 0
+
+def test_update_vectors_swaps_rows_in_one_step(tmp_path):
+    store = MmapVectorStore(str(tmp_path), compaction_ratio=1.0)
+    reader = MmapVectorStore(str(tmp_path))
+    store.add_vectors([1, 2], [[1.0, 0.0], [0.0, 1.0]], owner_ids=5)
+    assert store.update_vectors([1, 99], [3], [[0.6, 0.8]], owner_ids=5, document_ids=9) == 1
+    assert sorted(reader.search([0.6, 0.8], top_k=5, owner_id=5)) == [2, 3]
+    assert reader.search([0.6, 0.8], top_k=5, document_ids=[9]) == [3]
+    assert reader.get_vector(1) is None
+
+def _churn(path, rounds):
+    store = MmapVectorStore(path, compaction_ratio=0.2)
+    rng = np.random.default_rng(0)
+    for i in range(rounds):
+        ids = list(range(i * 50, i * 50 + 50))
+        store.add_vectors(ids, rng.standard_normal((50, 8)).astype(np.float32), owner_ids=1)
+        store.remove_vectors(ids[:40])  # crosses the ratio: compacts most rounds
+
+def _search_while_churning(path, stop, errors):
+    reader = MmapVectorStore(path)
+    query = np.ones(8, dtype=np.float32)
+    while not stop.is_set():
+        try:
+            reader.search_with_scores(query, top_k=5)
+            reader.search_with_scores(query, top_k=5, owner_id=1)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.put(repr(exc))
+
+@pytest.mark.skipif(fcntl is None, reason="needs fork and flock")
+def test_readers_in_other_processes_survive_compaction(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    stop, errors = ctx.Event(), ctx.Queue()
+    MmapVectorStore(str(tmp_path)).add_vectors([10**6], [np.ones(8)], owner_ids=1)
+    readers = [ctx.Process(target=_search_while_churning, args=(str(tmp_path), stop, errors)) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    writer = ctx.Process(target=_churn, args=(str(tmp_path), 150))
+    writer.start()
+    writer.join()
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert writer.exitcode == 0
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    assert failures == []
+    assert len(MmapVectorStore(str(tmp_path))) == 150 * 10 + 1
+
+def test_populate_fills_an_empty_store_once(tmp_path):
+    calls = []
+
+    def load(store):
+        calls.append(1)
+        store.add_vectors([1, 2], [[1.0, 0.0], [0.0, 1.0]], owner_ids=3)
+        return 2
+
+    first, second = MmapVectorStore(str(tmp_path)), MmapVectorStore(str(tmp_path))
+    assert first.populate(load) == 2
+    assert second.populate(load) == 0
+    assert calls == [1]
+    assert second.search([0.0, 1.0], top_k=1, owner_id=3) == [2]
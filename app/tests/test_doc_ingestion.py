@@ -113,3 +113,126 @@ def test_chunk_text_with_punctuation():
     text = "Hello, world! This is a test."
     chunks = doc_ingestion.chunk_text(text, chunk_size=3)
     assert chunks == ["Hello, world! This", "is a test."]
+
+def test_iter_chunks_carries_words_across_pieces():
+    pieces = ["one tw", "o three ", "four", " five six seven"]
+    assert list(doc_ingestion.iter_chunks(pieces, chunk_size=3)) == doc_ingestion.chunk_text("".join(pieces), chunk_size=3)
+
+def test_iter_text_chunks_cuts_at_sentences_with_overlap():
+    text = "One two three. Four five six seven! Eight nine.\n\nTen eleven twelve thirteen fourteen. Fifteen."
+    chunks = list(doc_ingestion.iter_text_chunks([text], max_tokens=7, overlap=2, boundary="sentence"))
+    assert [c.text for c in chunks] == [
+        "One two three. Four five six seven!",
+        # no whole sentence fits in the overlap, so it falls back to words
+        "six seven! Eight nine.",
+        "Eight nine.\n\nTen eleven twelve thirteen fourteen.",
+        "thirteen fourteen. Fifteen.",
+    ]
+    assert [c.tokens for c in chunks] == [7, 4, 7, 3]
+    assert all(text[c.start:c.end] == c.text for c in chunks)
+
+def test_iter_text_chunks_prefers_paragraph_breaks():
+    text = "A b c. D e f.\n\nG h i. J k l. M n o."
+    sentence = [c.text for c in doc_ingestion.iter_text_chunks([text], max_tokens=9, overlap=0, boundary="sentence")]
+    paragraph = [c.text for c in doc_ingestion.iter_text_chunks([text], max_tokens=9, overlap=0, boundary="paragraph")]
+    assert sentence == ["A b c. D e f.\n\nG h i.", "J k l. M n o."]
+    assert paragraph == ["A b c. D e f.", "G h i. J k l. M n o."]
+
+def test_iter_text_chunks_word_boundary_fills_chunks():
+    text = " ".join(f"w{i}." for i in range(10))
+    chunks = list(doc_ingestion.iter_text_chunks([text], max_tokens=4, overlap=1, boundary="word"))
+    assert [c.text for c in chunks] == ["w0. w1. w2. w3.", "w3. w4. w5. w6.", "w6. w7. w8. w9."]
+
+def test_iter_text_chunks_splits_long_sentences():
+    text = " ".join(f"w{i}" for i in range(25)) + "."
+    chunks = list(doc_ingestion.iter_text_chunks([text], max_tokens=10, overlap=0))
+    assert [c.tokens for c in chunks] == [10, 10, 5]
+    assert " ".join(c.text for c in chunks) == text
+
+def test_iter_text_chunks_is_independent_of_piece_boundaries():
+    import random
+    rng = random.Random(7)
+    words = ["alpha", "beta.", "gamma!", "delta\n\n", "eps", "zeta?\"", "eta\n", "  "]
+    text = " ".join(rng.choice(words) for _ in range(400))
+    cuts = sorted(rng.sample(range(len(text)), 60))
+    pieces = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+    for boundary in doc_ingestion.CHUNK_BOUNDARIES:
+        streamed = list(doc_ingestion.iter_text_chunks(pieces, max_tokens=20, overlap=5, boundary=boundary))
+        assert streamed == list(doc_ingestion.iter_text_chunks([text], max_tokens=20, overlap=5, boundary=boundary))
+        assert all(text[c.start:c.end] == c.text and c.tokens <= 20 for c in streamed)
+        assert [c.index for c in streamed] == list(range(len(streamed)))
+
+@pytest.mark.parametrize("kwargs", [{"max_tokens": 0}, {"max_tokens": 5, "overlap": 5}, {"boundary": "page"}])
+def test_iter_text_chunks_rejects_bad_settings(kwargs):
+    with pytest.raises(ValueError):
+        list(doc_ingestion.iter_text_chunks(["text"], **kwargs))
+
+def test_iter_txt_blocks_decodes_split_multibyte_characters(tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_bytes("áéí óú üñ".encode("utf-8"))
+    assert "".join(doc_ingestion.iter_txt_blocks(str(path), block_size=3)) == "áéí óú üñ"
+
+def test_iter_pdf_pages_yields_each_page(monkeypatch, tmp_path):
+    class DummyPage:
+        def __init__(self, text):
+            self.text = text
+        def extract_text(self):
+            return self.text
+    class DummyReader:
+        pages = [DummyPage("first"), DummyPage(None), DummyPage("third")]
+    monkeypatch.setattr("app.services.doc_ingestion.PdfReader", lambda _: DummyReader())
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"dummy")
+    assert list(doc_ingestion.iter_pdf_pages(str(path))) == ["first", "", "third"]
+
+def test_streaming_ingestion_stays_within_memory_budget(tmp_path):
+    import tracemalloc
+    path = tmp_path / "large.txt"
+    line = ("lorem ipsum dolor sit amet consectetur adipiscing elit " * 16 + "\n").encode()
+    with open(path, "wb") as f:
+        for _ in range(16 * 1024 * 1024 // len(line)):
+            f.write(line)
+    tracemalloc.start()
+    try:
+        chunks = sum(1 for _ in doc_ingestion.iter_text_chunks(doc_ingestion.iter_text(str(path), "text/plain")))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert chunks > 4000
+    # The file is 16 MB; the pipeline should only ever hold a block or two.
+    assert peak < 8 * 1024 * 1024
+
+def _numbered_pdf_reader(monkeypatch, pages):
+    class DummyPage:
+        def __init__(self, text):
+            self.text = text
+        def extract_text(self):
+            return self.text
+    class DummyReader:
+        def __init__(self, _):
+            self.pages = [DummyPage(f"[{i}]") for i in range(pages)]
+    monkeypatch.setattr("app.services.doc_ingestion.PdfReader", DummyReader)
+
+def test_extract_pdf_pages_in_parallel_keeps_page_order(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    _numbered_pdf_reader(monkeypatch, 23)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pages = doc_ingestion.extract_pdf_pages(b"dummy", executor=executor, workers=3, min_pages=10)
+    assert [p.index for p in pages] == list(range(23))
+    assert "".join(p.text for p in pages) == "".join(f"[{i}]" for i in range(23))
+    assert all(p.seconds >= 0 for p in pages)
+
+def test_extract_pdf_pages_small_files_are_one_shard(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    class CountingExecutor(ThreadPoolExecutor):
+        submitted = []
+        def submit(self, fn, *args):
+            self.submitted.append(args[1:])
+            return super().submit(fn, *args)
+    _numbered_pdf_reader(monkeypatch, 3)
+    with CountingExecutor(max_workers=2) as executor:
+        text = doc_ingestion.extract_text_from_pdf(b"dummy", executor=executor, workers=2, min_pages=10)
+    assert text == "[0][1][2]"
+    assert CountingExecutor.submitted == [(0, 3)]
+    # Without an executor small files are extracted in the calling thread.
+    assert doc_ingestion.extract_text_from_pdf(b"dummy", workers=2, min_pages=10) == "[0][1][2]"
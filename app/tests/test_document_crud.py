@@ -1,3 +1,11 @@
+import datetime
+import os
+import pathlib
+import random
+import subprocess
+import sys
+import time
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -5,6 +13,11 @@ from app.db.session import SessionLocal
 from app.models.user import User
 from app.models.document import Document
 from app.models.document_chunk import DocumentChunk
+from app.models.ingestion_job import IngestionJob
+from app.services import ingestion_jobs, keyword_index, vector_store
+from app.services.doc_ingestion import Chunk
+from app.services.document import ingest_document, reembed_stale_chunks, reingest_document, store_chunks
+from app.services.embeddings import embedding_provider
 
 client = TestClient(app)
 
@@ -20,6 +33,7 @@ def delete_test_user(username):
                 db.query(DocumentChunk).filter(DocumentChunk.document_id.in_(doc_ids)).delete(synchronize_session=False)
                 # Delete all documents owned by the user
                 db.query(Document).filter(Document.id.in_(doc_ids)).delete(synchronize_session=False)
+            db.query(IngestionJob).filter(IngestionJob.owner_id == user.id).delete(synchronize_session=False)
             db.delete(user)
             db.commit()
     finally:
@@ -99,4 +113,662 @@ def test_search_document_chunks(auth_token):
     assert isinstance(data["data"], dict)
     assert isinstance(data["data"]["chunks"], list)
     if data["data"]["chunks"]:
-        assert "chunk_text" in data["data"]["chunks"][0]
\ No newline at end of file
+        assert "chunk_text" in data["data"]["chunks"][0]
+
+
+def test_search_ranks_matching_chunk_first(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for name, body in (("Cats.txt", b"purring whiskered felines nap"), ("Rockets.txt", b"liquid oxygen rocket engines")):
+        client.post("/documents/upload", files={"file": (name, body, "text/plain")}, headers=headers)
+    response = client.post("/documents/search_chunks", data={"query": "rocket engines", "top_k": "1"}, headers=headers)
+    assert response.json()["data"]["chunks"][0]["chunk_text"] == "liquid oxygen rocket engines"
+
+def test_chunk_embeddings_only_returned_on_request(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Embed.txt", b"Vectors stay on the server.", "text/plain")}
+    response = client.post("/documents/upload", files=files, headers=headers)
+    doc_id = int(response.json()["data"]["document_id"])
+    response = client.get(f"/documents/{doc_id}/chunks", headers=headers)
+    assert response.json()["data"]["chunks"][0]["embedding"] is None
+    response = client.get(f"/documents/{doc_id}/chunks", params={"include_embeddings": True}, headers=headers)
+    embedding = response.json()["data"]["chunks"][0]["embedding"]
+    assert isinstance(embedding, list) and all(isinstance(x, float) for x in embedding)
+
+
+def test_load_vectors_from_db_rehydrates_store(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Rehydrate.txt", b"Reload me after a restart.", "text/plain")}
+    client.post("/documents/upload", files=files, headers=headers)
+    store = vector_store.InMemoryVectorStore()
+    db = SessionLocal()
+    try:
+        loaded = vector_store.load_vectors_from_db(db, store, embedding_provider.dim, batch_size=2)
+        chunk = db.query(DocumentChunk).order_by(DocumentChunk.id.desc()).first()
+    finally:
+        db.close()
+    assert loaded == len(store) and loaded > 0
+    expected = vector_store.decode_embedding(chunk.embedding)
+    np.testing.assert_allclose(store.get_vector(chunk.id), expected / np.linalg.norm(expected), rtol=1e-5)
+
+
+def test_reembed_stale_chunks_replaces_old_sized_embeddings(auth_token, monkeypatch):
+    monkeypatch.setattr(vector_store, "vector_store", vector_store.InMemoryVectorStore())
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("OldModel.txt", b"Embedded by the old mock model.", "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    db = SessionLocal()
+    try:
+        chunk = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).one()
+        current = vector_store.decode_embedding(chunk.embedding)
+        chunk.embedding = vector_store.encode_embedding(np.ones(8, dtype=np.float32))
+        db.commit()
+        store = vector_store.InMemoryVectorStore()
+        vector_store.load_vectors_from_db(db, store, embedding_provider.dim)
+        assert store.get_vector(chunk.id) is None
+        assert reembed_stale_chunks(batch_size=2) == 1
+        db.refresh(chunk)
+        np.testing.assert_allclose(vector_store.decode_embedding(chunk.embedding), current, rtol=1e-6)
+        assert vector_store.vector_store.get_vector(chunk.id) is not None
+        assert reembed_stale_chunks() == 0
+    finally:
+        db.close()
+
+
+def test_background_upload_runs_as_job(auth_token, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.api.documents.UPLOAD_DIR", str(tmp_path))
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Queued.txt", b"Queued for the worker pool.", "text/plain")}
+    response = client.post("/documents/upload", files=files, data={"background": "true"}, headers=headers)
+    data = response.json()
+    assert data["status_code"] == 202
+    job_id = data["data"]["job_id"]
+    assert client.get(f"/documents/jobs/{job_id}", headers=headers).json()["data"]["status"] == "pending"
+    assert ingestion_jobs.run_pending_jobs() >= 1
+    job = client.get(f"/documents/jobs/{job_id}", headers=headers).json()["data"]
+    assert job["status"] == "completed"
+    assert job["chunks_embedded"] == 1
+    doc = client.get(f"/documents/{job['document_id']}", headers=headers).json()["data"]["document"]
+    assert doc["content"] == "Queued for the worker pool."
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_job_is_retried_then_failed(auth_token, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.api.documents.UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("app.services.ingestion_jobs.INGESTION_MAX_ATTEMPTS", 2)
+    def broken(*args, **kwargs):
+        raise RuntimeError("embedding service down")
+    monkeypatch.setattr("app.services.ingestion_jobs.ingest_document", broken)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Broken.txt", b"never ingested", "text/plain")}
+    job_id = client.post("/documents/upload", files=files, data={"background": "true"}, headers=headers).json()["data"]["job_id"]
+    ingestion_jobs.run_pending_jobs(limit=1)
+    job = client.get(f"/documents/jobs/{job_id}", headers=headers).json()["data"]
+    assert (job["status"], job["attempts"], job["document_id"]) == ("pending", 1, None)
+    # Backing off: the retry is not due yet.
+    assert job["next_attempt_at"] is not None
+    assert ingestion_jobs.run_pending_jobs() == 0
+    db = SessionLocal()
+    try:
+        db.get(IngestionJob, job_id).next_attempt_at = datetime.datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+    ingestion_jobs.run_pending_jobs(limit=1)
+    job = client.get(f"/documents/jobs/{job_id}", headers=headers).json()["data"]
+    assert (job["status"], job["attempts"]) == ("failed", 2)
+    assert "embedding service down" in job["error"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rerun_job_discards_the_unfinished_attempts_document(auth_token, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.api.documents.UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("app.services.ingestion_jobs.HEARTBEAT_INTERVAL", datetime.timedelta(seconds=0.02))
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Requeued.txt", b"Picked up again after a crash.", "text/plain")}
+    job_id = client.post("/documents/upload", files=files, data={"background": "true"}, headers=headers).json()["data"]["job_id"]
+    # The first attempt's worker died after committing a document and a batch of chunks.
+    db = SessionLocal()
+    try:
+        job = db.get(IngestionJob, job_id)
+        partial = Document(name="Requeued.txt", owner_id=job.owner_id, content="")
+        db.add(partial)
+        db.flush()
+        chunk_ids = store_chunks(db, partial, [Chunk(0, "Picked up again", 0, 15, 3)])
+        job.document_id = partial.id
+        db.commit()
+    finally:
+        db.close()
+    assert vector_store.vector_store.get_vector(chunk_ids[0]) is not None
+
+    extract = ingestion_jobs.doc_ingestion.extract_text_file
+    beats = []
+    def slow_extract(*args):
+        db = SessionLocal()
+        try:
+            for _ in range(2):
+                beats.append(db.get(IngestionJob, job_id).updated_at)
+                db.expire_all()
+                time.sleep(0.2)
+        finally:
+            db.close()
+        return extract(*args)
+    monkeypatch.setattr("app.services.ingestion_jobs.doc_ingestion.extract_text_file", slow_extract)
+    assert ingestion_jobs.run_pending_jobs(limit=1) == 1
+    job = client.get(f"/documents/jobs/{job_id}", headers=headers).json()["data"]
+    assert job["status"] == "completed"
+    # The row kept being refreshed while extraction ran.
+    assert beats[1] > beats[0]
+    db = SessionLocal()
+    try:
+        # SQLite may hand the partial document's ids to the new one.
+        assert db.query(Document).filter(Document.name == "Requeued.txt").count() == 1
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == job["document_id"]).all()
+        assert [c.chunk_text for c in chunks] == ["Picked up again after a crash."]
+        assert db.query(DocumentChunk).filter(DocumentChunk.chunk_text == "Picked up again").count() == 0
+    finally:
+        db.close()
+
+
+def test_retry_delay_backs_off_exponentially_with_jitter(monkeypatch):
+    monkeypatch.setattr("app.services.ingestion_jobs.INGESTION_RETRY_BASE_DELAY", 4.0)
+    monkeypatch.setattr("app.services.ingestion_jobs.INGESTION_RETRY_MAX_DELAY", 20.0)
+    for attempts, delay in ((1, 4.0), (2, 8.0), (3, 16.0), (4, 20.0), (9, 20.0)):
+        delays = {ingestion_jobs.retry_delay(attempts) for _ in range(50)}
+        assert all(delay / 2 <= d <= delay for d in delays)
+        assert len(delays) > 1
+
+
+def test_upload_bulk_inserts_chunks_in_order(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    words = " ".join(f"w{i}" for i in range(1200))
+    files = {"file": ("Bulk.txt", words.encode(), "text/plain")}
+    response = client.post("/documents/upload", files=files, headers=headers)
+    assert response.json()["data"]["chunks"] == 3
+    doc_id = int(response.json()["data"]["document_id"])
+    db = SessionLocal()
+    try:
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).order_by(DocumentChunk.id).all()
+    finally:
+        db.close()
+    assert [c.chunk_index for c in chunks] == [0, 1, 2]
+    # 500-token chunks with the default 50-token overlap.
+    assert chunks[1].chunk_text.startswith("w450 ")
+    assert all(words[c.char_start:c.char_end] == c.chunk_text for c in chunks)
+    assert all(vector_store.vector_store.get_vector(c.id) is not None for c in chunks)
+
+
+def test_chunks_are_indexed_only_once_committed(auth_token, monkeypatch):
+    # Fresh indexes: SQLite hands out the ids of rows earlier tests deleted.
+    monkeypatch.setattr(vector_store, "vector_store", vector_store.InMemoryVectorStore())
+    monkeypatch.setattr(keyword_index, "keyword_index", keyword_index.InvertedIndex())
+    db = SessionLocal()
+    try:
+        owner_id = db.query(User.id).filter(User.username == "cruduser").scalar()
+        for commit in (False, True):
+            document = Document(name="Pending.txt", owner_id=owner_id, content="")
+            db.add(document)
+            db.flush()
+            text = "uncommitted quokka sightings"
+            chunk_ids = store_chunks(db, document, [Chunk(0, text, 0, len(text), 3)])
+            assert vector_store.vector_store.get_vector(chunk_ids[0]) is None
+            db.commit() if commit else db.rollback()
+            assert (vector_store.vector_store.get_vector(chunk_ids[0]) is not None) is commit
+            hits = keyword_index.keyword_index.search("quokka", owner_id=owner_id)
+            assert [chunk_id for chunk_id, _ in hits] == (chunk_ids if commit else [])
+    finally:
+        db.close()
+
+
+def test_large_upload_stays_within_memory_budget(auth_token, tmp_path):
+    path = tmp_path / "large.txt"
+    line = ("lorem ipsum dolor sit amet consectetur adipiscing elit " * 16 + "\n").encode()
+    with open(path, "wb") as f:
+        for _ in range(24 * 1024 * 1024 // len(line)):
+            f.write(line)
+    db = SessionLocal()
+    try:
+        owner_id = db.query(User.id).filter(User.username == "cruduser").scalar()
+    finally:
+        db.close()
+    # A fresh process, so its peak RSS is this upload's alone.
+    script = (
+        "import resource, sys\n"
+        "import app.models.user\n"
+        "from app.services import document\n"
+        "base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "_, chunks = document.ingest_file(int(sys.argv[1]), 'large.txt', sys.argv[2], 'text/plain')\n"
+        "print(chunks, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base)\n"
+    )
+    root = pathlib.Path(__file__).resolve().parents[2]
+    env = {**os.environ, "PYTHONPATH": str(root)}
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(owner_id), str(path)],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    chunks, growth_kb = map(int, result.stdout.split())
+    assert chunks > 6000
+    # Chunks stream through in batches; only Document.content holds the
+    # whole text, a few copies of it while it is written.
+    assert growth_kb * 1024 < 3 * path.stat().st_size + 16 * 1024 * 1024
+
+
+def test_duplicate_upload_returns_existing_document(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Same.txt", b"identical bytes uploaded twice", "text/plain")}
+    first = client.post("/documents/upload", files=files, headers=headers).json()["data"]
+    files = {"file": ("Renamed.txt", b"identical bytes uploaded twice", "text/plain")}
+    response = client.post("/documents/upload", files=files, headers=headers).json()
+    assert response["message"] == "Document already uploaded"
+    assert response["data"]["document_id"] == first["document_id"]
+    assert response["data"]["chunks"] == first["chunks"] == 1
+    queued = client.post("/documents/upload", files=files, data={"background": "true"}, headers=headers).json()
+    assert queued["data"]["job_id"] is None
+    assert queued["data"]["document_id"] == first["document_id"]
+    assert len(client.get("/documents/", headers=headers).json()["data"]) == 1
+
+
+def test_embedding_cache_metrics(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    before = client.get("/metrics/embedding_cache", headers=headers).json()["data"]
+    for name in ("A.txt", "B.txt"):
+        files = {"file": (name, f"repeated chunk text {name}".encode(), "text/plain")}
+        client.post("/documents/upload", files=files, headers=headers)
+        # Queries have a cache of their own and do not count here.
+        client.post("/documents/search_chunks", data={"query": "repeated chunk text"}, headers=headers)
+    after = client.get("/metrics/embedding_cache", headers=headers).json()["data"]
+    assert after["misses"] - before["misses"] == 2
+    assert after["memory_hits"] - before["memory_hits"] == 0
+
+
+def test_db_pool_metrics(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    data = client.get("/metrics/db_pool", headers=headers).json()["data"]
+    pools = {pool["engine"]: pool for pool in data}
+    assert set(pools) == {"sync", "async"}
+    assert pools["async"]["checkouts"] >= 1
+    assert pools["async"]["pre_ping"] is True
+
+
+def test_list_documents_keyset_pagination(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for i in range(5):
+        files = {"file": (f"Page{i}.txt", f"page document {i}".encode(), "text/plain")}
+        client.post("/documents/upload", files=files, headers=headers)
+    names, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        page = client.get("/documents/", params=params, headers=headers).json()
+        assert len(page["data"]) <= 2
+        assert all(doc["content"] is None for doc in page["data"])
+        names += [doc["name"] for doc in page["data"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [f"Page{i}.txt" for i in range(5)]
+
+
+def test_list_documents_include_content(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Fields.txt", b"listed with content", "text/plain")}
+    client.post("/documents/upload", files=files, headers=headers)
+    docs = client.get("/documents/", headers=headers).json()["data"]
+    assert docs[0]["name"] == "Fields.txt" and docs[0]["content"] is None
+    docs = client.get("/documents/", params={"include_content": True}, headers=headers).json()["data"]
+    assert docs[0]["content"] == "listed with content"
+
+
+def test_chunk_pages_by_chunk_index(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    words = " ".join(f"w{i}" for i in range(2000))
+    files = {"file": ("Paged.txt", words.encode(), "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    indexes, offset_index = [], 0
+    while offset_index is not None:
+        params = {"offset_index": offset_index, "limit": 2, "include_content": False}
+        page = client.get(f"/documents/{doc_id}/chunks", params=params, headers=headers).json()
+        assert page["data"]["document"]["content"] is None
+        indexes += [chunk["chunk_index"] for chunk in page["data"]["chunks"]]
+        offset_index = page["next_offset_index"]
+    assert indexes == [0, 1, 2, 3, 4]
+    page = client.get(f"/documents/{doc_id}/chunks", params={"limit": 1}, headers=headers).json()
+    assert page["data"]["document"]["content"] == words
+    page = client.get(f"/documents/{doc_id}", params={"offset_index": 3, "limit": 1}, headers=headers).json()
+    assert [c["chunk_index"] for c in page["data"]["chunks"]] == [3]
+    assert page["data"]["chunks"][0]["chunk_text"].startswith("w1350 ")
+    assert page["data"]["document"]["content"] == words
+    page = client.get(f"/documents/{doc_id}", params={"include_content": False}, headers=headers).json()
+    assert page["data"]["document"]["content"] is None
+
+
+def test_keyword_search_ranks_owned_chunks(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Fox.txt", b"The quick brown fox jumps over the lazy dog.", "text/plain")}
+    fox_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    files = {"file": ("Cat.txt", b"A lazy cat sleeps all day.", "text/plain")}
+    client.post("/documents/upload", files=files, headers=headers)
+    # Another user's matching chunk is never returned.
+    delete_test_user("otherkeyword")
+    client.post("/users/", data={"username": "otherkeyword", "password": "otherpass"})
+    other = client.post("/users/token", data={"username": "otherkeyword", "password": "otherpass"}).json()["access_token"]
+    files = {"file": ("OtherFox.txt", b"fox fox fox fox", "text/plain")}
+    client.post("/documents/upload", files=files, headers={"Authorization": f"Bearer {other}"})
+    try:
+        response = client.post("/documents/search_keywords", data={"query": "lazy fox"}, headers=headers).json()
+        chunks = response["data"]["chunks"]
+        assert [chunk["document_id"] for chunk in chunks][0] == fox_id
+        assert len(chunks) == 2
+        assert chunks[0]["score"] > chunks[1]["score"] > 0
+        client.delete(f"/documents/{fox_id}", headers=headers)
+        response = client.post("/documents/search_keywords", data={"query": "fox"}, headers=headers).json()
+        assert response["data"]["chunks"] == []
+        for path, data in (
+            ("/documents/search_keywords", {"query": "fox"}),
+            ("/documents/search_chunks", {"query": "fox"}),
+            ("/documents/search_chunks/batch", {"queries": ["fox"]}),
+        ):
+            assert client.post(path, data={**data, "top_k": 0}, headers=headers).status_code == 422
+    finally:
+        delete_test_user("otherkeyword")
+
+
+def test_hybrid_search_fuses_vector_and_keyword_scores(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Hybrid.txt", b"Reciprocal rank fusion merges ranked lists.", "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    data = {"query": "reciprocal rank fusion", "mode": "hybrid", "top_k": 3}
+    response = client.post("/documents/search_chunks", data=data, headers=headers).json()
+    top = response["data"]["chunks"][0]
+    assert top["document_id"] == doc_id
+    assert top["vector_score"] is not None and top["keyword_score"] > 0
+    assert top["score"] == pytest.approx(0.5 / 61 + 0.5 / 61)
+    data.update(fusion="weighted", vector_weight=0.0)
+    chunks = client.post("/documents/search_chunks", data=data, headers=headers).json()["data"]["chunks"]
+    assert chunks[0]["document_id"] == doc_id and chunks[0]["score"] == pytest.approx(1.0)
+    for bad in ({"mode": "sparse"}, {"fusion": "max"}, {"vector_weight": 2}):
+        response = client.post("/documents/search_chunks", data={**data, **bad}, headers=headers).json()
+        assert response["status_code"] == 400
+
+
+def test_vector_search_is_scoped_to_owner_and_documents(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ids = []
+    for name in ("ScopeA.txt", "ScopeB.txt"):
+        files = {"file": (name, b"Partitioned vector search keeps tenants apart.", "text/plain")}
+        ids.append(int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"]))
+    delete_test_user("otherscope")
+    client.post("/users/", data={"username": "otherscope", "password": "otherpass"})
+    other = client.post("/users/token", data={"username": "otherscope", "password": "otherpass"}).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {other}"}
+    files = {"file": ("Theirs.txt", b"Partitioned vector search keeps tenants apart.", "text/plain")}
+    other_id = int(client.post("/documents/upload", files=files, headers=other_headers).json()["data"]["document_id"])
+    try:
+        data = {"query": "partitioned vector search", "top_k": 50}
+        chunks = client.post("/documents/search_chunks", data=data, headers=headers).json()["data"]["chunks"]
+        assert {ids[0], ids[1]} <= {chunk["document_id"] for chunk in chunks}
+        assert other_id not in {chunk["document_id"] for chunk in chunks}
+        for mode in ("vector", "hybrid"):
+            data = {"query": "partitioned vector search", "mode": mode, "document_ids": f"{ids[1]},{other_id}"}
+            chunks = client.post("/documents/search_chunks", data=data, headers=headers).json()["data"]["chunks"]
+            assert [chunk["document_id"] for chunk in chunks] == [ids[1]]
+        data = {"query": "tenants", "document_ids": str(ids[0])}
+        chunks = client.post("/documents/search_keywords", data=data, headers=headers).json()["data"]["chunks"]
+        assert [chunk["document_id"] for chunk in chunks] == [ids[0]]
+        data = {"query": "tenants", "document_ids": "1,x"}
+        assert client.post("/documents/search_chunks", data=data, headers=headers).json()["status_code"] == 400
+    finally:
+        delete_test_user("otherscope")
+
+
+def test_batch_search_returns_results_per_query(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Batch.txt", b"Batched queries share one embedding call.", "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    queries = ["batched queries", "embedding call", "batched queries"]
+    data = {"queries": queries, "top_k": 3, "document_ids": str(doc_id)}
+    response = client.post("/documents/search_chunks/batch", data=data, headers=headers).json()
+    assert response["status"] is True
+    assert [result["query"] for result in response["data"]] == queries
+    single = client.post("/documents/search_chunks", data={"query": "embedding call", "top_k": 3,
+                         "document_ids": str(doc_id)}, headers=headers).json()["data"]["chunks"]
+    batch = response["data"][1]["chunks"]
+    assert [chunk["id"] for chunk in batch] == [chunk["id"] for chunk in single]
+    assert [chunk["score"] for chunk in batch] == pytest.approx([chunk["score"] for chunk in single])
+    assert response["data"][0]["chunks"][0]["document_id"] == doc_id
+    data = {"queries": ["q"] * 101}
+    assert client.post("/documents/search_chunks/batch", data=data, headers=headers).json()["status_code"] == 400
+
+
+def test_update_content_reembeds_only_changed_chunks(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    sentences = [f"Sentence {i} talks about topic {i} at some length." for i in range(400)]
+    old = " ".join(sentences).encode()
+    files = {"file": ("Long.txt", old, "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    db = SessionLocal()
+    try:
+        before = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).order_by(DocumentChunk.chunk_index).all()
+        before_ids = [c.id for c in before]
+    finally:
+        db.close()
+
+    sentences[200] = "An inserted passage mentions zebras " + "and more zebras " * 60 + "at the end."
+    new = " ".join(sentences)
+    files = {"file": ("Long.txt", new.encode(), "text/plain")}
+    response = client.put(f"/documents/{doc_id}/content", files=files, headers=headers).json()
+    assert response["status"] is True
+    result = response["data"]
+    assert result["added"] >= 1 and result["removed"] >= 1
+    assert result["unchanged"] >= len(before) - 3
+    assert result["chunks"] == result["unchanged"] + result["added"]
+
+    db = SessionLocal()
+    try:
+        active = (
+            db.query(DocumentChunk)
+            .filter(DocumentChunk.document_id == doc_id, DocumentChunk.status == "active")
+            .order_by(DocumentChunk.chunk_index)
+            .all()
+        )
+        removed = db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id, DocumentChunk.status == "removed").all()
+        content = db.get(Document, doc_id).content
+    finally:
+        db.close()
+    assert content == new
+    assert [c.chunk_index for c in active] == list(range(result["chunks"]))
+    assert all(new[c.char_start:c.char_end] == c.chunk_text for c in active)
+    # The untouched head and tail keep their rows.
+    assert [c.id for c in active[:2]] == before_ids[:2]
+    assert active[-1].id == before_ids[-1]
+    assert len(removed) == result["removed"]
+    assert all(vector_store.vector_store.get_vector(c.id) is None for c in removed)
+    assert all(vector_store.vector_store.get_vector(c.id) is not None for c in active)
+    chunks = client.get(f"/documents/{doc_id}/chunks", params={"limit": 100}, headers=headers).json()["data"]["chunks"]
+    assert [c["id"] for c in chunks] == [c.id for c in active]
+
+    again = client.put(f"/documents/{doc_id}/content", files=files, headers=headers).json()["data"]
+    assert (again["added"], again["removed"], again["unchanged"]) == (0, 0, result["chunks"])
+    missing = client.put("/documents/999999/content", files=files, headers=headers).json()
+    assert missing["status_code"] == 404
+
+
+@pytest.mark.parametrize("overlap", [5, 6])
+def test_reingest_with_high_overlap_keeps_chunks_in_order(auth_token, overlap):
+    db = SessionLocal()
+    try:
+        owner_id = db.query(User.id).filter(User.username == "cruduser").scalar()
+        for seed in range(50):
+            rng = random.Random(seed)
+            words = [f"w{i}" + ("." if rng.random() < 0.2 else "") for i in range(120)]
+            document = Document(name="Overlap.txt", owner_id=owner_id, content="")
+            db.add(document)
+            db.flush()
+            ingest_document(db, document, [" ".join(words)], max_tokens=7, overlap=overlap, boundary="sentence")
+            db.commit()
+            edit = rng.randrange(10, 100)
+            words[edit:edit + rng.randrange(5)] = [f"new{k}" for k in range(rng.randrange(5))]
+            text = " ".join(words)
+            reingest_document(db, document, text, max_tokens=7, overlap=overlap, boundary="sentence")
+            active = (
+                db.query(DocumentChunk)
+                .filter(DocumentChunk.document_id == document.id, DocumentChunk.status == "active")
+                .order_by(DocumentChunk.chunk_index)
+                .all()
+            )
+            starts = [c.char_start for c in active]
+            assert all(a < b for a, b in zip(starts, starts[1:])), (seed, starts)
+            assert all(text[c.char_start:c.char_end] == c.chunk_text for c in active)
+            assert active[0].char_start == 0 and active[-1].char_end == len(text)
+    finally:
+        db.close()
+
+
+def test_bulk_upload_files_and_zip_archive(auth_token):
+    import io
+    import zipfile
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("reports/alpha.txt", "Alpha report about quarterly bulk ingestion.")
+        zf.writestr("reports/copy.txt", "First plain file.")
+        zf.writestr("notes.md", "# not a supported type")
+    files = [
+        ("files", ("first.txt", b"First plain file.", "text/plain")),
+        ("files", ("second.txt", b"Second plain file. " * 300, "text/plain")),
+        ("files", ("bundle.zip", archive.getvalue(), "application/zip")),
+        ("files", ("broken.zip", b"not a zip", "application/zip")),
+    ]
+    response = client.post("/documents/upload/bulk", files=files, headers=headers).json()
+    assert response["status"] is True
+    results = {result["name"]: result for result in response["data"]}
+    assert list(results) == [
+        "first.txt", "second.txt", "bundle.zip/reports/alpha.txt", "bundle.zip/reports/copy.txt",
+        "bundle.zip/notes.md", "broken.zip",
+    ]
+    assert [r["status"] for r in results.values()] == ["created", "created", "created", "duplicate", "failed", "failed"]
+    assert results["bundle.zip/reports/copy.txt"]["document_id"] == results["first.txt"]["document_id"]
+    assert results["second.txt"]["chunks"] == 2
+
+    db = SessionLocal()
+    try:
+        alpha = db.get(Document, results["bundle.zip/reports/alpha.txt"]["document_id"])
+        assert alpha.content == "Alpha report about quarterly bulk ingestion."
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.document_id == results["second.txt"]["document_id"]).all()
+        assert sorted(c.chunk_index for c in chunks) == [0, 1]
+        assert all(vector_store.vector_store.get_vector(c.id) is not None for c in chunks)
+    finally:
+        db.close()
+    hits = client.post("/documents/search_chunks", data={"query": "quarterly bulk ingestion", "top_k": 1},
+                       headers=headers).json()["data"]["chunks"]
+    assert hits[0]["document_id"] == alpha.id
+    again = client.post("/documents/upload/bulk", files=files[:1], headers=headers).json()["data"]
+    assert again[0]["status"] == "duplicate"
+
+
+def test_export_streams_documents_and_chunks_as_ndjson(auth_token):
+    import base64
+    import json
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    ids = []
+    for name, text in (("one.txt", b"First exported file."), ("two.txt", b"Second exported file. " * 200)):
+        files = {"file": (name, text, "text/plain")}
+        ids.append(int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"]))
+
+    response = client.get("/documents/export", params={"include_embeddings": "true"}, headers=headers)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "export" and lines[0]["embedding_encoding"] == "base64-f32le"
+    documents = [line for line in lines if line["type"] == "document"]
+    chunks = [line for line in lines if line["type"] == "chunk"]
+    assert [d["id"] for d in documents] == ids
+    assert documents[0]["content"] == "First exported file."
+    assert [(c["document_id"], c["chunk_index"]) for c in chunks] == [(ids[0], 0), (ids[1], 0), (ids[1], 1)]
+    embedding = np.frombuffer(base64.b64decode(chunks[0]["embedding"]), dtype="<f4")
+    np.testing.assert_allclose(embedding, vector_store.vector_store.get_vector(chunks[0]["id"]), rtol=1e-6)
+
+    params = {"include_content": "false", "include_chunks": "false"}
+    response = client.get("/documents/export", params=params, headers=headers)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["export", "document", "document"]
+    assert "content" not in lines[1] and "embedding" not in lines[1]
+
+
+def test_delete_document_evicts_its_vectors(auth_token):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Evicted.txt", b"Walruses migrate along the coast. " * 300, "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    db = SessionLocal()
+    try:
+        chunk_ids = [c.id for c in db.query(DocumentChunk.id).filter(DocumentChunk.document_id == doc_id)]
+    finally:
+        db.close()
+    assert len(chunk_ids) > 1
+    assert client.delete(f"/documents/{doc_id}", headers=headers).json()["status"] is True
+    assert all(vector_store.vector_store.get_vector(chunk_id) is None for chunk_id in chunk_ids)
+    hits = client.post("/documents/search_chunks", data={"query": "walruses migrate", "top_k": 5},
+                       headers=headers).json()["data"]["chunks"]
+    assert not set(chunk_ids) & {hit["id"] for hit in hits}
+    db = SessionLocal()
+    try:
+        assert db.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).count() == 0
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("sync_max_chunks, status_code", [(10000, 200), (0, 202)])
+def test_delete_user_purges_documents(auth_token, monkeypatch, sync_max_chunks, status_code):
+    monkeypatch.setattr("app.api.users.USER_DELETE_SYNC_MAX_CHUNKS", sync_max_chunks)
+    monkeypatch.setattr("app.services.deletion.USER_DELETE_BATCH_SIZE", 1)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    user_id = client.get("/users/me", headers=headers).json()["data"]["id"]
+    for name in ("a.txt", "b.txt"):
+        files = {"file": (name, f"Purged file {name}. ".encode() * 200, "text/plain")}
+        client.post("/documents/upload", files=files, headers=headers)
+    db = SessionLocal()
+    try:
+        chunk_ids = [
+            c.id for c in db.query(DocumentChunk.id).join(Document).filter(Document.owner_id == user_id)
+        ]
+    finally:
+        db.close()
+    assert len(chunk_ids) == 4
+
+    # The background task runs before TestClient returns.
+    response = client.delete(f"/users/{user_id}").json()
+    assert (response["status"], response["status_code"]) == (True, status_code)
+    assert client.get("/users/me", headers=headers).status_code == 401
+    assert client.get(f"/users/{user_id}").json()["status_code"] == 404
+    db = SessionLocal()
+    try:
+        assert db.get(User, user_id) is None
+        assert db.query(Document).filter(Document.owner_id == user_id).count() == 0
+        assert db.query(DocumentChunk).filter(DocumentChunk.id.in_(chunk_ids)).count() == 0
+    finally:
+        db.close()
+    assert all(vector_store.vector_store.get_vector(chunk_id) is None for chunk_id in chunk_ids)
+
+
+def test_interrupted_user_purge_is_resumed(auth_token):
+    import datetime
+
+    from app.services import deletion
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    files = {"file": ("Left.txt", b"Left behind by a crash.", "text/plain")}
+    doc_id = int(client.post("/documents/upload", files=files, headers=headers).json()["data"]["document_id"])
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == "cruduser").one()
+        user.deleted_at = datetime.datetime.utcnow()
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+    assert client.post("/users/token", data={"username": "cruduser", "password": "crudpass"}).status_code == 400
+    assert deletion.purge_deleted_users() == 1
+    db = SessionLocal()
+    try:
+        assert db.get(User, user_id) is None and db.get(Document, doc_id) is None
+    finally:
+        db.close()
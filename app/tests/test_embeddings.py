@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from app.services.embeddings import EmbeddingProvider, HashEmbeddingProvider
+
+
+def test_hash_embeddings_are_deterministic_and_normalized():
+    provider = HashEmbeddingProvider(64)
+    matrix = provider.embed_many(["Hello world", "hello, WORLD!", "something else", ""])
+    assert matrix.shape == (4, 64) and matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix[0], matrix[1])
+    np.testing.assert_allclose(np.linalg.norm(matrix[:3], axis=1), 1.0, rtol=1e-6)
+    assert not matrix[3].any()
+    np.testing.assert_allclose(HashEmbeddingProvider(64).embed("Hello world"), matrix[0])
+
+def test_hash_embeddings_reflect_shared_words():
+    provider = HashEmbeddingProvider(256)
+    query, near, far = provider.embed_many(["vector search", "fast vector search engine", "banana bread recipe"])
+    assert query @ near > query @ far
+
+def test_batching_and_concurrency_do_not_change_results():
+    texts = [f"document {i} about topic {i % 7}" for i in range(50)]
+    expected = HashEmbeddingProvider(32).embed_many(texts)
+    np.testing.assert_allclose(HashEmbeddingProvider(32, batch_size=7, concurrency=4).embed_many(texts), expected)
+
+def test_embed_many_splits_into_batches():
+    class Recording(EmbeddingProvider):
+        def __init__(self):
+            super().__init__(dim=2, batch_size=3)
+            self.calls = []
+        def _embed_batch(self, texts):
+            self.calls.append(len(texts))
+            return np.ones((len(texts), 2))
+    provider = Recording()
+    assert provider.embed_many(["a"] * 7).shape == (7, 2)
+    assert provider.calls == [3, 3, 1]
+    assert provider.embed_many([]).shape == (0, 2)
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        HashEmbeddingProvider(8, batch_size=0)
+
+def test_embedding_cache_layers(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models.embedding_cache import EmbeddingCacheEntry
+    from app.services.embeddings import EmbeddingCache
+
+    engine = create_engine(f"sqlite:///{tmp_path}/cache.db")
+    EmbeddingCacheEntry.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    provider = HashEmbeddingProvider(32)
+    cache = EmbeddingCache(provider, max_entries=2)
+    texts = ["alpha", "beta", "alpha", "gamma"]
+    np.testing.assert_allclose(cache.embed_many(texts, db=db), provider.embed_many(texts))
+    assert (cache.stats()["misses"], cache.stats()["entries"]) == (4, 2)
+    db.commit()
+    # "alpha" was evicted from the LRU but is still in the table.
+    cache.embed_many(["alpha", "gamma"], db=db)
+    stats = cache.stats()
+    assert (stats["db_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 4)
+    assert db.query(EmbeddingCacheEntry).count() == 3
+    db.close()
+
+def test_embedding_cache_prune_keeps_referenced_and_recent_rows(tmp_path):
+    import datetime
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models.embedding_cache import EmbeddingCacheEntry
+    from app.services.embeddings import EmbeddingCache
+
+    engine = create_engine(f"sqlite:///{tmp_path}/cache.db")
+    EmbeddingCacheEntry.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    cache = EmbeddingCache(HashEmbeddingProvider(32))
+    other = EmbeddingCache(HashEmbeddingProvider(16))
+    cache.embed_many(["kept", "orphaned"], db=db)
+    other.embed_many(["kept"], db=db)  # a previous model's row
+    db.commit()
+    started = datetime.datetime.utcnow()
+    cache.embed_many(["written during the pass"], db=db)
+    db.commit()
+    assert cache.prune(db, iter(["kept"]), before=started) == 2
+    db.commit()
+    remaining = {row.text_hash for row in db.query(EmbeddingCacheEntry)}
+    assert remaining == {cache.key("kept"), cache.key("written during the pass")}
+    assert cache.prune(db, [], before=started) == 1
+    db.close()
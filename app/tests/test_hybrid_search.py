@@ -0,0 +1,38 @@
+import pytest
+from app.services.hybrid_search import fuse
+
+
+def test_rrf_rewards_agreement_and_ignores_score_scale():
+    vector = [(1, 0.91), (2, 0.90), (4, 0.50), (3, 0.10)]
+    keyword = [(3, 42.0), (2, 17.0)]
+    hits = fuse(vector, keyword, method="rrf", rrf_k=60)
+    assert [hit.chunk_id for hit in hits] == [2, 3, 1, 4]
+    assert hits[0].score == pytest.approx(0.5 / 62 + 0.5 / 62)
+    assert (hits[0].vector_score, hits[0].keyword_score) == (0.90, 17.0)
+    assert (hits[2].vector_score, hits[2].keyword_score) == (0.91, None)
+
+
+def test_weighted_fusion_normalises_each_list():
+    vector = [(1, 0.9), (2, 0.5), (3, 0.1)]
+    keyword = [(3, 10.0), (1, 5.0), (4, 0.0)]
+    hits = fuse(vector, keyword, method="weighted", vector_weight=0.25)
+    scores = {hit.chunk_id: hit.score for hit in hits}
+    assert scores[1] == pytest.approx(0.25 * 1.0 + 0.75 * 0.5)
+    assert scores[3] == pytest.approx(0.75 * 1.0)
+    assert scores[2] == pytest.approx(0.25 * 0.5)
+    assert scores[4] == 0.0
+    assert [hit.chunk_id for hit in hits] == [3, 1, 2, 4]
+
+
+def test_weight_extremes_reduce_to_one_retriever_and_top_k_cuts():
+    vector = [(1, 0.9), (2, 0.8)]
+    keyword = [(2, 3.0), (3, 2.0)]
+    assert [hit.chunk_id for hit in fuse(vector, keyword, vector_weight=1.0)][:2] == [1, 2]
+    assert [hit.chunk_id for hit in fuse(vector, keyword, vector_weight=0.0)][:2] == [2, 3]
+    assert len(fuse(vector, keyword, top_k=2)) == 2
+    assert fuse([], []) == []
+
+
+def test_unknown_fusion_method():
+    with pytest.raises(ValueError):
+        fuse([(1, 1.0)], [], method="max")
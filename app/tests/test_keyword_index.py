@@ -0,0 +1,83 @@
+import math
+import random
+
+import pytest
+from app.services.keyword_index import InvertedIndex, tokenize
+
+
+def brute_force_bm25(docs, query, k1=1.2, b=0.75):
+    """Reference BM25 over ``{chunk_id: text}``."""
+    tokens = {chunk_id: tokenize(text) for chunk_id, text in docs.items()}
+    avg_length = sum(len(t) for t in tokens.values()) / len(tokens)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(1 for t in tokens.values() if term in t)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for chunk_id, t in tokens.items():
+            tf = t.count(term)
+            if tf:
+                norm = k1 * (1 - b + b * len(t) / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Vector-Search, BM25 & posting_lists!") == ["vector", "search", "bm25", "posting_lists"]
+
+
+def test_search_ranks_by_bm25():
+    index = InvertedIndex()
+    index.add([1, 2, 3], ["the cat sat", "the dog sat on the dog mat", "a cat and a dog"], owner_ids=7)
+    results = index.search("dog", top_k=5)
+    assert [chunk_id for chunk_id, _ in results] == [2, 3]
+    assert index.search("giraffe") == []
+    assert index.search("") == []
+    assert index.search("dog", top_k=0) == []
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(0)
+    words = "alpha beta gamma delta epsilon zeta eta theta iota kappa".split()
+    docs = {i: " ".join(rng.choice(words) for _ in range(rng.randint(3, 40))) for i in range(1, 301)}
+    index = InvertedIndex()
+    index.add(list(docs), list(docs.values()), owner_ids=1)
+    for query in ("alpha", "beta gamma", "kappa iota alpha"):
+        expected = brute_force_bm25(docs, query)[:10]
+        results = index.search(query, top_k=10)
+        assert [chunk_id for chunk_id, _ in results] == [chunk_id for chunk_id, _ in expected]
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_search_filters_by_owner():
+    index = InvertedIndex()
+    index.add([1, 2], ["shared term", "shared term twice term"], owner_ids=[10, 20])
+    assert [chunk_id for chunk_id, _ in index.search("term", owner_id=10)] == [1]
+    assert [chunk_id for chunk_id, _ in index.search("term", owner_id=20)] == [2]
+    assert index.search("term", owner_id=30) == []
+
+
+def test_search_filters_by_document():
+    index = InvertedIndex(compaction_ratio=0.1)
+    index.add([1, 2, 3], ["term one", "term two", "term three"], owner_ids=10, document_ids=[100, 101, 102])
+    results = index.search("term", owner_id=10, document_ids=[100, 102])
+    assert sorted(chunk_id for chunk_id, _ in results) == [1, 3]
+    index.remove([1])  # compacts; document ids move with their rows
+    assert [chunk_id for chunk_id, _ in index.search("term", document_ids=[102])] == [3]
+
+
+def test_remove_and_compact():
+    index = InvertedIndex(compaction_ratio=0.5)
+    index.add(list(range(10)), [f"common word{i}" for i in range(10)], owner_ids=1)
+    assert index.remove([0, 1, 2, 99]) == 3
+    assert len(index) == 7
+    assert {chunk_id for chunk_id, _ in index.search("common", top_k=20)} == set(range(3, 10))
+    assert index.search("word1") == []
+    index.remove([3, 4, 5])  # past the ratio: postings are rewritten
+    assert index._deleted == 0
+    assert {chunk_id for chunk_id, _ in index.search("common", top_k=20)} == {6, 7, 8, 9}
+    assert [chunk_id for chunk_id, _ in index.search("word8")] == [8]
+    index.add([8], ["replaced text"], owner_ids=1)
+    assert index.search("word8") == []
+    assert [chunk_id for chunk_id, _ in index.search("replaced")] == [8]
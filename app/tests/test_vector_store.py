@@ -0,0 +1,205 @@
+import numpy as np
+import pytest
+from app.services.vector_store import InMemoryVectorStore, IVFVectorStore
+
+
+def test_search_returns_nearest_by_cosine():
+    store = InMemoryVectorStore()
+    store.add_vector(1, [1.0, 0.0, 0.0])
+    store.add_vector(2, [0.0, 1.0, 0.0])
+    store.add_vector(3, [0.7, 0.7, 0.0])
+    assert store.search([0.0, 2.0, 0.1], top_k=2) == [2, 3]
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    store = InMemoryVectorStore(initial_capacity=4)
+    store.add_vectors(list(range(100, 600)), vectors)
+    query = rng.standard_normal(16)
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = list(np.argsort(-(normed @ query))[:10] + 100)
+    assert store.search(query, top_k=10) == expected
+    assert len(store) == 500
+
+def test_dot_metric_uses_raw_vectors():
+    store = InMemoryVectorStore(metric="dot")
+    store.add_vector(1, [1.0, 0.0])
+    store.add_vector(2, [5.0, 1.0])
+    results = store.search_with_scores([1.0, 0.0], top_k=5)
+    assert [chunk_id for chunk_id, _ in results] == [2, 1]
+    assert results[0][1] == pytest.approx(5.0)
+
+def test_add_vector_overwrites_existing_id():
+    store = InMemoryVectorStore()
+    store.add_vector(1, [1.0, 0.0])
+    store.add_vector(1, [0.0, 1.0])
+    assert len(store) == 1
+    np.testing.assert_allclose(store.get_vector(1), [0.0, 1.0])
+
+def test_search_empty_store_and_dimension_mismatch():
+    store = InMemoryVectorStore()
+    assert store.search([1.0, 0.0]) == []
+    assert store.get_vector(42) is None
+    store.add_vector(1, [1.0, 0.0])
+    with pytest.raises(ValueError):
+        store.add_vector(2, [1.0, 0.0, 0.0])
+
+def test_remove_vector_tombstones_and_compacts():
+    store = InMemoryVectorStore(compaction_ratio=0.5)
+    for chunk_id in range(1, 5):
+        store.add_vector(chunk_id, [float(chunk_id), 1.0])
+    assert store.remove_vector(4) is True
+    assert store.remove_vector(4) is False
+    assert 4 not in store.search([1.0, 0.0], top_k=10)
+    assert len(store) == 3
+    store.remove_vector(3)
+    store.remove_vector(2)  # crosses the ratio and triggers compaction
+    assert store.search([1.0, 0.0], top_k=10) == [1]
+    assert store._size == 1
+    store.add_vector(5, [1.0, 0.0])
+    assert store.search([1.0, 0.0], top_k=10) == [5, 1]
+
+def test_remove_vectors_compacts_once(monkeypatch):
+    store = InMemoryVectorStore(compaction_ratio=0.1)
+    store.add_vectors(list(range(100)), np.eye(100, dtype=np.float32), owner_ids=1, document_ids=10)
+    compactions = []
+    compact = store.compact
+    monkeypatch.setattr(store, "compact", lambda: compactions.append(1) or compact())
+    assert store.remove_vectors(list(range(0, 100, 2)) + [0, 1000]) == 50
+    assert len(compactions) == 1 and store._size == 50
+    assert store.remove_vectors([]) == 0
+    assert sorted(store.search(np.ones(100), top_k=100, document_ids=[10])) == list(range(1, 100, 2))
+
+
+def _clustered(n, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)) * 4
+    labels = rng.integers(0, clusters, n)
+    return (centers[labels] + rng.standard_normal((n, dim))).astype(np.float32)
+
+def test_ivf_trains_and_finds_neighbours():
+    vectors = _clustered(2000, 8, 16)
+    store = IVFVectorStore(n_lists=16, nprobe=4, train_size=1000)
+    store.add_vectors(list(range(1000)), vectors[:1000])
+    assert store.is_trained
+    store.add_vectors(list(range(1000, 2000)), vectors[1000:])
+    exact = InMemoryVectorStore()
+    exact.add_vectors(list(range(2000)), vectors)
+    hits = 0
+    for query in vectors[:50]:
+        hits += len(set(store.search(query, top_k=10)) & set(exact.search(query, top_k=10)))
+    assert hits / 500 > 0.9
+    # Probing every list is exact.
+    assert store.search(vectors[7], top_k=10, nprobe=16) == exact.search(vectors[7], top_k=10)
+
+def test_ivf_remove_and_compact():
+    vectors = _clustered(400, 8, 4)
+    store = IVFVectorStore(n_lists=4, nprobe=4, train_size=100)
+    store.add_vectors(list(range(400)), vectors)
+    for chunk_id in range(0, 400, 2):
+        store.remove_vector(chunk_id)
+    results = store.search(vectors[1], top_k=400)
+    assert len(results) == 200
+    assert all(chunk_id % 2 == 1 for chunk_id in results)
+    assert results[0] == 1
+
+def test_ivf_readding_moves_rows_between_lists_without_duplicates():
+    store = IVFVectorStore(n_lists=2, nprobe=2, train_size=4)
+    store.add_vectors([1, 2, 3, 4], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.1, 0.9]])
+    store.add_vector(1, [0.0, 1.0])
+    store.add_vector(1, [1.0, 0.0])  # back to its first list
+    assert store.search([1.0, 0.0], top_k=4) == [1, 2, 4, 3]
+    assert [chunk_id for chunk_id, _ in store.search_many_with_scores([[1.0, 0.0]], top_k=4)[0]] == [1, 2, 4, 3]
+
+    vectors = _clustered(600, 8, 8, seed=3)
+    rng = np.random.default_rng(3)
+    store = IVFVectorStore(n_lists=8, nprobe=8, train_size=300)
+    exact = InMemoryVectorStore()
+    for target in (store, exact):
+        target.add_vectors(list(range(600)), vectors)
+    for _ in range(5):
+        moved = rng.choice(600, 200, replace=False)
+        replacement = vectors[rng.permutation(600)[:200]]
+        for target in (store, exact):
+            target.update_vectors([], moved.tolist(), replacement)
+    query = rng.standard_normal(8)
+    # Probing every list is exact, so any stale posting would show up here.
+    # Replacements copy other rows, so tied ids may come back in either order.
+    hits = store.search_with_scores(query, top_k=600)
+    expected = exact.search_with_scores(query, top_k=600)
+    assert sorted(chunk_id for chunk_id, _ in hits) == list(range(600))
+    assert [score for _, score in hits] == pytest.approx([score for _, score in expected], rel=1e-5)
+    batch = store.search_many_with_scores([query], top_k=600)[0]
+    assert sorted(chunk_id for chunk_id, _ in batch) == list(range(600))
+
+def test_owner_and_document_filters_search_inside_the_index():
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((300, 8)).astype(np.float32)
+    owners = np.arange(300) % 3
+    documents = np.arange(300) // 10
+    store = InMemoryVectorStore(initial_capacity=4)
+    store.add_vectors(list(range(300)), vectors, owner_ids=owners, document_ids=documents)
+    exact = InMemoryVectorStore()
+    query = rng.standard_normal(8)
+    for chunk_id in np.flatnonzero(owners == 1):
+        exact.add_vector(int(chunk_id), vectors[chunk_id])
+    assert store.search(query, top_k=10, owner_id=1) == exact.search(query, top_k=10)
+    results = store.search(query, top_k=300, owner_id=1, document_ids=[4, 5])
+    assert sorted(results) == [chunk_id for chunk_id in range(40, 60) if chunk_id % 3 == 1]
+    assert store.search(query, owner_id=99) == []
+    assert store.search(query, document_ids=[]) == []
+
+def test_filters_follow_reassignment_removal_and_compaction():
+    store = InMemoryVectorStore(compaction_ratio=0.5)
+    store.add_vectors([1, 2, 3], [[1.0, 0.0], [0.9, 0.1], [0.8, 0.2]], owner_ids=7, document_ids=[10, 10, 11])
+    store.add_vector(2, [0.9, 0.1], owner_id=8, document_id=12)
+    assert store.search([1.0, 0.0], top_k=5, owner_id=7) == [1, 3]
+    assert store.search([1.0, 0.0], top_k=5, owner_id=8) == [2]
+    store.remove_vector(1)
+    store.remove_vector(3)  # compacts
+    assert store._size == 1
+    assert store.search([1.0, 0.0], top_k=5, owner_id=7) == []
+    assert store.search([1.0, 0.0], top_k=5, document_ids=[12]) == [2]
+    # Vectors added without metadata are only found unfiltered.
+    store.add_vector(4, [1.0, 0.0])
+    assert store.search([1.0, 0.0], top_k=5) == [4, 2]
+    assert store.search([1.0, 0.0], top_k=5, owner_id=8) == [2]
+
+def test_ivf_filtered_search():
+    vectors = _clustered(2000, 8, 16)
+    owners = np.where(np.arange(2000) % 100 == 0, 1, 2)
+    store = IVFVectorStore(n_lists=16, nprobe=2, train_size=1000)
+    store.add_vectors(list(range(2000)), vectors, owner_ids=owners)
+    exact = InMemoryVectorStore()
+    exact.add_vectors(list(range(2000)), vectors, owner_ids=owners)
+    # 20 owned vectors: scanned exactly instead of probing two lists.
+    assert store.search(vectors[3], top_k=5, owner_id=1) == exact.search(vectors[3], top_k=5, owner_id=1)
+    results = store.search(vectors[3], top_k=10, owner_id=2, nprobe=16)
+    assert results == exact.search(vectors[3], top_k=10, owner_id=2)
+
+def test_search_many_matches_single_searches():
+    rng = np.random.default_rng(2)
+    vectors = _clustered(3000, 8, 16, seed=2)
+    owners = np.arange(3000) % 50
+    queries = rng.standard_normal((7, 8))
+    flat = InMemoryVectorStore()
+    ivf = IVFVectorStore(n_lists=16, nprobe=3, train_size=1000)
+    for store in (flat, ivf):
+        store.add_vectors(list(range(3000)), vectors, owner_ids=owners)
+        store.remove_vector(5)
+        for filters in ({}, {"owner_id": 3}, {"owner_id": 3, "document_ids": []}):
+            batch = store.search_many_with_scores(queries, top_k=10, **filters)
+            assert len(batch) == len(queries)
+            for query, hits in zip(queries, batch):
+                single = store.search_with_scores(query, top_k=10, **filters)
+                assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in single]
+                assert [score for _, score in hits] == pytest.approx([score for _, score in single], rel=1e-5)
+    assert InMemoryVectorStore().search_many_with_scores(queries) == [[]] * 7
+
+def test_update_vectors_removes_and_adds_together():
+    for store in (InMemoryVectorStore(), IVFVectorStore(n_lists=2, nprobe=2, train_size=3)):
+        store.add_vectors([1, 2, 3], np.eye(3, dtype=np.float32), owner_ids=1, document_ids=10)
+        assert store.update_vectors([2, 7], [4], [[0.0, 1.0, 0.0]], owner_ids=1, document_ids=10) == 1
+        assert store.get_vector(2) is None
+        assert store.search([0.0, 1.0, 0.0], top_k=1, document_ids=[10]) == [4]
+        assert len(store) == 3
@@ -0,0 +1,63 @@
+"""Recall@k and latency of the IVF index against exact search.
+
+Usage: PYTHONPATH=. python benchmarks/bench_ann_recall.py [--size 200000] [--nprobe 1 4 8 16 32]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.vector_store import InMemoryVectorStore, IVFVectorStore
+
+
+def clustered(n: int, dim: int, clusters: int, rng):
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, n)
+    return (centers[labels] + rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def timed_search(store, queries, top_k, **params):
+    results, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(store.search(q, top_k=top_k, **params))
+        latencies.append(time.perf_counter() - t0)
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--lists", type=int, default=512)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered(args.size, args.dim, 1000, rng)
+    queries = data[rng.choice(args.size, args.queries, replace=False)] + 0.5 * rng.standard_normal(
+        (args.queries, args.dim), dtype=np.float32
+    )
+    ids = np.arange(args.size)
+
+    exact = InMemoryVectorStore()
+    exact.add_vectors(ids, data)
+    t0 = time.perf_counter()
+    ivf = IVFVectorStore(n_lists=args.lists, train_size=args.size)
+    ivf.add_vectors(ids, data)
+    print(f"IVF build+train ({args.lists} lists): {time.perf_counter() - t0:.2f}s")
+
+    truth, latencies = timed_search(exact, queries, args.top_k)
+    print(f"exact        recall@{args.top_k} 1.000  p50 {np.median(latencies) * 1e3:7.2f}ms  "
+          f"p99 {np.percentile(latencies, 99) * 1e3:7.2f}ms")
+    for nprobe in args.nprobe:
+        found, latencies = timed_search(ivf, queries, args.top_k, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(b)) / args.top_k for a, b in zip(found, truth)])
+        print(f"nprobe={nprobe:<5} recall@{args.top_k} {recall:.3f}  p50 {np.median(latencies) * 1e3:7.2f}ms  "
+              f"p99 {np.percentile(latencies, 99) * 1e3:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
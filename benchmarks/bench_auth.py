@@ -0,0 +1,87 @@
+"""Per-request authentication overhead with and without the user cache.
+
+Times ``get_current_user`` on its own (JWT decode + user query vs a cache
+hit) and end to end through GET /users/me, first with the cache disabled
+(ttl 0, the old behaviour) and then enabled.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_auth.py [--iterations 2000]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.core.auth import ALGORITHM, get_current_user, user_cache  # noqa: E402
+from app.core.config import SECRET_KEY  # noqa: E402
+from app.db.session import AsyncSessionLocal, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+async def time_dependency(token: str, iterations: int) -> list:
+    timings = []
+    for _ in range(iterations):
+        async with AsyncSessionLocal() as db:
+            t0 = time.perf_counter()
+            await get_current_user(token=token, db=db)
+            timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def time_endpoint(client: TestClient, token: str, iterations: int) -> list:
+    headers = {"Authorization": f"Bearer {token}"}
+    timings = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        response = client.get("/users/me", headers=headers)
+        timings.append(time.perf_counter() - t0)
+        assert response.status_code == 200
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-auth-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    token = jwt.encode({"sub": user.username}, SECRET_KEY, algorithm=ALGORITHM)
+
+    logging.disable(logging.INFO)  # per-request access logs
+    client = TestClient(app)
+    ttl = user_cache.ttl
+    try:
+        for label, cache_ttl in (("no cache", 0), ("cache", ttl)):
+            user_cache.clear()
+            user_cache.ttl = cache_ttl
+            dependency = asyncio.run(time_dependency(token, args.iterations))
+            endpoint = time_endpoint(client, token, args.iterations)
+            print(
+                f"{label:<9} get_current_user median {statistics.median(dependency) * 1e6:8.1f} us   "
+                f"GET /users/me median {statistics.median(endpoint) * 1e3:6.2f} ms"
+            )
+    finally:
+        user_cache.ttl = ttl
+        user_cache.clear()
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
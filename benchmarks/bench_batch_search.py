@@ -0,0 +1,126 @@
+"""Amortized cost of batched vector search versus one request per query.
+
+Stores --chunks synthetic chunks for one user, then answers --queries
+queries three ways through the API: one POST /documents/search_chunks per
+query, and one POST /documents/search_chunks/batch for all of them. It also
+times the store alone (a loop of ``search_with_scores`` vs one
+``search_many_with_scores``) to separate the matrix-matrix gain from the
+per-request overhead.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_batch_search.py [--chunks 100000] [--queries 32] [--top-k 10] [--rounds 5]
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import vector_store  # noqa: E402
+from app.services.embeddings import embedding_cache  # noqa: E402
+from benchmarks.synthetic import WORDS, sentence  # noqa: E402
+
+
+def median_of(rounds: int, fn) -> float:
+    timings = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-batch-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    document = Document(name="corpus.txt", owner_id=user.id, content="")
+    db.add(document)
+    db.commit()
+
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    chunk_ids = []
+    for start in range(0, args.chunks, 10_000):
+        texts = [sentence(rng, 40) for _ in range(start, min(start + 10_000, args.chunks))]
+        rows = [
+            {"document_id": document.id, "chunk_index": start + i, "chunk_text": text, "created_at": now, "updated_at": now}
+            for i, text in enumerate(texts)
+        ]
+        ids = list(db.scalars(insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True), rows))
+        vector_store.vector_store.add_vectors(
+            ids, embedding_cache.embed_many(texts), owner_ids=user.id, document_ids=document.id
+        )
+        chunk_ids.extend(ids)
+    db.commit()
+
+    logging.disable(logging.INFO)  # per-request access logs
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    store = vector_store.vector_store
+    try:
+        queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(args.queries)]
+        embeddings = embedding_cache.embed_many(queries)
+        print(f"{args.chunks} chunks, {args.queries} queries per batch, top_k {args.top_k}")
+
+        def loop_store():
+            for embedding in embeddings:
+                store.search_with_scores(embedding, top_k=args.top_k, owner_id=user.id)
+
+        def batch_store():
+            store.search_many_with_scores(embeddings, top_k=args.top_k, owner_id=user.id)
+
+        def loop_api():
+            for query in queries:
+                response = client.post("/documents/search_chunks", data={"query": query, "top_k": args.top_k})
+                assert response.json()["status"]
+
+        def batch_api():
+            response = client.post("/documents/search_chunks/batch", data={"queries": queries, "top_k": args.top_k})
+            assert len(response.json()["data"]) == len(queries)
+
+        for label, loop, batch in (("store", loop_store, batch_store), ("API", loop_api, batch_api)):
+            looped = median_of(args.rounds, loop)
+            batched = median_of(args.rounds, batch)
+            print(
+                f"{label:>5}: per query {looped / args.queries * 1e3:7.2f} ms one at a time, "
+                f"{batched / args.queries * 1e3:7.2f} ms batched ({looped / batched:4.1f}x)"
+            )
+    finally:
+        app.dependency_overrides.clear()
+        for chunk_id in chunk_ids:
+            store.remove_vector(chunk_id)
+        db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document.id))
+        db.delete(document)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Documents per second: one upload per file vs bulk uploads.
+
+Builds a mixed corpus of --files small files (txt, docx and pdf in equal
+parts, each a few chunks long), then ingests it for three fresh users:
+
+  single  one POST /documents/upload per file
+  bulk    POST /documents/upload/bulk with every file in the request
+  zip     POST /documents/upload/bulk with one zip archive of the corpus
+
+Each file is distinct, so nothing is skipped as a duplicate.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_bulk_upload.py [--files 600]
+"""
+import argparse
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("INGESTION_WORKER_ENABLED", "false")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import doc_ingestion, keyword_index, vector_store  # noqa: E402
+from benchmarks.synthetic import make_docx, make_pdf, make_text  # noqa: E402
+
+KINDS = (
+    ("txt", doc_ingestion.TXT_CONTENT_TYPE, lambda seed: make_text(12, seed=seed)),
+    ("docx", doc_ingestion.DOCX_CONTENT_TYPE, lambda seed: make_docx(12, seed=seed)),
+    ("pdf", doc_ingestion.PDF_CONTENT_TYPE, lambda seed: make_pdf(2, seed=seed)),
+)
+
+
+def make_corpus(count: int):
+    files = []
+    for seed in range(count):
+        extension, content_type, make = KINDS[seed % len(KINDS)]
+        files.append((f"file-{seed:06d}.{extension}", make(seed), content_type))
+    return files
+
+
+def drop_user(db, user: User) -> None:
+    document_ids = select(Document.id).where(Document.owner_id == user.id)
+    chunk_ids = list(db.scalars(select(DocumentChunk.id).where(DocumentChunk.document_id.in_(document_ids))))
+    vector_store.vector_store.update_vectors(chunk_ids, [], None)
+    keyword_index.unindex_chunks(chunk_ids)
+    db.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(document_ids)))
+    db.execute(delete(Document).where(Document.owner_id == user.id))
+    db.execute(delete(User).where(User.id == user.id))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=600)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # per-request access logs
+    Base.metadata.create_all(engine)
+    corpus = make_corpus(args.files)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data, _ in corpus:
+            zf.writestr(name, data)
+    size = sum(len(data) for _, data, _ in corpus)
+    print(f"{args.files} files, {size / 1e6:.1f} MB ({len(archive.getvalue()) / 1e6:.1f} MB zipped)")
+
+    def single(client):
+        for name, data, content_type in corpus:
+            assert client.post("/documents/upload", files={"file": (name, data, content_type)}).json()["status"]
+
+    def bulk(client):
+        files = [("files", file) for file in corpus]
+        results = client.post("/documents/upload/bulk", files=files).json()["data"]
+        assert all(result["status"] == "created" for result in results)
+
+    def zipped(client):
+        files = [("files", ("corpus.zip", archive.getvalue(), "application/zip"))]
+        results = client.post("/documents/upload/bulk", files=files).json()["data"]
+        assert all(result["status"] == "created" for result in results)
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        for label, run in (("single", single), ("bulk", bulk), ("zip", zipped)):
+            user = User(username=f"bench-bulk-{label}-{os.getpid()}", hashed_password="x")
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            db.expunge(user)  # handed to request threads as the current user
+            app.dependency_overrides[get_current_user] = lambda user=user: user
+            try:
+                t0 = time.perf_counter()
+                run(client)
+                seconds = time.perf_counter() - t0
+                documents = db.scalar(select(func.count(Document.id)).where(Document.owner_id == user.id))
+                assert documents == args.files
+                print(f"{label:>6}: {seconds:6.2f}s  {args.files / seconds:7.1f} documents/s")
+            finally:
+                app.dependency_overrides.clear()
+                drop_user(db, user)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Chunk persistence rows/sec: per-row add+flush vs batched INSERT ... RETURNING.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_chunk_insert.py [--chunks 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.models.user import User
+from app.services import vector_store
+from app.services.doc_ingestion import Chunk
+from app.services.document import CHUNK_BATCH_SIZE, store_chunks
+from app.services.embeddings import embedding_provider
+
+
+def per_row(db, document, chunks):
+    for idx, chunk in enumerate(chunks):
+        embedding = embedding_provider.embed(chunk)
+        row = DocumentChunk(
+            document_id=document.id,
+            chunk_index=idx,
+            chunk_text=chunk,
+            embedding=vector_store.encode_embedding(embedding),
+        )
+        db.add(row)
+        db.flush()
+        vector_store.vector_store.add_vector(row.id, embedding)
+
+
+def batched(db, document, chunks):
+    for start in range(0, len(chunks), CHUNK_BATCH_SIZE):
+        batch = chunks[start : start + CHUNK_BATCH_SIZE]
+        store_chunks(db, document, [Chunk(start + i, text, 0, len(text), 0) for i, text in enumerate(batch)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=10_000)
+    args = parser.parse_args()
+
+    url = os.getenv("DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    chunks = [f"chunk {i} " + "lorem ipsum dolor sit amet " * 80 for i in range(args.chunks)]
+
+    db = Session()
+    user = User(username=f"bench-insert-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    try:
+        for name, insert_chunks in (("per-row flush", per_row), ("batched RETURNING", batched)):
+            vector_store.vector_store = vector_store.InMemoryVectorStore()
+            document = Document(name=name, owner_id=user.id, content="")
+            db.add(document)
+            db.flush()
+            t0 = time.perf_counter()
+            insert_chunks(db, document, chunks)
+            db.commit()
+            elapsed = time.perf_counter() - t0
+            print(f"{name:<18} {args.chunks} chunks in {elapsed:6.2f}s  {args.chunks / elapsed:10.0f} rows/s")
+    finally:
+        db.rollback()
+        db.query(DocumentChunk).filter(DocumentChunk.document_id.in_(
+            db.query(Document.id).filter(Document.owner_id == user.id)
+        )).delete(synchronize_session=False)
+        db.query(Document).filter(Document.owner_id == user.id).delete(synchronize_session=False)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Random access into a large document: one chunk page vs the whole document.
+
+Creates a document with --chunks chunks, then times GET /documents/{id}/chunks
+for pages at random offset_index positions and, for contrast, a fetch of
+every chunk in one request (what the endpoint used to do).
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_chunk_pages.py [--chunks 50000] [--limit 50] [--samples 200]
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+# Let the whole-document fetch through the page-size cap.
+os.environ.setdefault("MAX_PAGE_SIZE", str(10**7))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-pages-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    document = Document(name="large.txt", owner_id=user.id, content="")
+    db.add(document)
+    db.commit()
+    now = datetime.datetime.utcnow()
+    text = "lorem ipsum dolor sit amet " * 100
+    for start in range(0, args.chunks, 10_000):
+        rows = [
+            {"document_id": document.id, "chunk_index": i, "chunk_text": text, "created_at": now, "updated_at": now}
+            for i in range(start, min(start + 10_000, args.chunks))
+        ]
+        db.execute(insert(DocumentChunk), rows)
+    db.commit()
+
+    logging.disable(logging.INFO)  # per-request access logs
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    url = f"/documents/{document.id}/chunks"
+    try:
+        rng = random.Random(0)
+        timings = []
+        for _ in range(args.samples):
+            offset_index = rng.randrange(args.chunks)
+            t0 = time.perf_counter()
+            page = client.get(url, params={"offset_index": offset_index, "limit": args.limit}).json()
+            timings.append(time.perf_counter() - t0)
+            assert page["data"]["chunks"][0]["chunk_index"] == offset_index
+        timings.sort()
+        print(
+            f"random page of {args.limit}: median {statistics.median(timings) * 1e3:6.2f} ms  "
+            f"p95 {timings[int(len(timings) * 0.95)] * 1e3:6.2f} ms"
+        )
+
+        t0 = time.perf_counter()
+        response = client.get(url, params={"limit": args.chunks})
+        elapsed = time.perf_counter() - t0
+        print(f"all {args.chunks} chunks:    {elapsed * 1e3:9.1f} ms  {len(response.content) / 1e6:6.1f} MB")
+    finally:
+        app.dependency_overrides.clear()
+        db.rollback()
+        db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).delete(synchronize_session=False)
+        db.query(Document).filter(Document.id == document.id).delete(synchronize_session=False)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
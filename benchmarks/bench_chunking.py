@@ -0,0 +1,98 @@
+"""Chunking throughput and memory on a large streamed text file.
+
+Compares the legacy word chunker (``iter_chunks``) with ``iter_text_chunks``
+in each boundary mode. Every run streams the file in ``iter_txt_blocks``
+blocks inside a fresh process and reports MB/s and peak RSS growth; the
+scaling column times the same run at 1/4 and 1/2 of the file to show the
+cost is linear.
+
+Usage: PYTHONPATH=. python benchmarks/bench_chunking.py [--mb 100] [--max-tokens 500] [--overlap 50]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+from app.services import doc_ingestion
+from benchmarks.synthetic import sentence
+
+MODES = ("legacy",) + doc_ingestion.CHUNK_BOUNDARIES
+
+
+def write_corpus(path: str, size: int, seed: int = 0) -> None:
+    """Paragraphs of synthetic sentences; a 4 MB block is repeated to ``size`` bytes."""
+    rng = random.Random(seed)
+    paragraphs = []
+    block_size = 0
+    while block_size < 4 * 1024 * 1024:
+        paragraph = " ".join(sentence(rng, rng.randint(4, 30)) for _ in range(rng.randint(1, 8)))
+        paragraphs.append(paragraph)
+        block_size += len(paragraph) + 2
+    block = ("\n\n".join(paragraphs) + "\n\n").encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            f.write(block[: size - written])
+            written += len(block)
+
+
+def _chunk(path: str, mode: str, limit: int, max_tokens: int, overlap: int, results) -> None:
+    def blocks():
+        seen = 0
+        for block in doc_ingestion.iter_txt_blocks(path):
+            if seen >= limit:
+                return
+            seen += len(block)
+            yield block
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "legacy":
+        count = sum(1 for _ in doc_ingestion.iter_chunks(blocks(), chunk_size=max_tokens))
+    else:
+        chunks = doc_ingestion.iter_text_chunks(blocks(), max_tokens=max_tokens, overlap=overlap, boundary=mode)
+        count = sum(1 for _ in chunks)
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    results.put((count, seconds, peak))
+
+
+def run(path: str, mode: str, limit: int, max_tokens: int, overlap: int) -> tuple:
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_chunk, args=(path, mode, limit, max_tokens, overlap, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=100)
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    size = args.mb * 1024 * 1024
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        write_corpus(path, size)
+        print(f"{args.mb} MB corpus, max_tokens={args.max_tokens}, overlap={args.overlap}")
+        for mode in MODES:
+            count, seconds, peak = run(path, mode, size, args.max_tokens, args.overlap)
+            scaling = [run(path, mode, size // d, args.max_tokens, args.overlap)[1] for d in (4, 2)]
+            print(
+                f"{mode:>9}  {count:>8} chunks  {seconds:6.2f}s  {args.mb / seconds:6.1f} MB/s  "
+                f"peak +{peak / 1024:5.1f} MB  "
+                f"time at 1/4,1/2,1: {scaling[0]:.2f}s {scaling[1]:.2f}s {seconds:.2f}s"
+            )
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
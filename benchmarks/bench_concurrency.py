@@ -0,0 +1,143 @@
+"""Latency of light GETs while heavy uploads are in flight.
+
+Serves the app with uvicorn on a local port, then times GET /documents/?limit=10
+from one client: first on an idle server, then while --uploaders clients
+upload --upload-mb text files back to back. With the async request path the
+uploads' parsing, embedding and inserts run in worker threads, so the light
+requests only queue behind them for CPU, not for the event loop.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_concurrency.py [--uploaders 4] [--upload-mb 2] [--requests 200]
+"""
+import argparse
+import logging
+import os
+import random
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("INGESTION_WORKER_ENABLED", "false")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from benchmarks.synthetic import sentence  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def corpus(size: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        part = sentence(rng, rng.randint(4, 30)) + " "
+        parts.append(part)
+        total += len(part)
+    return "".join(parts).encode()[:size]
+
+
+def latencies(base_url: str, count: int) -> list:
+    timings = []
+    with httpx.Client(base_url=base_url) as client:
+        for _ in range(count):
+            t0 = time.perf_counter()
+            response = client.get("/documents/", params={"limit": 10})
+            timings.append(time.perf_counter() - t0)
+            assert response.status_code == 200
+    return sorted(timings)
+
+
+def report(label: str, timings: list) -> None:
+    def pct(p):
+        return timings[min(len(timings) - 1, int(len(timings) * p))] * 1e3
+
+    print(
+        f"{label:<22} median {statistics.median(timings) * 1e3:7.2f} ms  p95 {pct(0.95):7.2f} ms  "
+        f"p99 {pct(0.99):7.2f} ms  max {timings[-1] * 1e3:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploaders", type=int, default=4)
+    parser.add_argument("--upload-mb", type=float, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-concurrency-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    logging.disable(logging.INFO)  # per-request access logs
+    app.dependency_overrides[get_current_user] = lambda: user
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}"
+
+    stop = threading.Event()
+    uploaded = []
+
+    def upload_loop(worker: int) -> None:
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            seq = 0
+            while not stop.is_set():
+                # A distinct body each time, so duplicate detection never short-circuits.
+                body = corpus(int(args.upload_mb * 1024 * 1024), seed=worker * 100_000 + seq)
+                files = {"file": (f"upload-{worker}-{seq}.txt", body, "text/plain")}
+                response = client.post("/documents/upload", files=files)
+                assert response.status_code == 200, response.text
+                uploaded.append(len(body))
+                seq += 1
+
+    try:
+        report("idle", latencies(base_url, args.requests))
+
+        uploaders = [threading.Thread(target=upload_loop, args=(i,)) for i in range(args.uploaders)]
+        t0 = time.perf_counter()
+        for thread in uploaders:
+            thread.start()
+        time.sleep(1.0)  # let the first uploads reach ingestion
+        loaded = latencies(base_url, args.requests)
+        stop.set()
+        for thread in uploaders:
+            thread.join()
+        elapsed = time.perf_counter() - t0
+        report(f"during {args.uploaders} uploads", loaded)
+        print(f"uploads completed: {len(uploaded)} ({sum(uploaded) / 1e6 / elapsed:.1f} MB/s)")
+    finally:
+        server.should_exit = True
+        server_thread.join()
+        app.dependency_overrides.clear()
+        doc_ids = [row.id for row in db.query(Document.id).filter(Document.owner_id == user.id)]
+        db.query(DocumentChunk).filter(DocumentChunk.document_id.in_(doc_ids)).delete(synchronize_session=False)
+        db.query(Document).filter(Document.owner_id == user.id).delete(synchronize_session=False)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
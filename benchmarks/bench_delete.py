@@ -0,0 +1,154 @@
+"""Cost of deleting a large document and of purging a user.
+
+Stores one document of --chunks synthetic chunks plus --other-chunks chunks
+in other documents of the same user, all in the vector store and keyword
+index, then measures:
+
+  eviction   removing the document's vectors from a copy of the store one
+             id at a time (remove_vector in a loop) vs one remove_vectors call
+  database   SELECT the chunk ids then DELETE, vs one DELETE ... RETURNING
+             (each in a transaction that is rolled back)
+  API        DELETE /documents/{id} end to end, then a filtered search
+  purge      deletion.purge_user over the rest of the user's corpus
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_delete.py [--chunks 100000] [--other-chunks 100000]
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("INGESTION_WORKER_ENABLED", "false")
+
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import deletion, keyword_index, vector_store  # noqa: E402
+from app.services.embeddings import embedding_cache  # noqa: E402
+from benchmarks.synthetic import sentence  # noqa: E402
+
+BATCH = 10_000
+
+
+def add_document(db, user: User, name: str, chunks: int, rng: random.Random, vectors: np.ndarray):
+    """Insert a document of ``chunks`` chunks and index them; returns (document id, chunk ids)."""
+    document_id = db.scalar(
+        insert(Document).returning(Document.id), [{"name": name, "owner_id": user.id, "content": ""}]
+    )
+    now = datetime.datetime.utcnow()
+    chunk_ids = []
+    for start in range(0, chunks, BATCH):
+        texts = [sentence(rng, 40) for _ in range(start, min(start + BATCH, chunks))]
+        block = vectors[np.arange(start, start + len(texts)) % len(vectors)]
+        rows = [
+            {
+                "document_id": document_id, "chunk_index": start + i, "chunk_text": text, "status": "active",
+                "embedding": vector_store.encode_embedding(vector), "created_at": now, "updated_at": now,
+            }
+            for i, (text, vector) in enumerate(zip(texts, block))
+        ]
+        ids = list(db.scalars(insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True), rows))
+        vector_store.vector_store.add_vectors(ids, block, owner_ids=user.id, document_ids=document_id)
+        keyword_index.index_chunks(ids, texts, user.id, document_id)
+        chunk_ids.extend(ids)
+    db.commit()
+    return document_id, chunk_ids
+
+
+def store_copy(document_ids, vectors: np.ndarray) -> vector_store.InMemoryVectorStore:
+    store = vector_store.InMemoryVectorStore(metric=vector_store.vector_store.metric)
+    for ids in document_ids:
+        store.add_vectors(ids, vectors[np.arange(len(ids)) % len(vectors)])
+    return store
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--other-chunks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-delete-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    try:
+        rng = random.Random(0)
+        vectors = np.random.default_rng(0).standard_normal((4096, embedding_cache.dim)).astype(np.float32)
+        t0 = time.perf_counter()
+        big_id, big_ids = add_document(db, user, "big.txt", args.chunks, rng, vectors)
+        other_ids = []
+        for first in range(0, args.other_chunks, 1000):
+            other_ids.append(add_document(db, user, f"other-{first}.txt", min(1000, args.other_chunks - first),
+                                          rng, vectors)[1])
+        print(f"{args.chunks} + {args.other_chunks} chunks stored in {time.perf_counter() - t0:.0f}s")
+
+        store = store_copy([big_ids] + other_ids, vectors)
+        loop, _ = timed(lambda: [store.remove_vector(chunk_id) for chunk_id in big_ids])
+        store = store_copy([big_ids] + other_ids, vectors)
+        bulk, _ = timed(lambda: store.remove_vectors(big_ids))
+        print(f"  eviction: {loop * 1e3:8.1f} ms one id at a time, {bulk * 1e3:8.1f} ms in bulk")
+
+        def select_then_delete():
+            ids = list(db.scalars(select(DocumentChunk.id).where(DocumentChunk.document_id == big_id)))
+            db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == big_id))
+            return ids
+
+        def delete_returning():
+            return list(db.scalars(
+                delete(DocumentChunk).where(DocumentChunk.document_id == big_id).returning(DocumentChunk.id)
+            ))
+
+        for label, statement in (("SELECT + DELETE", select_then_delete), ("DELETE RETURNING", delete_returning)):
+            seconds, ids = timed(statement)
+            db.rollback()
+            assert len(ids) == args.chunks
+            print(f"  database: {seconds * 1e3:8.1f} ms {label}")
+
+        seconds, response = timed(lambda: client.delete(f"/documents/{big_id}").json())
+        assert response["status"] is True
+        assert all(vector_store.vector_store.get_vector(chunk_id) is None for chunk_id in big_ids[:: 997])
+        print(f"       API: {seconds * 1e3:8.1f} ms DELETE /documents/{{id}} ({len(vector_store.vector_store)} vectors left)")
+        query = embedding_cache.embed_many(["bench delete query"])[0]
+        seconds, hits = timed(lambda: vector_store.vector_store.search(query, top_k=10, owner_id=user.id))
+        assert not set(hits) & set(big_ids)
+        print(f"            {seconds * 1e3:8.1f} ms owner-filtered search afterwards")
+
+        db.execute(User.__table__.update().where(User.id == user.id).values(deleted_at=datetime.datetime.utcnow()))
+        db.commit()
+        seconds, purged = timed(lambda: deletion.purge_user(user.id))
+        print(f"     purge: {seconds * 1e3:8.1f} ms for {purged} chunks in {len(other_ids)} documents")
+    finally:
+        app.dependency_overrides.clear()
+        deletion.purge_user(user.id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
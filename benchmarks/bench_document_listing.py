@@ -0,0 +1,113 @@
+"""Load test for GET /documents/ with 100k documents owned by one user.
+
+Compares loading every document with its content (the old listing) against
+keyset pages: the first page, the last page and a walk over every page.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_document_listing.py [--documents 100000] [--content-kb 4] [--limit 100]
+"""
+import argparse
+import datetime
+import logging
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.documents import DocumentBaseSchema  # noqa: E402
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=100_000)
+    parser.add_argument("--content-kb", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-listing-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    content = ("lorem ipsum dolor sit amet " * (args.content_kb * 40))[: args.content_kb * 1024]
+    now = datetime.datetime.utcnow()
+    for start in range(0, args.documents, 10_000):
+        rows = [
+            {"name": f"doc-{i}.txt", "owner_id": user.id, "content": content, "created_at": now, "updated_at": now}
+            for i in range(start, min(start + 10_000, args.documents))
+        ]
+        db.execute(insert(Document), rows)
+    db.commit()
+
+    logging.disable(logging.INFO)  # per-request access logs
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    try:
+        def full_listing():
+            # What GET /documents/ used to do: every row, content included.
+            docs = db.query(Document).filter(Document.owner_id == user.id).all()
+            context = {"include": {"content"}}
+            body = "[" + ",".join(DocumentBaseSchema.model_validate(d, context=context).model_dump_json() for d in docs) + "]"
+            db.expunge_all()
+            return len(body)
+
+        size, seconds = timed(full_listing)
+        print(f"full listing with content   {seconds * 1e3:9.1f} ms  {size / 1e6:8.1f} MB")
+
+        response, seconds = timed(lambda: client.get("/documents/", params={"limit": args.limit}))
+        print(f"first page                  {seconds * 1e3:9.1f} ms  {len(response.content) / 1e3:8.1f} KB")
+
+        last_ids = [
+            row.id
+            for row in db.query(Document.id)
+            .filter(Document.owner_id == user.id)
+            .order_by(Document.id.desc())
+            .limit(args.limit + 1)
+        ]
+        cursor = last_ids[-1]
+        response, seconds = timed(lambda: client.get("/documents/", params={"limit": args.limit, "cursor": cursor}))
+        assert len(response.json()["data"]) == args.limit
+        print(f"last page (keyset cursor)   {seconds * 1e3:9.1f} ms")
+
+        def walk():
+            pages, total, cursor = 0, 0, None
+            while True:
+                params = {"limit": args.limit} if cursor is None else {"limit": args.limit, "cursor": cursor}
+                page = client.get("/documents/", params=params).json()
+                pages += 1
+                total += len(page["data"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return pages, total
+
+        (pages, total), seconds = timed(walk)
+        assert total == args.documents
+        print(f"walk all {pages} pages       {seconds:9.2f} s   {seconds / pages * 1e3:6.2f} ms/page")
+    finally:
+        app.dependency_overrides.clear()
+        db.rollback()
+        db.query(Document).filter(Document.owner_id == user.id).delete(synchronize_session=False)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Throughput and server memory of GET /documents/export.
+
+Writes --chunks synthetic chunks (with embeddings) spread over documents
+of --chunks-per-document, serves the app with uvicorn in a child process,
+and streams the export over HTTP, sampling the server's RSS every 50 ms.
+For comparison it then loads the same chunk rows in one ``.all()`` here,
+as a non-streaming export would, and reports how much that grows RSS.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_export.py [--chunks 1000000] [--embeddings]
+"""
+import argparse
+import datetime
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("INGESTION_WORKER_ENABLED", "false")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+import uvicorn  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.embeddings import embedding_cache  # noqa: E402
+from benchmarks.synthetic import sentence  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def serve(user_id: int, port: int) -> None:
+    db = SessionLocal()
+    user = db.get(User, user_id)
+    db.expunge(user)
+    db.close()
+    app.dependency_overrides[get_current_user] = lambda: user
+    # No lifespan: the vector store and keyword index are not loaded.
+    uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")).run()
+
+
+def populate(db, user: User, chunks: int, per_document: int, dim: int) -> None:
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0).standard_normal((1000, dim)).astype("<f4")
+    now = datetime.datetime.utcnow()
+    for first in range(0, chunks, per_document):
+        count = min(per_document, chunks - first)
+        texts = [sentence(rng, 40) for _ in range(count)]
+        document_id = db.scalar(
+            insert(Document).returning(Document.id),
+            [{"name": f"doc-{first}.txt", "owner_id": user.id, "content": " ".join(texts), "content_hash": None}],
+        )
+        db.execute(
+            insert(DocumentChunk),
+            [
+                {
+                    "document_id": document_id, "chunk_index": i, "chunk_text": text, "status": "active",
+                    "embedding": vectors[(first + i) % len(vectors)].tobytes(), "created_at": now, "updated_at": now,
+                }
+                for i, text in enumerate(texts)
+            ],
+        )
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--chunks-per-document", type=int, default=1000)
+    parser.add_argument("--embeddings", action="store_true", help="include embeddings in the export")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-export-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    t0 = time.perf_counter()
+    populate(db, user, args.chunks, args.chunks_per_document, embedding_cache.dim)
+    print(f"wrote {args.chunks} chunks in {time.perf_counter() - t0:.0f}s")
+
+    port = free_port()
+    server = multiprocessing.get_context("fork").Process(target=serve, args=(user.id, port), daemon=True)
+    server.start()
+    try:
+        while True:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/docs")
+                break
+            except httpx.ConnectError:
+                time.sleep(0.1)
+        idle = rss_mb(server.pid)
+        peak = [idle]
+        done = threading.Event()
+
+        def sample():
+            while not done.is_set():
+                peak[0] = max(peak[0], rss_mb(server.pid))
+                time.sleep(0.05)
+
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        lines = size = 0
+        t0 = time.perf_counter()
+        params = {"include_embeddings": str(args.embeddings).lower()}
+        with httpx.stream("GET", f"http://127.0.0.1:{port}/documents/export", params=params, timeout=None) as response:
+            for block in response.iter_bytes():
+                lines += block.count(b"\n")
+                size += len(block)
+        seconds = time.perf_counter() - t0
+        done.set()
+        sampler.join()
+        print(
+            f"streamed {lines} lines, {size / 1e6:.0f} MB in {seconds:.1f}s "
+            f"({lines / seconds:,.0f} lines/s, {size / 1e6 / seconds:.0f} MB/s)"
+        )
+        print(f"server RSS {idle:.0f} MB idle, {peak[0]:.0f} MB peak (+{peak[0] - idle:.0f} MB)")
+
+        before = rss_mb(os.getpid())
+        columns = [DocumentChunk.id, DocumentChunk.chunk_text] + ([DocumentChunk.embedding] if args.embeddings else [])
+        rows = db.execute(select(*columns)).all()
+        print(f"loading {len(rows)} chunk rows at once instead: +{rss_mb(os.getpid()) - before:.0f} MB")
+        del rows
+    finally:
+        server.terminate()
+        server.join()
+        document_ids = select(Document.id).where(Document.owner_id == user.id)
+        db.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(document_ids)))
+        db.execute(delete(Document).where(Document.owner_id == user.id))
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Owner-filtered vector search when one user owns 1% of a large corpus.
+
+Fills the flat and IVF stores with --vectors random vectors spread evenly
+over --owners owners (so each owns 1/owners of them) and compares, per
+query:
+
+  unfiltered   a global search (what the endpoint did before; it leaks)
+  post-filter  a global search for top_k, then dropping other owners' hits
+  mask         scoring every row and masking out other owners
+  partition    the store's owner filter (scores only that owner's rows)
+
+Post-filter is fast but fills few of its top_k slots; "filled" is the
+average number of owned results per query.
+
+Usage: PYTHONPATH=. python benchmarks/bench_filtered_search.py [--vectors 500000] [--dim 128] [--owners 100] [--top-k 10]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.services.vector_store import InMemoryVectorStore, IVFVectorStore, _top_k
+
+
+def timed(fn, queries):
+    timings, results = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        results.append(fn(query))
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings) * 1e3, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=500_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    owners = rng.integers(0, args.owners, size=args.vectors)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    owner_id = 0
+    print(f"{args.vectors} vectors x {args.dim}, owner {owner_id} has {int((owners == owner_id).sum())}")
+
+    stores = {
+        "flat": InMemoryVectorStore(initial_capacity=args.vectors),
+        "ivf": IVFVectorStore(n_lists=256, nprobe=8, initial_capacity=args.vectors),
+    }
+    for start in range(0, args.vectors, 100_000):
+        stop = min(start + 100_000, args.vectors)
+        block = rng.standard_normal((stop - start, args.dim)).astype(np.float32)
+        for store in stores.values():
+            store.add_vectors(np.arange(start, stop), block, owner_ids=owners[start:stop])
+
+    for label, store in stores.items():
+        owned = owners[store._ids[: store._size]] == owner_id
+
+        def post_filter(query, store=store):
+            return [hit for hit in store.search_with_scores(query, top_k=args.top_k) if owners[hit[0]] == owner_id]
+
+        def mask(query, store=store, owned=owned):
+            scores = store._matrix[: store._size] @ store._prepare(query)[0]
+            scores[~owned] = -np.inf
+            return _top_k(store._ids[: store._size], scores, args.top_k)
+
+        cases = [
+            ("unfiltered", lambda query, store=store: store.search_with_scores(query, top_k=args.top_k)),
+            ("post-filter", post_filter),
+            ("mask", mask),
+            ("partition", lambda query, store=store: store.search_with_scores(query, top_k=args.top_k, owner_id=owner_id)),
+        ]
+        for name, fn in cases:
+            median, results = timed(fn, queries)
+            filled = sum(sum(owners[chunk_id] == owner_id for chunk_id, _ in hits) for hits in results) / len(results)
+            print(f"{label:>4} {name:>11}: median {median:8.3f} ms  filled {filled:5.1f}/{args.top_k}")
+
+
+if __name__ == "__main__":
+    main()
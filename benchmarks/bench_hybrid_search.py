@@ -0,0 +1,111 @@
+"""Latency of vector, keyword and hybrid chunk search through the API.
+
+Stores --chunks synthetic chunks for one user, indexes them in the vector
+store and the in-process keyword index, then times POST
+/documents/search_chunks (mode=vector and mode=hybrid with both fusion
+methods) and POST /documents/search_keywords for random 2-4 word queries.
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_hybrid_search.py [--chunks 100000] [--top-k 10] [--candidates 50] [--samples 200]
+"""
+import argparse
+import datetime
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("KEYWORD_SEARCH_BACKEND", "memory")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+
+from app.core.auth import get_current_user  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import keyword_index, vector_store  # noqa: E402
+from app.services.embeddings import embedding_cache  # noqa: E402
+from benchmarks.synthetic import WORDS, sentence  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-hybrid-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    document = Document(name="corpus.txt", owner_id=user.id, content="")
+    db.add(document)
+    db.commit()
+
+    rng = random.Random(0)
+    now = datetime.datetime.utcnow()
+    t0 = time.perf_counter()
+    for start in range(0, args.chunks, 10_000):
+        texts = [sentence(rng, 40) for _ in range(start, min(start + 10_000, args.chunks))]
+        rows = [
+            {"document_id": document.id, "chunk_index": start + i, "chunk_text": text, "created_at": now, "updated_at": now}
+            for i, text in enumerate(texts)
+        ]
+        ids = list(db.scalars(insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True), rows))
+        vector_store.vector_store.add_vectors(
+            ids, embedding_cache.embed_many(texts), owner_ids=user.id, document_ids=document.id
+        )
+        keyword_index.keyword_index.add(ids, texts, user.id, document.id)
+    db.commit()
+    print(f"indexed {args.chunks} chunks in {time.perf_counter() - t0:.1f}s")
+
+    logging.disable(logging.INFO)  # per-request access logs
+    app.dependency_overrides[get_current_user] = lambda: user
+    client = TestClient(app)
+    common = {"top_k": args.top_k, "candidates": args.candidates}
+    cases = [
+        ("vector", "/documents/search_chunks", {"mode": "vector"}),
+        ("keyword", "/documents/search_keywords", {}),
+        ("hybrid rrf", "/documents/search_chunks", {"mode": "hybrid", "fusion": "rrf"}),
+        ("hybrid weighted", "/documents/search_chunks", {"mode": "hybrid", "fusion": "weighted"}),
+    ]
+    queries = [" ".join(rng.sample(WORDS, rng.randint(2, 4))) for _ in range(args.samples)]
+    try:
+        for label, url, params in cases:
+            timings = []
+            for query in queries:
+                t0 = time.perf_counter()
+                response = client.post(url, data={"query": query, **common, **params})
+                timings.append(time.perf_counter() - t0)
+                assert response.json()["status"], response.text
+            timings.sort()
+            print(
+                f"{label:>16}: median {statistics.median(timings) * 1e3:7.2f} ms  "
+                f"p95 {timings[int(len(timings) * 0.95)] * 1e3:7.2f} ms"
+            )
+    finally:
+        app.dependency_overrides.clear()
+        chunk_ids = list(db.scalars(select(DocumentChunk.id).where(DocumentChunk.document_id == document.id)))
+        for chunk_id in chunk_ids:
+            vector_store.vector_store.remove_vector(chunk_id)
+        keyword_index.keyword_index.remove(chunk_ids)
+        db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document.id))
+        db.delete(document)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Build time, memory and query latency of the in-process keyword index.
+
+Indexes --chunks synthetic chunks of --tokens words drawn from a Zipf-like
+vocabulary, spread over --owners users, then times owner-filtered and
+unfiltered BM25 queries of one to three terms at three frequency bands
+(common, mid, rare).
+
+Usage: PYTHONPATH=. python benchmarks/bench_keyword_search.py [--chunks 1000000] [--tokens 40] [--owners 100]
+"""
+import argparse
+import resource
+import statistics
+import time
+
+import numpy as np
+
+from app.services.keyword_index import InvertedIndex
+
+
+def make_texts(rng, count: int, tokens: int, vocabulary: np.ndarray, weights: np.ndarray):
+    ids = rng.choice(len(vocabulary), size=(count, tokens), p=weights)
+    return [" ".join(vocabulary[row]) for row in ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f"term{i}" for i in range(args.vocabulary)])
+    weights = 1.0 / np.arange(1, args.vocabulary + 1)
+    weights /= weights.sum()
+
+    index = InvertedIndex()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    build = 0.0
+    batch = 10_000
+    for start in range(0, args.chunks, batch):
+        count = min(batch, args.chunks - start)
+        texts = make_texts(rng, count, args.tokens, vocabulary, weights)
+        owners = rng.integers(0, args.owners, size=count).tolist()
+        t0 = time.perf_counter()
+        index.add(list(range(start, start + count)), texts, owners)
+        build += time.perf_counter() - t0
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    print(
+        f"indexed {len(index)} chunks x {args.tokens} tokens in {build:.1f}s "
+        f"({len(index) / build:,.0f} chunks/s), peak RSS +{peak:.0f} MB"
+    )
+
+    bands = {"common": (0, 100), "mid": (100, 5_000), "rare": (5_000, args.vocabulary)}
+    for band, (low, high) in bands.items():
+        for terms in (1, 2, 3):
+            queries = [" ".join(vocabulary[rng.integers(low, high, size=terms)]) for _ in range(args.queries)]
+            for label, owner in (("owner", True), ("all", False)):
+                timings = []
+                for query in queries:
+                    owner_id = int(rng.integers(0, args.owners)) if owner else None
+                    t0 = time.perf_counter()
+                    index.search(query, top_k=10, owner_id=owner_id)
+                    timings.append(time.perf_counter() - t0)
+                timings.sort()
+                print(
+                    f"{band:>6} {terms} term(s) {label:>5}  median {statistics.median(timings) * 1e3:7.2f} ms  "
+                    f"p95 {timings[int(len(timings) * 0.95)] * 1e3:7.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Login throughput and unrelated-request latency during a login burst.
+
+Serves the app with uvicorn in a child process, then runs --clients threads
+that log in back to back (honouring Retry-After on 429) for --seconds while
+one more client times GET /documents/ (a cached token, so no bcrypt). Each
+hashing mode gets a fresh server:
+
+  inline      bcrypt on the event loop
+  threadpool  bcrypt in the shared request threadpool, unbounded
+  bounded     the bounded hashing pool (PASSWORD_HASH_WORKERS / _QUEUE), 429s when full
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_login.py [--clients 32] [--seconds 5] [--modes inline,threadpool,bounded]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+os.environ.setdefault("INGESTION_WORKER_ENABLED", "false")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi.concurrency import run_in_threadpool  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.core.auth import ALGORITHM  # noqa: E402
+from app.core.config import SECRET_KEY  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import user as user_service  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+async def run_threadpool(fn, *args):
+    return await run_in_threadpool(fn, *args)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pct(timings: list, p: float) -> float:
+    return timings[min(len(timings) - 1, int(len(timings) * p))] * 1e3
+
+
+def serve(port: int, mode: str) -> None:
+    logging.disable(logging.WARNING)  # access logs and 429 warnings
+    if mode != "bounded":
+        user_service.hashing_pool.run = {"inline": run_inline, "threadpool": run_threadpool}[mode]
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error")
+
+
+def start_server(mode: str):
+    port = free_port()
+    process = multiprocessing.Process(target=serve, args=(port, mode), daemon=True)
+    process.start()
+    base_url = f"http://127.0.0.1:{port}"
+    while True:
+        try:
+            httpx.get(f"{base_url}/docs")
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+
+def burst(base_url: str, username: str, token: str, clients: int, seconds: float):
+    stop = threading.Event()
+    statuses = Counter()
+    login_times = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def login_loop():
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                response = client.post("/users/token", data={"username": username, "password": PASSWORD})
+                elapsed = time.perf_counter() - t0
+                if t0 + elapsed > deadline:
+                    break  # finished after the burst; not counted
+                with lock:
+                    statuses[response.status_code] += 1
+                    if response.status_code == 200:
+                        login_times.append(elapsed)
+                if response.status_code == 429:
+                    stop.wait(float(response.headers.get("Retry-After", 1)))
+
+    threads = [threading.Thread(target=login_loop) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    light = []
+    with httpx.Client(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=None) as client:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            assert client.get("/documents/", params={"limit": 10}).status_code == 200
+            light.append(time.perf_counter() - t0)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return statuses, sorted(login_times), sorted(light)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--modes", default="inline,threadpool,bounded")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-login-{os.getpid()}", hashed_password=user_service.get_password_hash(PASSWORD))
+    db.add(user)
+    db.commit()
+    token = jwt.encode({"sub": user.username}, SECRET_KEY, algorithm=ALGORITHM)
+
+    logging.disable(logging.INFO)  # client request logs
+    print(
+        f"{args.clients} login clients for {args.seconds:.0f}s, bcrypt rounds {user_service.BCRYPT_ROUNDS}, "
+        f"hashing pool {user_service.hashing_pool.workers} workers + {user_service.hashing_pool.max_queue} queued"
+    )
+    try:
+        for mode in args.modes.split(","):
+            process, base_url = start_server(mode)
+            try:
+                statuses, logins, light = burst(base_url, user.username, token, args.clients, args.seconds)
+            finally:
+                process.terminate()
+                process.join()
+            print(
+                f"{mode:>10}  logins/s {statuses[200] / args.seconds:6.1f}  429s {statuses[429]:5d}  "
+                f"login p50 {pct(logins, 0.5):7.1f} ms  "
+                f"GET /documents/ p50 {statistics.median(light) * 1e3:7.1f} ms  "
+                f"p99 {pct(light, 0.99):7.1f} ms  max {light[-1] * 1e3:7.1f} ms  ({len(light)} requests)"
+            )
+    finally:
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
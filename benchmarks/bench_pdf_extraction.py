@@ -0,0 +1,43 @@
+"""Serial vs process-pool PDF text extraction on synthetic documents.
+
+Usage: PYTHONPATH=. python benchmarks/bench_pdf_extraction.py [--pages 100 300 600] [--workers 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.services import doc_ingestion
+from benchmarks.synthetic import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 300, 600])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(make_pdf(pages))
+        try:
+            t0 = time.perf_counter()
+            serial = doc_ingestion.extract_pdf_pages(f.name, workers=1)
+            serial_time = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            parallel = doc_ingestion.extract_pdf_pages(f.name, workers=args.workers, min_pages=1)
+            parallel_time = time.perf_counter() - t0
+        finally:
+            os.remove(f.name)
+        assert [p.text for p in serial] == [p.text for p in parallel]
+        slowest = max(serial, key=lambda p: p.seconds)
+        print(
+            f"{pages:>5} pages  serial {serial_time:6.2f}s  "
+            f"parallel x{args.workers} {parallel_time:6.2f}s  "
+            f"speedup {serial_time / parallel_time:4.1f}x  "
+            f"slowest page #{slowest.index} {slowest.seconds * 1e3:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
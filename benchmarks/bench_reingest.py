@@ -0,0 +1,123 @@
+"""Cost of a small edit to a large document: incremental vs full re-ingestion.
+
+Ingests a synthetic document of --chunks chunks, then applies a few edits
+(one sentence inserted in the middle, one word changed, one sentence
+appended) two ways:
+
+  incremental  services.document.reingest_document (diff, re-embed changes)
+  full         delete every chunk and ingest the new text from scratch
+
+and reports wall time, chunks written and texts sent to the embedding
+provider (cache misses; the in-process cache is cleared before each run).
+
+Runs against DATABASE_URL if it is set, otherwise a temporary SQLite file.
+
+Usage: PYTHONPATH=. python benchmarks/bench_reingest.py [--chunks 5000]
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+
+from sqlalchemy import delete, select  # noqa: E402
+
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.models.document_chunk import DocumentChunk  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import keyword_index, vector_store  # noqa: E402
+from app.services.document import ingest_document, reingest_document  # noqa: E402
+from app.services.embeddings import embedding_cache  # noqa: E402
+from benchmarks.synthetic import sentence  # noqa: E402
+
+
+def insert_sentence(rng: random.Random, text: str) -> str:
+    middle = text.index(". ", len(text) // 2) + 2
+    return text[:middle] + sentence(rng) + " " + text[middle:]
+
+
+def change_word(rng: random.Random, text: str) -> str:
+    word = text.index(" ", len(text) // 3) + 1
+    return text[:word] + "edited" + text[text.index(" ", word):]
+
+
+def append_sentence(rng: random.Random, text: str) -> str:
+    return text + " " + sentence(rng)
+
+
+EDITS = {"insert sentence": insert_sentence, "change word": change_word, "append sentence": append_sentence}
+
+
+def drop_chunks(db, document: Document) -> None:
+    chunk_ids = list(db.scalars(select(DocumentChunk.id).where(DocumentChunk.document_id == document.id)))
+    vector_store.vector_store.update_vectors(chunk_ids, [], None)
+    keyword_index.unindex_chunks(chunk_ids)
+    db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document.id))
+
+
+def timed(fn):
+    embedding_cache.clear()
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result, embedding_cache.stats()["misses"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = User(username=f"bench-reingest-{os.getpid()}", hashed_password="x")
+    db.add(user)
+    db.flush()
+    documents = []
+    try:
+        rng = random.Random(0)
+        # ~12-word sentences, 500-token chunks with a 50-token overlap
+        text = " ".join(sentence(rng) for _ in range(args.chunks * 450 // 12))
+        for name in ("incremental", "full"):
+            document = Document(name=f"{name}.txt", owner_id=user.id, content="")
+            db.add(document)
+            db.flush()
+            count = ingest_document(db, document, [text])
+            db.commit()
+            documents.append(document)
+        print(f"{count} chunks, {len(text) / 1e6:.1f} MB of text")
+
+        incremental, full = documents
+        for label, edit in EDITS.items():
+            new_text = edit(rng, text)
+            seconds, result, embedded = timed(lambda: reingest_document(db, incremental, new_text))
+            print(
+                f"{label:>15}  incremental {seconds * 1e3:8.1f} ms  "
+                f"{result.added:5d} written {embedded:5d} embedded  ({result.removed} removed)"
+            )
+
+            def reingest_full():
+                drop_chunks(db, full)
+                written = ingest_document(db, full, [new_text])
+                db.commit()
+                return written
+
+            seconds, written, embedded = timed(reingest_full)
+            print(f"{'':>15}  full        {seconds * 1e3:8.1f} ms  {written:5d} written {embedded:5d} embedded")
+            text = new_text
+    finally:
+        for document in documents:
+            drop_chunks(db, document)
+            db.delete(document)
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Exact vector search throughput and tail latency.
+
+Usage: PYTHONPATH=. python benchmarks/bench_vector_search.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.vector_store import InMemoryVectorStore
+
+
+def run(size: int, dim: int, queries: int, top_k: int):
+    rng = np.random.default_rng(0)
+    store = InMemoryVectorStore()
+    block = 100_000
+    start = time.perf_counter()
+    for offset in range(0, size, block):
+        n = min(block, size - offset)
+        store.add_vectors(np.arange(offset, offset + n), rng.standard_normal((n, dim), dtype=np.float32))
+    build = time.perf_counter() - start
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+    latencies = []
+    for q in query_vectors:
+        t0 = time.perf_counter()
+        store.search(q, top_k=top_k)
+        latencies.append(time.perf_counter() - t0)
+    latencies = np.array(latencies)
+    print(
+        f"{size:>9} vectors  build {build:6.2f}s  "
+        f"QPS {1 / latencies.mean():8.1f}  "
+        f"p50 {np.percentile(latencies, 50) * 1e3:7.2f}ms  "
+        f"p99 {np.percentile(latencies, 99) * 1e3:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.dim, args.queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Synthetic documents for the benchmarks."""
+import io
+import random
+
+WORDS = (
+    "ingestion vector chunk document search index latency throughput query embedding "
+    "cluster shard page paragraph token sentence retrieval ranking corpus storage"
+).split()
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """A minimal valid PDF with ``pages`` pages of Helvetica text."""
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [b"BT /F1 10 Tf 40 800 Td 12 TL"]
+        for _ in range(lines_per_page):
+            lines.append(b"(" + sentence(rng).encode() + b") '")
+        lines.append(b"ET")
+        stream = b"\n".join(lines)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int, seed: int = 0) -> bytes:
+    import docx
+
+    rng = random.Random(seed)
+    document = docx.Document()
+    for _ in range(paragraphs):
+        document.add_paragraph(" ".join(sentence(rng) for _ in range(4)))
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_text(paragraphs: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    return "\n\n".join(" ".join(sentence(rng) for _ in range(4)) for _ in range(paragraphs)).encode()